@@ -0,0 +1,51 @@
+"""Add prediction jobs for asynchronous submit
+
+Revision ID: 20261017_000001
+Revises: 20251210_040000
+Create Date: 2026-10-17 00:00:01.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000001"
+down_revision = "20251210_040000"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "incidents",
+        sa.Column("prediction_pending", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.create_table(
+        "prediction_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("incident_id", sa.Integer(), sa.ForeignKey("incidents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("requested_by_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("PENDING", "RUNNING", "DONE", "FAILED", name="predictionjobstatus"),
+            nullable=False,
+            server_default="PENDING",
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now(), onupdate=sa.func.now()),
+    )
+    op.create_index("ix_prediction_jobs_incident_id", "prediction_jobs", ["incident_id"])
+    op.create_index("ix_prediction_jobs_status", "prediction_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_prediction_jobs_status", table_name="prediction_jobs")
+    op.drop_index("ix_prediction_jobs_incident_id", table_name="prediction_jobs")
+    op.drop_table("prediction_jobs")
+    op.drop_column("incidents", "prediction_pending")
+    op.execute("DROP TYPE IF EXISTS predictionjobstatus")
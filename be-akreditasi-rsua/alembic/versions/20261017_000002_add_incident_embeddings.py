@@ -0,0 +1,38 @@
+"""Add incident embeddings for similar-incident search
+
+Revision ID: 20261017_000002
+Revises: 20261017_000001
+Create Date: 2026-10-17 00:00:02.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000002"
+down_revision = "20261017_000001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "incident_embeddings",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("incident_id", sa.Integer(), sa.ForeignKey("incidents.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("model_name", sa.String(length=128), nullable=False),
+        sa.Column("dim", sa.Integer(), nullable=False),
+        sa.Column("vector", sa.LargeBinary(), nullable=False),
+        sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id"), nullable=True),
+        sa.Column("occurred_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index("ix_incident_embeddings_incident_id", "incident_embeddings", ["incident_id"], unique=True)
+    op.create_index("ix_incident_embeddings_department_id", "incident_embeddings", ["department_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_incident_embeddings_department_id", table_name="incident_embeddings")
+    op.drop_index("ix_incident_embeddings_incident_id", table_name="incident_embeddings")
+    op.drop_table("incident_embeddings")
@@ -0,0 +1,42 @@
+"""Add speculative draft prediction cache
+
+Revision ID: 20261017_000003
+Revises: 20261017_000002
+Create Date: 2026-10-17 00:00:03.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000003"
+down_revision = "20261017_000002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "incident_prediction_cache",
+        sa.Column(
+            "incident_id", sa.Integer(), sa.ForeignKey("incidents.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("text_hash", sa.String(length=64), nullable=False),
+        sa.Column("model_version", sa.String(length=128), nullable=False),
+        sa.Column(
+            "predicted_category",
+            sa.Enum("KTD", "KTC", "KNC", "KPCS", "SENTINEL", name="incidentcategory"),
+            nullable=False,
+        ),
+        sa.Column("predicted_confidence", sa.Float(), nullable=False),
+        sa.Column("skp_code", sa.Enum(*[f"skp{i}" for i in range(1, 7)], name="skpcode"), nullable=True),
+        sa.Column("mdp_code", sa.Enum(*[f"mdp{i}" for i in range(1, 18)], name="mdpcode"), nullable=True),
+        sa.Column("embedding", sa.LargeBinary(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now(), onupdate=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("incident_prediction_cache")
@@ -0,0 +1,26 @@
+"""Add predicted category probabilities
+
+Revision ID: 20261017_000004
+Revises: 20261017_000003
+Create Date: 2026-10-17 00:00:04.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000004"
+down_revision = "20261017_000003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("incidents", sa.Column("predicted_probabilities", sa.JSON(), nullable=True))
+    op.add_column("incident_prediction_cache", sa.Column("predicted_probabilities", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("incident_prediction_cache", "predicted_probabilities")
+    op.drop_column("incidents", "predicted_probabilities")
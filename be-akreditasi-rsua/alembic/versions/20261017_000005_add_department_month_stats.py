@@ -0,0 +1,48 @@
+"""Add department monthly incident counters
+
+Revision ID: 20261017_000005
+Revises: 20261017_000004
+Create Date: 2026-10-17 00:00:05.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000005"
+down_revision = "20261017_000004"
+branch_labels = None
+depends_on = None
+
+
+MONTH_START_SQL = {
+    "mysql": "DATE_SUB(DATE(occurred_at), INTERVAL DAYOFMONTH(occurred_at) - 1 DAY)",
+    "sqlite": "DATE(occurred_at, 'start of month')",
+    "postgresql": "CAST(DATE_TRUNC('month', occurred_at) AS DATE)",
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "department_month_stats",
+        sa.Column("department_id", sa.Integer(), sa.ForeignKey("departments.id"), primary_key=True),
+        sa.Column("month_start", sa.Date(), primary_key=True),
+        sa.Column("reported_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("closed_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+    )
+    month_start = MONTH_START_SQL[op.get_bind().dialect.name]
+    op.execute(
+        f"""
+        INSERT INTO department_month_stats (department_id, month_start, reported_count, closed_count, updated_at)
+        SELECT department_id, {month_start}, COUNT(*), SUM(CASE WHEN status = 'CLOSED' THEN 1 ELSE 0 END), CURRENT_TIMESTAMP
+        FROM incidents
+        WHERE status <> 'DRAFT' AND department_id IS NOT NULL AND occurred_at IS NOT NULL
+        GROUP BY department_id, {month_start}
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("department_month_stats")
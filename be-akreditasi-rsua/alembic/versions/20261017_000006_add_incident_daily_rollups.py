@@ -0,0 +1,46 @@
+"""Add daily incident rollups for the dashboard
+
+Revision ID: 20261017_000006
+Revises: 20261017_000005
+Create Date: 2026-10-17 00:00:06.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000006"
+down_revision = "20261017_000005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "incident_daily_rollups",
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("department_id", sa.Integer(), primary_key=True, server_default="0"),
+        sa.Column("category", sa.String(length=16), primary_key=True, server_default=""),
+        sa.Column("skp_code", sa.String(length=8), primary_key=True, server_default=""),
+        sa.Column("mdp_code", sa.String(length=8), primary_key=True, server_default=""),
+        sa.Column("grading", sa.String(length=8), primary_key=True, server_default=""),
+        sa.Column("incident_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute(
+        """
+        INSERT INTO incident_daily_rollups (day, department_id, category, skp_code, mdp_code, grading, incident_count)
+        SELECT DATE(COALESCE(occurred_at, created_at)), COALESCE(department_id, 0),
+               COALESCE(final_category, predicted_category, ''), COALESCE(skp_code, ''), COALESCE(mdp_code, ''),
+               COALESCE(grading, ''), COUNT(*)
+        FROM incidents
+        WHERE status <> 'DRAFT'
+        GROUP BY DATE(COALESCE(occurred_at, created_at)), COALESCE(department_id, 0),
+                 COALESCE(final_category, predicted_category, ''), COALESCE(skp_code, ''), COALESCE(mdp_code, ''),
+                 COALESCE(grading, '')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("incident_daily_rollups")
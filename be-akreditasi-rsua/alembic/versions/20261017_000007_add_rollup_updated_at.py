@@ -0,0 +1,29 @@
+"""Add updated_at to daily incident rollups for dashboard ETags
+
+Revision ID: 20261017_000007
+Revises: 20261017_000006
+Create Date: 2026-10-17 00:00:07.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000007"
+down_revision = "20261017_000006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "mysql":
+        column_type, default = mysql.DATETIME(fsp=6), sa.text("CURRENT_TIMESTAMP(6)")
+    else:
+        column_type, default = sa.DateTime(), sa.func.now()
+    op.add_column("incident_daily_rollups", sa.Column("updated_at", column_type, nullable=False, server_default=default))
+
+
+def downgrade() -> None:
+    op.drop_column("incident_daily_rollups", "updated_at")
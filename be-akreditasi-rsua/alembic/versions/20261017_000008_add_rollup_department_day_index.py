@@ -0,0 +1,23 @@
+"""Index daily incident rollups by department and day for windowed dashboards
+
+Revision ID: 20261017_000008
+Revises: 20261017_000007
+Create Date: 2026-10-17 00:00:08.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000008"
+down_revision = "20261017_000007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_incident_daily_rollups_department_day", "incident_daily_rollups", ["department_id", "day"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_incident_daily_rollups_department_day", table_name="incident_daily_rollups")
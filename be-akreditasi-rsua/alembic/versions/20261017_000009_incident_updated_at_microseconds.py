@@ -0,0 +1,44 @@
+"""Store incidents.updated_at with microsecond precision on MySQL for list ETags
+
+Revision ID: 20261017_000009
+Revises: 20261017_000008
+Create Date: 2026-10-17 00:00:09.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = "20261017_000009"
+down_revision = "20261017_000008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Other dialects already keep microseconds in DATETIME/TIMESTAMP columns.
+    if op.get_bind().dialect.name != "mysql":
+        return
+    op.alter_column(
+        "incidents",
+        "updated_at",
+        type_=mysql.DATETIME(fsp=6),
+        existing_type=mysql.DATETIME(),
+        existing_nullable=False,
+        server_default=sa.text("CURRENT_TIMESTAMP(6)"),
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "mysql":
+        return
+    op.alter_column(
+        "incidents",
+        "updated_at",
+        type_=mysql.DATETIME(),
+        existing_type=mysql.DATETIME(fsp=6),
+        existing_nullable=False,
+        server_default=sa.func.now(),
+    )
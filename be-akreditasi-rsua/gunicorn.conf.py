@@ -0,0 +1,49 @@
+"""Production server config: load models once in the master, then fork workers.
+
+Usage:
+    gunicorn -c gunicorn.conf.py src.app.main:app
+
+With ``preload_app`` the app module is imported before forking, and the
+``on_starting`` hook then loads the LightGBM, SKP/MDP and MiniLM weights in the
+master (ML_PRELOAD_MODELS), so workers share those pages copy-on-write. Importing
+the app elsewhere (uvicorn, tests, scripts) never loads them. Check the effect with
+``scripts/memory_report.py``.
+
+Preloading and the inference process pool are mutually exclusive: pool processes
+are spawned, not forked, and each loads its own copy of the models. While
+ML_PRELOAD_MODELS is true, ML_EXECUTOR_WORKERS is ignored with a warning; set
+ML_PRELOAD_MODELS=false to use the pool instead.
+"""
+
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault("ML_PRELOAD_MODELS", "true")
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", max(2, multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+
+
+def on_starting(server):
+    from src.app.config import get_settings
+
+    if not get_settings().ml_preload_models:
+        return
+    from src.app.services import ml
+
+    ml.load_models(preload=True)
+    # Keep the loaded objects out of GC passes so collections do not dirty shared pages.
+    gc.freeze()
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live gauges from the multiprocess metrics directory.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
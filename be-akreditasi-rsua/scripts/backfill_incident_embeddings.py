@@ -0,0 +1,54 @@
+"""Store MiniLM embeddings for submitted incidents that do not have one yet.
+
+Usage:
+    PYTHONPATH=. python scripts/backfill_incident_embeddings.py [--window 1000]
+
+Needed once for incidents submitted before ``incident_embeddings`` existed (or
+while the embedder was unavailable) so ``/v1/incidents/{id}/similar`` can find
+them. Incidents are read in id order one window at a time and embedded with the
+length-bucketed ``ml.embed_bulk``; each window is committed on its own, so the
+script can be stopped and rerun.
+"""
+
+import argparse
+import time
+
+from sqlmodel import Session, select
+
+from src.app.db import engine
+from src.app.models.incident import Incident, IncidentEmbedding, IncidentStatus
+from src.app.services import ml
+from src.app.services.incidents.similarity import store_embedding
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backfill incident embeddings for similarity search")
+    parser.add_argument("--window", type=int, default=1000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    total = 0
+    last_id = 0
+    with Session(engine) as session:
+        while True:
+            incidents = session.exec(
+                select(Incident)
+                .outerjoin(IncidentEmbedding, IncidentEmbedding.incident_id == Incident.id)
+                .where(IncidentEmbedding.id.is_(None), Incident.status != IncidentStatus.DRAFT, Incident.id > last_id)
+                .order_by(Incident.id)
+                .limit(args.window)
+            ).all()
+            if not incidents:
+                break
+            vectors = next(ml.embed_bulk([incident.free_text_description for incident in incidents], window=len(incidents)))
+            for incident, vector in zip(incidents, vectors):
+                store_embedding(session, incident, vector, ml.MINILM_MODEL_NAME)
+            session.commit()
+            total += len(incidents)
+            last_id = incidents[-1].id
+            print(f"embedded {total} incident(s), last id {last_id}", flush=True)
+    print(f"Done: {total} incident(s) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Microbenchmark the LightGBM scoring step on its own.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_classifier.py [--batch-sizes 1,16,128] [--threads 1,2,0] [--repeat 200]
+
+Compares the sklearn wrapper path (``predict`` then ``predict_proba``, two passes
+over the ensemble) with ``ml.classify_embeddings`` (one ``Booster.predict``) on
+random MiniLM-sized inputs, for each batch size and LightGBM thread count
+(0 = LightGBM default). Checks that both paths agree on labels and confidences.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from src.app.config import get_settings
+from src.app.services import ml
+
+
+def _time_ms(fn: Callable[[], object], repeat: int) -> List[float]:
+    fn()  # warm caches / OpenMP pool
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _sklearn_path(model, embeddings: np.ndarray):
+    labels = model.predict(embeddings)
+    probabilities = model.predict_proba(embeddings)
+    return labels, probabilities[np.arange(len(labels)), labels.astype(int)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmark LightGBM scoring paths")
+    parser.add_argument("--model", default=get_settings().model_path)
+    parser.add_argument("--batch-sizes", default="1,16,128")
+    parser.add_argument("--threads", default="1,2,0")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    model = ml._load_artifact(args.model)
+    if not hasattr(model, "booster_"):
+        print(f"{args.model} is not a fitted LightGBM estimator", file=sys.stderr)
+        return 1
+    rng = np.random.default_rng(0)
+    dim = model.n_features_in_
+
+    print(f"{'batch':>6} {'path':>14} {'p50 ms':>9} {'p95 ms':>9} {'speedup':>8}")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",") if size.strip()):
+        embeddings = rng.standard_normal((batch_size, dim)).astype(np.float32)
+        baseline = _time_ms(lambda: _sklearn_path(model, embeddings), args.repeat)
+        base_p50 = statistics.median(baseline)
+        print(f"{batch_size:>6} {'sklearn':>14} {base_p50:>9.3f} {np.percentile(baseline, 95):>9.3f} {1.0:>8.1f}")
+
+        expected_labels, expected_confidence = _sklearn_path(model, embeddings)
+        for threads in (int(value) for value in args.threads.split(",") if value.strip()):
+            labels, confidence, _ = ml.classify_embeddings(model, embeddings, threads)
+            if not (np.array_equal(labels, expected_labels) and np.allclose(confidence, expected_confidence)):
+                print(f"booster path disagrees with sklearn at batch {batch_size}, threads {threads}", file=sys.stderr)
+                return 1
+            samples = _time_ms(lambda: ml.classify_embeddings(model, embeddings, threads), args.repeat)
+            p50 = statistics.median(samples)
+            label = f"booster t={threads}"
+            print(f"{batch_size:>6} {label:>14} {p50:>9.3f} {np.percentile(samples, 95):>9.3f} {base_p50 / p50:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
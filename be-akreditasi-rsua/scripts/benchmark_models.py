@@ -0,0 +1,157 @@
+"""Benchmark the incident models on the REKAP spreadsheet corpus.
+
+Usage:
+    PYTHONPATH=. python scripts/benchmark_models.py [--batch-sizes 1,8,32,128] [--output benchmarks/models.json]
+
+Runs every ``Kronologis Insiden`` row through preprocess -> MiniLM encode ->
+LightGBM and through the SKP/MDP pipeline at each batch size, timing each stage
+per batch. Reports throughput, p50/p95 batch latency, peak RSS and agreement with
+the spreadsheet's labelled category/SKP/MDP, and writes everything as JSON so runs
+for different models or ``EMBEDDER_BACKEND`` values can be diffed.
+"""
+
+import argparse
+import json
+import platform
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+from scripts.rekap_corpus import DEFAULT_CORPUS, load_corpus
+from src.app.config import get_settings
+from src.app.services import ml
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile_ms(values: List[float], q: float) -> float:
+    return round(float(np.percentile(values, q)) * 1000, 3) if values else 0.0
+
+
+def _agreement(predicted: List[Any], expected: List[Any]) -> Dict[str, Any] | None:
+    if all(value is None for value in predicted):
+        return None  # stage did not run
+    pairs = [(p, e) for p, e in zip(predicted, expected) if e is not None]
+    matched = sum(1 for p, e in pairs if p == e)
+    return {"labelled": len(pairs), "matched": matched, "accuracy": round(matched / len(pairs), 4) if pairs else None}
+
+
+def run_batch_size(rows: List[Dict[str, Any]], batch_size: int) -> Dict[str, Any]:
+    model, model_version, skp_mdp = ml.registry.snapshot()
+    embedder = ml.classifier.embedder
+    stage_seconds = {"preprocess": 0.0, "encode": 0.0, "classify": 0.0, "skp_mdp": 0.0}
+    latencies: List[float] = []
+    categories: List[Any] = []
+    skp_codes: List[Any] = []
+    mdp_codes: List[Any] = []
+
+    started = time.perf_counter()
+    for offset in range(0, len(rows), batch_size):
+        texts = [row["text"] for row in rows[offset : offset + batch_size]]
+        batch_started = time.perf_counter()
+
+        stage = time.perf_counter()
+        processed = [ml.preprocess_for_bert(text) for text in texts]
+        stage_seconds["preprocess"] += time.perf_counter() - stage
+
+        if model is not None and embedder is not None:
+            # Call the embedder directly: the embedding cache would hide encode cost.
+            stage = time.perf_counter()
+            vectors = embedder.encode(processed, batch_size=len(processed), convert_to_numpy=True).astype(np.float32)
+            stage_seconds["encode"] += time.perf_counter() - stage
+            stage = time.perf_counter()
+            indices, _, _ = ml.classify_embeddings(model, vectors, ml.classifier.settings.ml_booster_threads)
+            stage_seconds["classify"] += time.perf_counter() - stage
+            categories.extend(
+                getattr(ml.classifier.category_lookup.get(int(idx)), "value", None) for idx in indices
+            )
+        else:
+            categories.extend(None for _ in texts)
+
+        stage = time.perf_counter()
+        codes = skp_mdp.predict(texts) if skp_mdp is not None else [{"skp": None, "mdp": None} for _ in texts]
+        stage_seconds["skp_mdp"] += time.perf_counter() - stage
+        skp_codes.extend(getattr(code["skp"], "value", None) for code in codes)
+        mdp_codes.extend(getattr(code["mdp"], "value", None) for code in codes)
+
+        latencies.append(time.perf_counter() - batch_started)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "batch_size": batch_size,
+        "model_version": model_version,
+        "texts": len(rows),
+        "batches": len(latencies),
+        "seconds": round(elapsed, 4),
+        "throughput_per_second": round(len(rows) / elapsed, 2) if elapsed else None,
+        "batch_latency_ms": {"p50": _percentile_ms(latencies, 50), "p95": _percentile_ms(latencies, 95)},
+        "stage_seconds": {name: round(seconds, 4) for name, seconds in stage_seconds.items()},
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "agreement": {
+            "category": _agreement(categories, [row["category"] for row in rows]),
+            "skp": _agreement(skp_codes, [row["skp"] for row in rows]),
+            "mdp": _agreement(mdp_codes, [row["mdp"] for row in rows]),
+        },
+    }
+
+
+def main() -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Benchmark incident models on the REKAP corpus")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N rows")
+    parser.add_argument("--output", default="benchmarks/models.json")
+    args = parser.parse_args()
+
+    rows = load_corpus(args.corpus, limit=args.limit)
+    load_started = time.perf_counter()
+    ml.classifier._ensure_embedder()
+    ml.registry.snapshot()
+    load_seconds = time.perf_counter() - load_started
+    if ml.classifier.embedder is None:
+        print("warning: embedder unavailable; encode/classify stages are skipped", file=sys.stderr)
+
+    # One untimed pass so lazy initialisation is not charged to batch size 1.
+    run_batch_size(rows[:8], 8)
+
+    results = [run_batch_size(rows, int(size)) for size in args.batch_sizes.split(",") if size.strip()]
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "corpus": str(args.corpus),
+        "model_path": settings.model_path,
+        "skp_mdp_model_path": settings.skp_mdp_model_path,
+        "embedder_backend": settings.embedder_backend if ml.classifier.embedder is not None else None,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "load_seconds": round(load_seconds, 4),
+        "results": results,
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    print(f"{'batch':>6} {'texts/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'rss MB':>8} {'cat acc':>8} {'skp acc':>8} {'mdp acc':>8}")
+    for result in results:
+        accuracy = {name: (value or {}).get("accuracy") for name, value in result["agreement"].items()}
+        print(
+            f"{result['batch_size']:>6} {result['throughput_per_second']:>10} "
+            f"{result['batch_latency_ms']['p50']:>9} {result['batch_latency_ms']['p95']:>9} {result['peak_rss_mb']:>8} "
+            f"{str(accuracy['category']):>8} {str(accuracy['skp']):>8} {str(accuracy['mdp']):>8}"
+        )
+    print(f"Wrote {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
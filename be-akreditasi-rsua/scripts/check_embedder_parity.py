@@ -0,0 +1,65 @@
+"""Check that the ONNX embedder yields the same LightGBM predictions as torch.
+
+Usage:
+    PYTHONPATH=. python scripts/check_embedder_parity.py [--onnx-dir models/minilm-onnx] [--min-agreement 0.99]
+
+Encodes every ``Kronologis Insiden`` row of the REKAP spreadsheet with both
+backends, runs the stored LightGBM classifier on each and reports prediction
+agreement, embedding cosine similarity and encode time. Exits non-zero when the
+agreement is below ``--min-agreement`` so it can gate a backend switch.
+"""
+
+import argparse
+import sys
+import time
+
+import joblib
+import numpy as np
+
+from scripts.rekap_corpus import DEFAULT_CORPUS, load_corpus
+from src.app.config import get_settings
+from src.app.services.ml import load_embedder, preprocess_for_bert
+
+
+def _timed_encode(embedder, texts: list[str], batch_size: int) -> tuple[np.ndarray, float]:
+    start = time.perf_counter()
+    vectors = embedder.encode(texts, batch_size=batch_size, convert_to_numpy=True).astype(np.float32)
+    return vectors, time.perf_counter() - start
+
+
+def main() -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Compare torch and ONNX MiniLM backends")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--onnx-dir", default=settings.onnx_embedder_dir)
+    parser.add_argument("--model", default=settings.model_path, help="LightGBM classifier pickle")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-agreement", type=float, default=0.99)
+    args = parser.parse_args()
+
+    texts = [preprocess_for_bert(row["text"]) for row in load_corpus(args.corpus)]
+    model = joblib.load(args.model)
+
+    torch_vectors, torch_seconds = _timed_encode(load_embedder("torch", args.onnx_dir), texts, args.batch_size)
+    onnx_vectors, onnx_seconds = _timed_encode(load_embedder("onnx", args.onnx_dir), texts, args.batch_size)
+
+    torch_pred = model.predict(torch_vectors)
+    onnx_pred = model.predict(onnx_vectors)
+    agreement = float(np.mean(torch_pred == onnx_pred))
+    cosine = np.sum(torch_vectors * onnx_vectors, axis=1) / (
+        np.linalg.norm(torch_vectors, axis=1) * np.linalg.norm(onnx_vectors, axis=1) + 1e-12
+    )
+
+    print(f"texts:              {len(texts)}")
+    print(f"prediction agree:   {agreement:.4f} ({int(np.sum(torch_pred != onnx_pred))} mismatches)")
+    print(f"cosine mean/min:    {float(cosine.mean()):.5f} / {float(cosine.min()):.5f}")
+    print(f"encode torch/onnx:  {torch_seconds:.2f}s / {onnx_seconds:.2f}s")
+    if agreement < args.min_agreement:
+        print(f"FAIL: agreement below {args.min_agreement}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""Export the MiniLM embedder to ONNX and quantize it to int8.
+
+Usage:
+    PYTHONPATH=. python scripts/export_onnx_embedder.py [--output models/minilm-onnx]
+
+Writes ``model.onnx`` (fp32), ``model.int8.onnx`` (dynamic int8 quantization) and
+``tokenizer.json`` into the output directory. Point ``ONNX_EMBEDDER_DIR`` at it and
+set ``EMBEDDER_BACKEND=onnx``; run ``scripts/check_embedder_parity.py`` first.
+Requires the export-only dependencies: torch, sentence-transformers, onnx, onnxruntime.
+"""
+
+import argparse
+from pathlib import Path
+
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from sentence_transformers import SentenceTransformer
+
+from src.app.services.ml import MINILM_MAX_SEQ_LENGTH, MINILM_MODEL_NAME, ONNX_MODEL_FILE, ONNX_TOKENIZER_FILE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export MiniLM to a quantized ONNX model")
+    parser.add_argument("--output", default="models/minilm-onnx", help="Directory for the exported artifacts")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+
+    st_model = SentenceTransformer(MINILM_MODEL_NAME, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model.tokenizer
+
+    sample = tokenizer(
+        ["pasien jatuh dari tempat tidur", "salah pemberian obat"],
+        padding=True,
+        truncation=True,
+        max_length=MINILM_MAX_SEQ_LENGTH,
+        return_tensors="pt",
+    )
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = output / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            str(fp32_path),
+            input_names=input_names,
+            output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes,
+            opset_version=args.opset,
+            do_constant_folding=True,
+        )
+    quantize_dynamic(str(fp32_path), str(output / ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    tokenizer.backend_tokenizer.save(str(output / ONNX_TOKENIZER_FILE))
+    print(f"Exported {MINILM_MODEL_NAME} to {output / ONNX_MODEL_FILE}")
+
+
+if __name__ == "__main__":
+    main()
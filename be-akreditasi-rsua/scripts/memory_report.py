@@ -0,0 +1,66 @@
+"""Report unique vs shared memory for the API master and its workers.
+
+Usage:
+    python scripts/memory_report.py <master_pid>
+    python scripts/memory_report.py $(pgrep -o -f "gunicorn -c gunicorn.conf.py")
+
+Reads ``/proc/<pid>/smaps_rollup`` (Linux 4.14+). ``unique`` is private memory
+(what killing the process would free), ``shared`` is pages shared with other
+processes such as preloaded model weights, and ``pss`` splits shared pages evenly
+across the processes mapping them, so the PSS column sums to real usage.
+"""
+
+import sys
+from pathlib import Path
+
+FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_rollup(pid: int) -> dict[str, int]:
+    values = {field: 0 for field in FIELDS}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        key, _, rest = line.partition(":")
+        if key in values:
+            values[key] = int(rest.split()[0])  # kB
+    return values
+
+
+def children(pid: int) -> list[int]:
+    pids: list[int] = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        content = (task / "children").read_text().split()
+        pids.extend(int(child) for child in content)
+    return pids
+
+
+def command(pid: int) -> str:
+    return Path(f"/proc/{pid}/cmdline").read_text().replace("\0", " ").strip()[:60]
+
+
+def main() -> None:
+    if len(sys.argv) != 2:
+        sys.exit(__doc__)
+    master = int(sys.argv[1])
+    pids = [master] + children(master)
+    header = f"{'pid':>8} {'role':<7} {'rss MB':>9} {'unique MB':>10} {'shared MB':>10} {'pss MB':>9}  command"
+    print(header)
+    print("-" * len(header))
+    totals = {"rss": 0.0, "unique": 0.0, "pss": 0.0}
+    for pid in pids:
+        stats = read_rollup(pid)
+        rss = stats["Rss"] / 1024
+        unique = (stats["Private_Clean"] + stats["Private_Dirty"]) / 1024
+        shared = (stats["Shared_Clean"] + stats["Shared_Dirty"]) / 1024
+        pss = stats["Pss"] / 1024
+        totals["rss"] += rss
+        totals["unique"] += unique
+        totals["pss"] += pss
+        role = "master" if pid == master else "worker"
+        print(f"{pid:>8} {role:<7} {rss:>9.1f} {unique:>10.1f} {shared:>10.1f} {pss:>9.1f}  {command(pid)}")
+    print("-" * len(header))
+    print(f"{'total':>8} {'':<7} {totals['rss']:>9.1f} {totals['unique']:>10.1f} {'':>10} {totals['pss']:>9.1f}")
+    print(f"Actual footprint (sum of PSS): {totals['pss']:.1f} MB; naive sum of RSS: {totals['rss']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Drain asynchronous submit prediction jobs.
+
+Usage:
+    PYTHONPATH=. python scripts/prediction_worker.py [--batch-size 32] [--poll-interval 2] [--once]
+
+Run alongside the API in every SUBMIT_PREDICTION_MODE: async submits always queue a
+job, and sync submits queue one when the model misses its latency budget and the
+heuristic answered instead. Several workers can run concurrently; jobs are claimed
+with SELECT ... FOR UPDATE SKIP LOCKED.
+"""
+
+import argparse
+import logging
+import time
+
+from sqlmodel import Session
+
+# Import models to ensure SQLAlchemy registry has all relationships loaded
+from src.app.models.user import User  # noqa: F401
+from src.app.models.location import Location  # noqa: F401
+from src.app.models.department import Department  # noqa: F401
+from src.app.config import get_settings
+from src.app.db import engine
+from src.app.services import ml
+from src.app.services.incidents.jobs import run_prediction_jobs
+
+logger = logging.getLogger("prediction_worker")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process pending incident prediction jobs")
+    parser.add_argument("--batch-size", type=int, default=None, help="Jobs claimed per batch (default from settings)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to sleep when the queue is empty")
+    parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Follow admin model reloads/rollbacks published by the API workers.
+    ml.registry.start_watching(get_settings().model_watch_interval_seconds)
+    while True:
+        with Session(engine) as session:
+            processed = run_prediction_jobs(session, args.batch_size)
+        if processed:
+            logger.info("Processed %s prediction job(s)", processed)
+            continue
+        if args.once:
+            break
+        time.sleep(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
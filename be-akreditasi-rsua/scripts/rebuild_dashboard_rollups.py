@@ -0,0 +1,32 @@
+"""Recompute ``incident_daily_rollups`` and ``department_month_stats`` from the incidents table.
+
+Usage:
+    PYTHONPATH=. python scripts/rebuild_dashboard_rollups.py
+
+The service layer keeps the rollups current on submit, prediction, category edit,
+close, regrade and reclassify. Run this after loading incidents directly into the
+database (seed scripts, imports) or to repair drift. Each table is rebuilt with one
+DELETE and one INSERT ... SELECT in a single transaction, so neither the dashboard
+nor grading sees a half-built table.
+"""
+
+import time
+
+from sqlmodel import Session
+
+from src.app.db import engine
+from src.app.services.incidents.rollups import rebuild_rollups
+from src.app.services.incidents.service import rebuild_month_stats
+
+
+def main() -> None:
+    started = time.perf_counter()
+    with Session(engine) as session:
+        rows = rebuild_rollups(session)
+        months = rebuild_month_stats(session)
+        session.commit()
+    print(f"Done: {rows} rollup row(s), {months} department month(s) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
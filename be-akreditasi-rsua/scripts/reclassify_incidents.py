@@ -0,0 +1,57 @@
+"""Re-score incidents whose model_version differs from the loaded classifier.
+
+Usage:
+    PYTHONPATH=. python scripts/reclassify_incidents.py --actor-email admin@rsua.local \
+        [--chunk-size 500] [--rate 100] [--checkpoint models/.reclassify_checkpoint.json] [--restart]
+
+Safe to interrupt: progress is checkpointed after every chunk and the next run
+resumes from the last processed id (as long as the model version is unchanged).
+Exits with an error if another run (API or script) holds the checkpoint lock.
+"""
+
+import argparse
+import logging
+
+from sqlmodel import Session, select
+
+# Import models to ensure SQLAlchemy registry has all relationships loaded
+from src.app.models.location import Location  # noqa: F401
+from src.app.models.department import Department  # noqa: F401
+from src.app.models.user import User
+from src.app.config import get_settings
+from src.app.db import engine
+from src.app.services.incidents.reclassify import ReclassifyAlreadyRunning, reclassify_incidents
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Re-classify incidents with the current model")
+    parser.add_argument("--actor-email", required=True, help="User recorded as actor in the audit log")
+    parser.add_argument("--chunk-size", type=int, default=settings.reclassify_chunk_size)
+    parser.add_argument("--rate", type=float, default=settings.reclassify_max_rows_per_second, help="Max rows per second (0 = unlimited)")
+    parser.add_argument("--checkpoint", default=settings.reclassify_checkpoint_path)
+    parser.add_argument("--restart", action="store_true", help="Ignore any existing checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    with Session(engine) as session:
+        actor = session.exec(select(User).where(User.email == args.actor_email)).one_or_none()
+        if actor is None:
+            raise SystemExit(f"User {args.actor_email} not found")
+
+    try:
+        progress = reclassify_incidents(
+            engine,
+            actor.id,
+            chunk_size=args.chunk_size,
+            max_rows_per_second=args.rate,
+            checkpoint_path=args.checkpoint,
+            restart=args.restart,
+        )
+    except ReclassifyAlreadyRunning as exc:
+        raise SystemExit(str(exc))
+    print(f"Reclassified {progress.processed} incident(s) to {progress.target_version}; {progress.changed} changed, {progress.skipped} skipped (model fallback).")
+
+
+if __name__ == "__main__":
+    main()
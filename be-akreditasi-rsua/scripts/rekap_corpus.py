@@ -0,0 +1,57 @@
+"""Load the labelled incident corpus from the REKAP spreadsheet.
+
+Shared by the model tooling scripts (ONNX parity check, benchmarks). The sheet
+layout matches ``scripts/seed_incidents.py``: headers on the third row of ``Lembar1``.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[1] / "Copy of REKAP FULL.xlsx"
+TEXT_COLUMN = "Kronologis Insiden"
+CATEGORY_COLUMN = "Jenis Insiden"
+SKP_COLUMN = "SKP"
+MDP_COLUMN = "Pelanggaran"
+CATEGORY_PREFIXES = {"KTD": "KTD", "KTC": "KTC", "KNC": "KNC", "KPC": "KPCS", "SENTINEL": "SENTINEL"}
+
+
+def normalize_category(label: object) -> Optional[str]:
+    """Map spreadsheet labels like ``ktc - Kejadian Tidak Cidera`` to IncidentCategory values."""
+    if not isinstance(label, str):
+        return None
+    upper = label.strip().upper()
+    for prefix, value in CATEGORY_PREFIXES.items():
+        if upper.startswith(prefix):
+            return value
+    return None
+
+
+def normalize_code(label: object, prefix: str) -> Optional[str]:
+    """Map labels like ``Pencegahan Jatuh SKP 6`` / ``MDP 1: ...`` to SKPCode/MDPCode values."""
+    if not isinstance(label, str):
+        return None
+    match = re.search(rf"{prefix}\s*(\d+)", label, flags=re.IGNORECASE)
+    return f"{prefix.lower()}{match.group(1)}" if match else None
+
+
+def load_corpus(path: str | Path = DEFAULT_CORPUS, sheet: str = "Lembar1", limit: int | None = None) -> List[Dict[str, Optional[str]]]:
+    df = pd.read_excel(path, header=2, sheet_name=sheet)
+    rows: List[Dict[str, Optional[str]]] = []
+    for _, row in df.iterrows():
+        text = row.get(TEXT_COLUMN)
+        if not isinstance(text, str) or not text.strip():
+            continue
+        rows.append(
+            {
+                "text": text.strip(),
+                "category": normalize_category(row.get(CATEGORY_COLUMN)),
+                "skp": normalize_code(row.get(SKP_COLUMN), "SKP"),
+                "mdp": normalize_code(row.get(MDP_COLUMN), "MDP"),
+            }
+        )
+        if limit is not None and len(rows) >= limit:
+            break
+    return rows
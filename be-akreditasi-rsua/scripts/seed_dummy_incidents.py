@@ -2,6 +2,9 @@
 
 Usage (dari folder backend):
     docker compose exec api python scripts/seed_dummy_incidents.py
+
+Most incidents are created as reported (submitted, reviewed or closed) so the mutu
+dashboard and monthly grading counters have data; dashboards exclude drafts.
 """
 
 from datetime import datetime, timedelta
@@ -29,6 +32,19 @@ from src.app.models.incident import (
     MDPCode,
     ResponderRole,
 )
+from src.app.services.incidents.rollups import rebuild_rollups
+from src.app.services.incidents.service import rebuild_month_stats
+
+
+# Weighted towards reported incidents; drafts are left out of dashboards and grading.
+SEED_STATUSES = [
+    IncidentStatus.DRAFT,
+    IncidentStatus.SUBMITTED,
+    IncidentStatus.SUBMITTED,
+    IncidentStatus.PJ_REVIEWED,
+    IncidentStatus.MUTU_REVIEWED,
+    IncidentStatus.CLOSED,
+]
 
 
 def pick_reporter_for_department(session: Session, dept_id: int) -> User | None:
@@ -107,6 +123,7 @@ def run(min_per_dept: int = 3, max_per_dept: int = 10) -> None:
                 predicted_category = final_category
                 predicted_confidence = round(random.uniform(0.5, 0.95), 3)
                 grading = random.choice(list(IncidentGrading))
+                status = random.choice(SEED_STATUSES)
 
                 patient_name = f"Pasien {i + 1} {dept.name}"
                 patient_identifier = f"PID-{dept.id:03d}-{i + 1:04d}"
@@ -139,7 +156,7 @@ def run(min_per_dept: int = 3, max_per_dept: int = 10) -> None:
                     predicted_confidence=predicted_confidence,
                     model_version="dummy-seed-1.0",
                     grading=grading,
-                    status=IncidentStatus.DRAFT,
+                    status=status,
                 )
 
                 session.add(incident)
@@ -147,6 +164,10 @@ def run(min_per_dept: int = 3, max_per_dept: int = 10) -> None:
 
             print(f"[ok] Created {num_for_dept} incidents for department '{dept.name}'")
 
+        session.commit()
+        # Rows were inserted directly, bypassing the service layer's rollup and counter updates.
+        rebuild_rollups(session)
+        rebuild_month_stats(session)
         session.commit()
         print(f"Total incidents created: {total_created}")
 
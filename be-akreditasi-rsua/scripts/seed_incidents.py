@@ -5,6 +5,10 @@ Usage:
 
 The script expects columns whose names map to the Incident fields. Adjust COLUMN_MAP
 below if your spreadsheet uses different headers.
+
+Rows are imported as drafts by default. The dashboards and monthly grading counters
+only count reported incidents, so pass ``--status SUBMITTED`` (or a later status) to
+import them as reported; the rollups and counters are rebuilt either way.
 """
 
 import argparse
@@ -30,6 +34,8 @@ from src.app.models.incident import (
     PayerType,
     ReporterType,
 )
+from src.app.services.incidents.rollups import rebuild_rollups
+from src.app.services.incidents.service import rebuild_month_stats
 
 df = pd.read_excel('../Copy of REKAP FULL.xlsx',header=2,sheet_name='Lembar1')
 COLUMN_MAP = {
@@ -100,7 +106,7 @@ def clean_value(row: Dict[str, Any], key: str):
     return val
 
 
-def build_incident(row: Dict[str, Any]) -> Incident:
+def build_incident(row: Dict[str, Any], status: IncidentStatus = IncidentStatus.DRAFT) -> Incident:
     return Incident(
         patient_name=clean_value(row, "patient_name"),
         patient_identifier=clean_value(row, "patient_identifier"),
@@ -122,7 +128,7 @@ def build_incident(row: Dict[str, Any]) -> Incident:
         free_text_description=clean_value(row, "free_text_description") or "N/A",
         harm_indicator=clean_value(row, "harm_indicator"),
         attachments=[],
-        status=IncidentStatus.DRAFT,
+        status=status,
     )
 
 
@@ -131,6 +137,12 @@ def main():
     parser.add_argument("--file", required=True, help="Path to Excel file")
     parser.add_argument("--sheet", default=None, help="Worksheet name (defaults to first)")
     parser.add_argument("--limit", type=int, default=None, help="Optional limit on rows to import")
+    parser.add_argument(
+        "--status",
+        choices=[status.value for status in IncidentStatus],
+        default=IncidentStatus.DRAFT.value,
+        help="Status of the imported incidents (default DRAFT; dashboards count only non-draft incidents)",
+    )
     args = parser.parse_args()
 
     df = pd.read_excel(args.file, sheet_name=args.sheet)
@@ -145,13 +157,17 @@ def main():
     with Session(engine) as session:
         for idx, row in enumerate(records, start=1):
             try:
-                incident = build_incident(row)
+                incident = build_incident(row, IncidentStatus(args.status))
                 session.add(incident)
                 created += 1
             except Exception as exc:
                 skipped += 1
                 print(f"[skip row {idx}] {exc}")
         session.commit()
+        # Rows were inserted directly, bypassing the service layer's rollup and counter updates.
+        rebuild_rollups(session)
+        rebuild_month_stats(session)
+        session.commit()
 
     print(f"Inserted {created} incidents. Skipped {skipped}.")
 
@@ -26,6 +26,42 @@ class Settings(BaseSettings):
     model_path: str = Field(default="models/incident_classifier.pkl")
     model_fallback_version: str = Field(default="fallback-rule-0.1")
     skp_mdp_model_path: str = Field(default="models/skp_mdp_predictor.pkl")
+    submit_prediction_mode: str = Field(default="sync")
+    prediction_job_batch_size: int = Field(default=32)
+    prediction_job_max_attempts: int = Field(default=3)
+    prediction_job_stale_after_seconds: int = Field(default=600)
+    ml_warmup_on_startup: bool = Field(default=True)
+    ml_preload_models: bool = Field(default=False)
+    ml_mmap_artifacts: bool = Field(default=False)
+    reclassify_chunk_size: int = Field(default=500)
+    reclassify_max_rows_per_second: float = Field(default=100.0)
+    reclassify_checkpoint_path: str = Field(default="models/.reclassify_checkpoint.json")
+    ml_batch_enabled: bool = Field(default=True)
+    ml_batch_max_size: int = Field(default=16)
+    ml_batch_max_wait_ms: float = Field(default=10.0)
+    ml_booster_threads: int = Field(default=1)
+    ml_bulk_tokens_per_batch: int = Field(default=8192)
+    ml_bulk_max_batch_size: int = Field(default=128)
+    ml_bulk_window: int = Field(default=2048)
+    ml_executor_workers: int = Field(default=0)
+    ml_executor_start_method: str = Field(default="spawn")
+    model_registry_keep: int = Field(default=3)
+    model_registry_marker_path: str = Field(default="models/.active_model.json")
+    ml_latency_budget_ms: float = Field(default=3000.0)
+    ml_breaker_window: int = Field(default=20)
+    ml_breaker_min_calls: int = Field(default=5)
+    ml_breaker_failure_ratio: float = Field(default=0.5)
+    ml_breaker_cooldown_seconds: float = Field(default=30.0)
+    model_watch_interval_seconds: float = Field(default=10.0)
+    speculative_prediction_enabled: bool = Field(default=True)
+    speculative_prediction_max_inflight: int = Field(default=2)
+    dashboard_cache_ttl_seconds: float = Field(default=30.0)
+    dashboard_cache_max_entries: int = Field(default=256)
+    embedder_backend: str = Field(default="torch")
+    onnx_embedder_dir: str = Field(default="models/minilm-onnx")
+    embedding_cache_memory_size: int = Field(default=2048)
+    embedding_cache_dir: str = Field(default="")
+    embedding_cache_disk_size: int = Field(default=50000)
 
 
 @lru_cache
@@ -1,21 +1,40 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Dict
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
 
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import get_settings
 from .routers import admin, auth, dashboard, incidents, references
 from .security.jwt import decode_token
+from .services import metrics, ml
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Warm up in the background so /health answers while /ready reports 503.
+    if settings.ml_warmup_on_startup:
+        threading.Thread(target=ml.warm_up_models, name="ml-warmup", daemon=True).start()
+    else:
+        ml.readiness.mark_ready()
+    ml.registry.start_watching(settings.model_watch_interval_seconds)
+    yield
+    ml.registry.stop_watching()
+    if ml.executor is not None:
+        ml.executor.shutdown()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.app_name,
     version="1.0.0",
     description="Hospital incident reporting service with accreditation-aligned categories.",
@@ -39,6 +58,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -74,6 +94,19 @@ def health_check() -> Dict[str, Any]:
     return {"status": "ok", "app": settings.app_name, "holla": "Hollaa"}
 
 
+@app.get("/ready", tags=["References"])
+def readiness_check() -> JSONResponse:
+    snapshot = ml.readiness.snapshot()
+    status = "ready" if snapshot["ready"] else "warming_up"
+    return JSONResponse(status_code=200 if snapshot["ready"] else 503, content={"status": status, **snapshot})
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint() -> Response:
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 app.include_router(auth.router)
 app.include_router(incidents.router)
 app.include_router(dashboard.router)
@@ -1,9 +1,10 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import List, Optional, TYPE_CHECKING
 
-from sqlalchemy import JSON
-from sqlmodel import Column, Enum as SQLEnum, Field, Relationship
+from sqlalchemy import JSON, DateTime, Index, LargeBinary
+from sqlalchemy.dialects import mysql
+from sqlmodel import Column, Enum as SQLEnum, Field, Relationship, SQLModel
 
 from .base import IDModel, TimestampedModel
 
@@ -31,6 +32,13 @@ class IncidentCategory(str, Enum):
     SENTINEL = "SENTINEL"  # Sentinel Event
 
 
+class PredictionJobStatus(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
 class IncidentGrading(str, Enum):
     BIRU = "BIRU"
     HIJAU = "HIJAU"
@@ -195,6 +203,7 @@ class Incident(IDModel, TimestampedModel, table=True):
 
     predicted_category: Optional[IncidentCategory] = Field(default=None, sa_column=Column(SQLEnum(IncidentCategory), nullable=True))
     predicted_confidence: Optional[float] = Field(default=None)
+    predicted_probabilities: Optional[dict[str, float]] = Field(default=None, sa_column=Column(JSON, nullable=True))
     model_version: Optional[str] = Field(default=None)
     pj_decision: Optional[IncidentCategory] = Field(default=None, sa_column=Column(SQLEnum(IncidentCategory), nullable=True))
     pj_notes: Optional[str] = Field(default=None)
@@ -203,6 +212,12 @@ class Incident(IDModel, TimestampedModel, table=True):
     final_category: Optional[IncidentCategory] = Field(default=None, sa_column=Column(SQLEnum(IncidentCategory), nullable=True))
     last_category_editor_id: Optional[int] = Field(default=None, foreign_key="users.id")
     grading: Optional["IncidentGrading"] = Field(default=None, sa_column=Column(SQLEnum(IncidentGrading), nullable=True))
+    prediction_pending: bool = Field(default=False, nullable=False)
+    # Microsecond precision on MySQL too: MAX(updated_at) is part of the incident list ETag.
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"), nullable=False),
+    )
 
     reporter: "User" = Relationship(
         back_populates="reported_incidents",
@@ -226,3 +241,103 @@ class AuditLog(IDModel, TimestampedModel, table=True):
     payload_diff: Optional[str] = Field(default=None)
 
     incident: Incident = Relationship(back_populates="audit_logs")
+
+
+class PredictionJob(IDModel, TimestampedModel, table=True):
+    """Deferred category/SKP/MDP/grading enrichment for an asynchronously submitted incident."""
+
+    __tablename__ = "prediction_jobs"
+
+    incident_id: int = Field(foreign_key="incidents.id", index=True)
+    requested_by_id: int = Field(foreign_key="users.id")
+    status: PredictionJobStatus = Field(
+        default=PredictionJobStatus.PENDING,
+        sa_column=Column(SQLEnum(PredictionJobStatus), default=PredictionJobStatus.PENDING, nullable=False, index=True),
+    )
+    attempts: int = Field(default=0, nullable=False)
+    last_error: Optional[str] = Field(default=None)
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
+
+
+class IncidentEmbedding(IDModel, table=True):
+    """MiniLM embedding of a submitted incident's chronology, stored as float16 bytes.
+
+    ``id`` doubles as an insert sequence so similarity indexes can catch up with
+    ``id > last_seen``; department and occurrence time are copied for filtering.
+    """
+
+    __tablename__ = "incident_embeddings"
+
+    incident_id: int = Field(foreign_key="incidents.id", unique=True, index=True)
+    model_name: str = Field(max_length=128)
+    dim: int
+    vector: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    department_id: Optional[int] = Field(default=None, foreign_key="departments.id", index=True)
+    occurred_at: Optional[datetime] = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class IncidentPredictionCache(TimestampedModel, table=True):
+    """Speculative prediction of a draft's chronology, reused at submit if still current.
+
+    Keyed by incident; ``text_hash`` and ``model_version`` identify the text and model
+    the prediction was made for, so a later edit or model swap makes it a miss.
+    """
+
+    __tablename__ = "incident_prediction_cache"
+
+    incident_id: int = Field(foreign_key="incidents.id", primary_key=True)
+    text_hash: str = Field(max_length=64)
+    model_version: str = Field(max_length=128)
+    predicted_category: IncidentCategory = Field(sa_column=Column(SQLEnum(IncidentCategory), nullable=False))
+    predicted_confidence: float
+    predicted_probabilities: Optional[dict[str, float]] = Field(default=None, sa_column=Column(JSON, nullable=True))
+    skp_code: Optional[SKPCode] = Field(
+        default=None, sa_column=Column(SQLEnum(SKPCode, values_callable=lambda e: [i.value for i in e]), nullable=True)
+    )
+    mdp_code: Optional[MDPCode] = Field(
+        default=None, sa_column=Column(SQLEnum(MDPCode, values_callable=lambda e: [i.value for i in e]), nullable=True)
+    )
+    embedding: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
+
+
+class DepartmentMonthStat(SQLModel, table=True):
+    """Running count of reported (non-draft) incidents per department and month.
+
+    Maintained in the submit/close transaction so grading reads the monthly
+    frequency by primary key instead of counting incidents. Rebuilt from
+    ``incidents`` by ``service.rebuild_month_stats`` after direct loads.
+    """
+
+    __tablename__ = "department_month_stats"
+
+    department_id: int = Field(foreign_key="departments.id", primary_key=True)
+    month_start: date = Field(primary_key=True)
+    reported_count: int = Field(default=0, nullable=False)
+    closed_count: int = Field(default=0, nullable=False)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, nullable=False)
+
+
+class IncidentDailyRollup(SQLModel, table=True):
+    """Reported incidents per day and dashboard dimension; see services/incidents/rollups.py.
+
+    Empty strings (and department 0) stand for a missing value so every dimension can
+    be part of the primary key.
+    """
+
+    __tablename__ = "incident_daily_rollups"
+    __table_args__ = (Index("ix_incident_daily_rollups_department_day", "department_id", "day"),)
+
+    day: date = Field(primary_key=True)
+    department_id: int = Field(default=0, primary_key=True)
+    category: str = Field(default="", primary_key=True, max_length=16)
+    skp_code: str = Field(default="", primary_key=True, max_length=8)
+    mdp_code: str = Field(default="", primary_key=True, max_length=8)
+    grading: str = Field(default="", primary_key=True, max_length=8)
+    incident_count: int = Field(default=0, nullable=False)
+    # Microsecond precision on MySQL too: MAX(updated_at) is part of the dashboard ETag.
+    updated_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        sa_column=Column(DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql"), nullable=False),
+    )
@@ -1,15 +1,18 @@
 from datetime import datetime, timezone
+from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
-from ..db import get_session
+from ..config import get_settings
+from ..db import engine, get_session
 from ..models.department import Department
 from ..models.location import Location
 from ..models.role import Role
 from ..models.user import User
 from ..schemas.common import APIResponse
+from ..schemas.incident import ModelReloadRequest, ModelRollbackRequest, ReclassifyRequest
 from ..schemas.reference import (
     DepartmentCreate,
     DepartmentRead,
@@ -19,8 +22,11 @@ from ..schemas.reference import (
     LocationUpdate,
 )
 from ..schemas.user import UserCreate, UserRead, UserUpdate
+from ..security.dependencies import get_current_user
 from ..security.permissions import RequireRole
 from ..security.passwords import hash_password
+from ..services.incidents.reclassify import ReclassifyAlreadyRunning, runner as reclassify_runner
+from ..services.ml import ModelValidationError, classifier, registry
 
 router = APIRouter(prefix="/v1/admin", tags=["Admin"], dependencies=[Depends(RequireRole("admin"))])
 
@@ -137,3 +143,84 @@ def update_location(location_id: int, payload: LocationUpdate, session: Session
     session.commit()
     session.refresh(location)
     return APIResponse(status_code=200, message="Location updated", data=LocationRead.model_validate(location))
+
+
+@router.post("/reclassify", response_model=APIResponse[dict], status_code=202)
+def start_reclassification(
+    payload: ReclassifyRequest,
+    current_user: User = Depends(get_current_user),
+) -> APIResponse[dict]:
+    if classifier.model is None:
+        raise HTTPException(status_code=409, detail={"error_code": "model_missing", "message": "No classifier model loaded"})
+    try:
+        progress = reclassify_runner.start(
+            engine,
+            current_user.id,
+            chunk_size=payload.chunk_size,
+            max_rows_per_second=payload.max_rows_per_second,
+            restart=payload.restart,
+        )
+    except ReclassifyAlreadyRunning as exc:
+        raise HTTPException(status_code=409, detail={"error_code": "reclassify_running", "message": str(exc)})
+    return APIResponse(status_code=202, message="Reclassification started", data=progress.as_dict())
+
+
+@router.get("/reclassify", response_model=APIResponse[dict])
+def reclassification_status() -> APIResponse[dict]:
+    progress = reclassify_runner.progress
+    data = progress.as_dict() if progress else {"running": False, "target_version": classifier.model_version}
+    return APIResponse(status_code=200, message="Reclassification status", data=data)
+
+
+@router.post("/reclassify/cancel", response_model=APIResponse[dict])
+def cancel_reclassification() -> APIResponse[dict]:
+    reclassify_runner.cancel()
+    progress = reclassify_runner.progress
+    return APIResponse(status_code=200, message="Reclassification cancelling", data=progress.as_dict() if progress else {})
+
+
+def _models_dir_path(raw: str | None) -> str | None:
+    """Reject artifact paths outside the directory that holds MODEL_PATH."""
+    if raw is None:
+        return None
+    models_dir = Path(get_settings().model_path).resolve().parent
+    path = Path(raw)
+    resolved = (path if path.is_absolute() else Path.cwd() / path).resolve()
+    if not resolved.is_relative_to(models_dir):
+        raise HTTPException(
+            status_code=400,
+            detail={"error_code": "invalid_model_path", "message": f"Model artifacts must live in {models_dir}"},
+        )
+    return str(resolved)
+
+
+@router.get("/models", response_model=APIResponse[dict])
+def model_registry_status() -> APIResponse[dict]:
+    return APIResponse(status_code=200, message="Model registry", data=registry.describe())
+
+
+@router.post("/models/reload", response_model=APIResponse[dict])
+def reload_models(payload: ModelReloadRequest) -> APIResponse[dict]:
+    model_path = _models_dir_path(payload.model_path)
+    skp_mdp_path = _models_dir_path(payload.skp_mdp_model_path)
+    try:
+        bundle = registry.reload(model_path, skp_mdp_path)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail={"error_code": "model_not_found", "message": str(exc)})
+    except ModelValidationError as exc:
+        raise HTTPException(status_code=422, detail={"error_code": "model_validation_failed", "message": str(exc)})
+    registry.publish(bundle)
+    return APIResponse(status_code=200, message="Model reloaded", data=registry.describe())
+
+
+@router.post("/models/rollback", response_model=APIResponse[dict])
+def rollback_models(payload: ModelRollbackRequest) -> APIResponse[dict]:
+    try:
+        bundle = registry.rollback(payload.bundle_id)
+    except LookupError:
+        raise HTTPException(
+            status_code=404,
+            detail={"error_code": "model_version_not_found", "message": "No kept model generation matches"},
+        )
+    registry.publish(bundle)
+    return APIResponse(status_code=200, message="Model rolled back", data=registry.describe())
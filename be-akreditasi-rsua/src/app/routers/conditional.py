@@ -0,0 +1,37 @@
+"""Conditional GET: ETags built from cheap watermarks of the data behind a response.
+
+A handler reads a watermark of its scope (row count plus latest ``updated_at``),
+folds it with the request parameters into an ETag and calls :func:`not_modified`
+before running the expensive query or serialising anything.
+"""
+
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+# Bump when a response shape changes so clients do not keep a body in the old format.
+ETAG_VERSION = 1
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1(repr((ETAG_VERSION,) + parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Tag ``response`` with ``etag``; return a bare 304 if the client already holds it."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
@@ -1,19 +1,19 @@
-from collections import defaultdict
-from typing import Dict, List, Tuple
-from datetime import datetime
-from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Dict, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import func
 from sqlmodel import Session, select
 
 from ..db import get_session
 from ..models.department import Department
-from ..models.incident import Incident, IncidentCategory, IncidentGrading, MDPCode, SKPCode
+from ..models.incident import IncidentCategory, IncidentDailyRollup, IncidentGrading, MDPCode, SKPCode
 from ..models.user import User
 from ..schemas.common import APIResponse
 from ..security.dependencies import get_current_user
 from ..security.permissions import RequireRole
+from ..services.incidents import aggregates, dashboard_cache
+from . import conditional
 
 router = APIRouter(prefix="/v1/dashboard", tags=["Dashboard"], dependencies=[Depends(RequireRole("mutu", "pj", "admin"))])
 
@@ -63,6 +63,41 @@ def _scoped_unit_for_user(unit: str, current_user: User) -> str:
     return unit
 
 
+PRESET_PATTERN = "^(last_12_weeks|last_12_months|this_month|this_quarter|this_year)$"
+
+
+def _preset_start(preset: str, today: date) -> date:
+    if preset == "last_12_weeks":
+        return today - timedelta(days=today.weekday(), weeks=11)
+    if preset == "this_month":
+        return today.replace(day=1)
+    if preset == "this_quarter":
+        return today.replace(month=3 * ((today.month - 1) // 3) + 1, day=1)
+    if preset == "this_year":
+        return today.replace(month=1, day=1)
+    # last_12_months
+    month_index = today.year * 12 + today.month - 1 - 11
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _date_window(date_from: date | None, date_to: date | None, preset: str | None) -> Tuple[date | None, date | None]:
+    """Inclusive day window from explicit ``from``/``to`` or a preset ending today."""
+    if preset is not None:
+        if date_from is not None or date_to is not None:
+            raise HTTPException(
+                status_code=400,
+                detail={"error_code": "invalid_date_range", "message": "Use either a preset or from/to, not both"},
+            )
+        today = datetime.utcnow().date()
+        return _preset_start(preset, today), today
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(
+            status_code=400,
+            detail={"error_code": "invalid_date_range", "message": "'from' must not be after 'to'"},
+        )
+    return date_from, date_to
+
+
 def _label_category(cat: IncidentCategory) -> str:
     mapping = {
         IncidentCategory.KTD: "Kejadian Tidak Diharapkan",
@@ -74,84 +109,52 @@ def _label_category(cat: IncidentCategory) -> str:
     return mapping.get(cat, cat.value)
 
 
-def _period_key(dt: datetime, view: str) -> str:
-    if view == "weekly":
-        iso_year, iso_week, _ = dt.isocalendar()
-        return f"{iso_year}-W{iso_week:02d}"
-    if view == "monthly":
-        return dt.strftime("%Y-%m")
-    if view == "quarterly":
-        quarter = (dt.month - 1) // 3 + 1
-        return f"{dt.year}-Q{quarter}"
-    # yearly
-    return dt.strftime("%Y")
-
-
 @router.get("/mutu", response_model=APIResponse[dict])
 def mutu_dashboard(
+    request: Request,
+    response: Response,
     unit: str = Query("all", description="Department name or id; 'all' aggregates all departments"),
+    date_from: date | None = Query(None, alias="from", description="First day (inclusive) of incidents to count"),
+    date_to: date | None = Query(None, alias="to", description="Last day (inclusive) of incidents to count"),
+    preset: str | None = Query(None, pattern=PRESET_PATTERN, description="Window ending today, instead of from/to"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),  # noqa: B008
-) -> APIResponse[dict]:
+) -> APIResponse[dict] | Response:
     scoped_unit = _scoped_unit_for_user(unit, current_user)
-    unit_name, department_id = _resolve_department(session, scoped_unit)
+    start, end = _date_window(date_from, date_to, preset)
+    # Not narrowed to the unit: the risk map and unit list cover every department.
+    key = (scoped_unit.lower(), start, end, aggregates.watermark(session, start=start, end=end))
+    unchanged = conditional.not_modified(request, response, conditional.make_etag("mutu", key))
+    if unchanged is not None:
+        return unchanged
+    payload = dashboard_cache.cache.get_or_compute("mutu", key, lambda: _mutu_payload(session, scoped_unit, start, end))
+    return APIResponse(status_code=200, message="Dashboard metrics", data=payload)
 
-    filters = []
-    if department_id is not None:
-        filters.append(Incident.department_id == department_id)
-
-    incidents = session.exec(select(Incident).where(*filters)).all()
-    all_incidents = session.exec(select(Incident)).all()
-
-    total_insiden = len(incidents)
-
-    jenis_counts: Dict[str, int] = {c.value: 0 for c in IncidentCategory}
-    skp_counts: Dict[str, int] = {_label_skp(code): 0 for code in SKPCode}
-    mdp_counts: Dict[str, int] = {_label_mdp(code): 0 for code in MDPCode}
-
-    dept_risk_filtered: Dict[int, str] = {}
-    dept_risk_all: Dict[int, str] = {}
-
-    def apply_risk(collector: Dict[int, str], inc: Incident) -> None:
-        if inc.department_id is None:
-            return
-        current_level = collector.get(inc.department_id)
-        new_level = _grading_level(inc.grading)
-        priority = {"ekstrem": 3, "tinggi": 2, "sedang": 1, "rendah": 0, "tidak tersedia": -1}
-        if current_level is None or priority[new_level] > priority.get(current_level, -1):
-            collector[inc.department_id] = new_level
-
-    for inc in incidents:
-        category = inc.final_category or inc.predicted_category
-        if category:
-            jenis_counts[category.value] = jenis_counts.get(category.value, 0) + 1
-        if inc.skp_code:
-            skp_counts[_label_skp(inc.skp_code)] = skp_counts.get(_label_skp(inc.skp_code), 0) + 1
-        if inc.mdp_code:
-            mdp_counts[_label_mdp(inc.mdp_code)] = mdp_counts.get(_label_mdp(inc.mdp_code), 0) + 1
-        apply_risk(dept_risk_filtered, inc)
-
-    for inc in all_incidents:
-        apply_risk(dept_risk_all, inc)
-
-    hospital_risk = _grading_level(
-        max((inc.grading for inc in incidents if inc.grading), default=None, key=lambda g: {"MERAH": 3, "KUNING": 2, "HIJAU": 1, "BIRU": 0}[g.value])
-        if incidents
-        else None
-    )
 
-    # Build unit lists and risk summaries
-    unit_list = ["All"] + [dept.name for dept in session.exec(select(Department)).all()]
-    units_risk = []
-    risk_source = dept_risk_all if dept_risk_all else dept_risk_filtered
-    if risk_source:
-        departments = session.exec(select(Department).where(Department.id.in_(list(risk_source.keys())))).all()
-        for dept in departments:
-            units_risk.append({"name": dept.name, "level": risk_source.get(dept.id, "tidak tersedia")})
+def _mutu_payload(session: Session, unit: str, start: date | None, end: date | None) -> dict:
+    unit_name, department_id = _resolve_department(session, unit)
+
+    # Two GROUP BY round trips over the rollups; see services/incidents/aggregates.py.
+    totals = aggregates.incident_totals(session, department_id, start, end)
+    departments = aggregates.department_risk(session, start, end)
+
+    jenis_counts: Dict[str, int] = {c.value: totals.categories[c.value] for c in IncidentCategory}
+    skp_counts: Dict[str, int] = {_label_skp(code): totals.skp[code.value] for code in SKPCode}
+    mdp_counts: Dict[str, int] = {_label_mdp(code): totals.mdp[code.value] for code in MDPCode}
+    hospital_risk = _grading_level(aggregates.grade_for_rank(totals.max_grading_rank))
+
+    unit_list = ["All"] + [name for _, name, _ in departments]
+    units_risk = [
+        {"name": name, "level": _grading_level(aggregates.grade_for_rank(rank))}
+        for _, name, rank in departments
+        if rank is not None
+    ]
 
     payload = {
         "unit": unit_name,
-        "total_insiden": total_insiden,
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
+        "total_insiden": totals.total,
         "jenis_kejadian": jenis_counts,
         "skp": skp_counts,
         "mdp": mdp_counts,
@@ -159,85 +162,80 @@ def mutu_dashboard(
         "units_risk": units_risk,
         "unit_list": unit_list,
     }
-    return APIResponse(status_code=200, message="Dashboard metrics", data=payload)
+    return payload
+
+
+TREND_DIMENSIONS = {
+    "jenis": IncidentDailyRollup.category,
+    "skp": IncidentDailyRollup.skp_code,
+    "mdp": IncidentDailyRollup.mdp_code,
+    "grading": IncidentDailyRollup.grading,
+}
 
 
 @router.get("/mutu/trend", response_model=APIResponse[dict])
 def mutu_trend(
+    request: Request,
+    response: Response,
     view: str = Query("weekly", pattern="^(weekly|monthly|quarterly|yearly)$"),
     group: str = Query("jenis", pattern="^(jenis|total|mdp|skp|grading)$"),
     unit: str = Query("all", description="Department name or id; 'all' aggregates all departments"),
+    date_from: date | None = Query(None, alias="from", description="First day (inclusive) of incidents to count"),
+    date_to: date | None = Query(None, alias="to", description="Last day (inclusive) of incidents to count"),
+    preset: str | None = Query(None, pattern=PRESET_PATTERN, description="Window ending today, instead of from/to"),
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),  # noqa: B008
-) -> APIResponse[dict]:
+) -> APIResponse[dict] | Response:
     scoped_unit = _scoped_unit_for_user(unit, current_user)
+    start, end = _date_window(date_from, date_to, preset)
     unit_name, department_id = _resolve_department(session, scoped_unit)
-    filters = []
-    if department_id is not None:
-        filters.append(Incident.department_id == department_id)
-
-    incidents = session.exec(select(Incident).where(*filters)).all()
-    if not incidents:
-        return APIResponse(
-            status_code=200,
-            message="Trend metrics",
-            data={"unit": unit_name, "view": view, "group": group, "periods": [], "series": []},
-        )
-
-    buckets: Dict[str, List[Incident]] = {}
-    for inc in incidents:
-        key = _period_key(inc.occurred_at, view) if inc.occurred_at else _period_key(inc.created_at, view)
-        buckets.setdefault(key, []).append(inc)
+    key = (scoped_unit.lower(), view, group, start, end, aggregates.watermark(session, department_id, start, end))
+    unchanged = conditional.not_modified(request, response, conditional.make_etag("mutu_trend", key))
+    if unchanged is not None:
+        return unchanged
+    payload = dashboard_cache.cache.get_or_compute(
+        "mutu_trend", key, lambda: _trend_payload(session, unit_name, department_id, view, group, start, end)
+    )
+    return APIResponse(status_code=200, message="Trend metrics", data=payload)
 
-    periods = sorted(buckets.keys())
 
-    series: List[dict] = []
+def _trend_payload(
+    session: Session, unit_name: str, department_id: int | None, view: str, group: str, start: date | None, end: date | None
+) -> dict:
+    rows = aggregates.trend_counts(session, view, TREND_DIMENSIONS.get(group), department_id, start, end)
 
     if group == "jenis":
-        categories = list(IncidentCategory)
-        for cat in categories:
-            data = []
-            for p in periods:
-                count = 0
-                for inc in buckets[p]:
-                    val = inc.final_category or inc.predicted_category
-                    if val == cat:
-                        count += 1
-                data.append(count)
-            series.append({"key": cat.value, "label": _label_category(cat), "data": data})
+        specs = [(cat.value, _label_category(cat), cat.value) for cat in IncidentCategory]
     elif group == "total":
-        data = [len(buckets[p]) for p in periods]
-        series.append({"key": "total", "label": "Total Insiden", "data": data})
+        specs = [("total", "Total Insiden", "total")]
     elif group == "skp":
-        codes = list(SKPCode)
-        for code in codes:
-            data = []
-            for p in periods:
-                count = sum(1 for inc in buckets[p] if inc.skp_code == code)
-                data.append(count)
-            series.append({"key": code.value.upper(), "label": _label_skp(code), "data": data})
+        specs = [(code.value.upper(), _label_skp(code), code.value) for code in SKPCode]
     elif group == "mdp":
-        codes = list(MDPCode)
-        for code in codes:
-            data = []
-            for p in periods:
-                count = sum(1 for inc in buckets[p] if inc.mdp_code == code)
-                data.append(count)
-            series.append({"key": code.value.upper(), "label": _label_mdp(code), "data": data})
-    elif group == "grading":
-        grades = list(IncidentGrading)
-        for grade in grades:
-            data = []
-            for p in periods:
-                count = sum(1 for inc in buckets[p] if inc.grading == grade)
-                data.append(count)
-            series.append({"key": grade.value, "label": grade.value.title(), "data": data})
+        specs = [(code.value.upper(), _label_mdp(code), code.value) for code in MDPCode]
+    else:
+        specs = [(grade.value, grade.value.title(), grade.value) for grade in IncidentGrading]
+
+    # Dense series over the requested window (or the first to last period with data),
+    # filled in one pass.
+    labels = [period for period, _, _ in rows]
+    first = aggregates.period_key(start, view) if start else min(labels, default=None)
+    last = aggregates.period_key(end, view) if end else max(labels, default=None)
+    periods = aggregates.period_range(first, last, view) if first and last else []
+    position = {period: index for index, period in enumerate(periods)}
+    data_by_value = {value: [0] * len(periods) for _, _, value in specs}
+    for period, value, count in rows:
+        data = data_by_value.get(value)
+        if data is not None:
+            data[position[period]] += count
+    series = [{"key": key, "label": label, "data": data_by_value[value]} for key, label, value in specs]
 
     payload = {
         "unit": unit_name,
+        "from": start.isoformat() if start else None,
+        "to": end.isoformat() if end else None,
         "view": view,
         "group": group,
         "periods": periods,
         "series": series,
     }
-    return APIResponse(status_code=200, message="Trend metrics", data=payload)
+    return payload
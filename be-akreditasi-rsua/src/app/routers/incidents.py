@@ -1,5 +1,5 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import func
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
@@ -14,10 +14,17 @@ from ..schemas.incident import (
     IncidentRead,
     IncidentSubmitRequest,
     IncidentUpdate,
+    PredictionJobRead,
+    PredictionStatusRead,
+    SimilarIncidentRead,
 )
 from ..security.dependencies import get_current_user
 from ..security.permissions import RequireRole
+from ..services.incidents import similarity
+from ..services.incidents.jobs import latest_prediction_job
 from ..services.incidents.service import close_incident, submit_incident, update_category
+from ..services.incidents.speculative import schedule_draft_prediction
+from . import conditional
 
 router = APIRouter(prefix="/v1/incidents", tags=["Incidents"])
 
@@ -25,6 +32,7 @@ router = APIRouter(prefix="/v1/incidents", tags=["Incidents"])
 @router.post("", response_model=APIResponse[IncidentRead], dependencies=[Depends(RequireRole("perawat"))], status_code=201)
 def create_incident(
     payload: IncidentCreate,
+    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> APIResponse[IncidentRead]:
@@ -72,6 +80,7 @@ def create_incident(
     session.add(incident)
     session.commit()
     session.refresh(incident)
+    schedule_draft_prediction(background_tasks, session.get_bind(), incident)
     return APIResponse(status_code=201, message="Incident draft created", data=IncidentRead.model_validate(incident))
 
 
@@ -79,6 +88,7 @@ def create_incident(
 def update_incident(
     incident_id: int,
     payload: IncidentUpdate,
+    background_tasks: BackgroundTasks,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ) -> APIResponse[IncidentRead]:
@@ -96,6 +106,8 @@ def update_incident(
     session.add(incident)
     session.commit()
     session.refresh(incident)
+    if "free_text_description" in update_data:
+        schedule_draft_prediction(background_tasks, session.get_bind(), incident)
     return APIResponse(status_code=200, message="Incident updated", data=IncidentRead.model_validate(incident))
 
 
@@ -116,7 +128,12 @@ def submit(
     submit_incident(session, incident, current_user)
     session.commit()
     session.refresh(incident)
-    return APIResponse(status_code=200, message="Incident submitted. Prediction generated.", data=IncidentRead.model_validate(incident))
+    message = (
+        "Incident submitted. Prediction queued."
+        if incident.prediction_pending
+        else "Incident submitted. Prediction generated."
+    )
+    return APIResponse(status_code=200, message=message, data=IncidentRead.model_validate(incident))
 
 
 @router.put(
@@ -141,16 +158,19 @@ def edit_category(
 
 @router.get("", response_model=APIResponse[dict])
 def list_incidents(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     status: IncidentStatus | None = None,
     search: str | None = None,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
-) -> APIResponse[dict]:
+) -> APIResponse[dict] | Response:
     filters = []
     user_roles = {role.name for role in current_user.roles}
-    if "perawat" in user_roles and not user_roles.intersection({"admin", "pj", "mutu"}):
+    own_department = "perawat" in user_roles and not user_roles.intersection({"admin", "pj", "mutu"})
+    if own_department:
         filters.append(Incident.department_id == current_user.department_id)
     if status:
         filters.append(Incident.status == status)
@@ -163,19 +183,26 @@ def list_incidents(
         )
 
     statement = select(Incident).where(*filters).order_by(Incident.created_at.desc())
-    count_stmt = select(func.count()).select_from(Incident)
+    # The count doubles as the ETag watermark, with the latest update in the same scope.
+    count_stmt = select(func.count(), func.max(Incident.updated_at)).select_from(Incident)
     if filters:
         count_stmt = count_stmt.where(*filters)
-    total = int(session.exec(count_stmt).one())
+    total, last_updated = session.exec(count_stmt).one()
+    total = int(total)
+    scope = current_user.department_id if own_department else None
+    etag = conditional.make_etag("incidents", scope, status, search, page, per_page, total, last_updated)
+    unchanged = conditional.not_modified(request, response, etag)
+    if unchanged is not None:
+        return unchanged
     incidents = session.exec(statement.offset((page - 1) * per_page).limit(per_page)).all()
     items = [IncidentRead.model_validate(incident).model_dump() for incident in incidents]
-    response = {
+    payload = {
         "items": items,
         "page": page,
         "per_page": per_page,
         "total": total,
     }
-    return APIResponse(status_code=200, message="Incidents fetched", data=response)
+    return APIResponse(status_code=200, message="Incidents fetched", data=payload)
 
 
 @router.get("/{incident_id}", response_model=APIResponse[IncidentRead])
@@ -208,3 +235,87 @@ def close(
     session.commit()
     session.refresh(incident)
     return APIResponse(status_code=200, message="Incident closed", data=IncidentRead.model_validate(incident))
+
+
+@router.get("/{incident_id}/prediction", response_model=APIResponse[PredictionStatusRead])
+def prediction_status(
+    incident_id: int,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> APIResponse[PredictionStatusRead]:
+    incident = session.exec(select(Incident).where(Incident.id == incident_id)).one_or_none()
+    if not incident:
+        raise HTTPException(status_code=404, detail={"error_code": "incident_not_found", "message": "Incident not found"})
+    user_roles = {role.name for role in current_user.roles}
+    if incident.reporter_id != current_user.id and not user_roles.intersection({"admin", "pj", "mutu"}):
+        raise HTTPException(status_code=403, detail={"error_code": "forbidden", "message": "Access denied"})
+    job = latest_prediction_job(session, incident.id)
+    data = PredictionStatusRead(
+        incident_id=incident.id,
+        prediction_pending=incident.prediction_pending,
+        predicted_category=incident.predicted_category,
+        predicted_confidence=incident.predicted_confidence,
+        predicted_probabilities=incident.predicted_probabilities,
+        model_version=incident.model_version,
+        skp_code=incident.skp_code,
+        mdp_code=incident.mdp_code,
+        grading=incident.grading,
+        job=PredictionJobRead.model_validate(job) if job else None,
+    )
+    return APIResponse(status_code=200, message="Prediction status", data=data)
+
+
+@router.get("/{incident_id}/similar", response_model=APIResponse[list[SimilarIncidentRead]])
+def similar_incidents(
+    incident_id: int,
+    k: int = Query(10, ge=1, le=50),
+    department_id: int | None = None,
+    occurred_from: datetime | None = None,
+    occurred_to: datetime | None = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+) -> APIResponse[list[SimilarIncidentRead]]:
+    incident = session.exec(select(Incident).where(Incident.id == incident_id)).one_or_none()
+    if not incident:
+        raise HTTPException(status_code=404, detail={"error_code": "incident_not_found", "message": "Incident not found"})
+    user_roles = {role.name for role in current_user.roles}
+    elevated = bool(user_roles.intersection({"admin", "pj", "mutu"}))
+    if incident.reporter_id != current_user.id and not elevated:
+        raise HTTPException(status_code=403, detail={"error_code": "forbidden", "message": "Access denied"})
+    if not elevated:
+        department_id = current_user.department_id
+
+    similarity.index.refresh(session)
+    vector = similarity.index.vector_for(incident.id)
+    if vector is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"error_code": "embedding_not_found", "message": "Incident has no stored embedding yet"},
+        )
+    matches = similarity.index.search(
+        vector,
+        k=k,
+        department_id=department_id,
+        occurred_from=occurred_from,
+        occurred_to=occurred_to,
+        exclude_incident_id=incident.id,
+    )
+    found = {
+        row.id: row
+        for row in session.exec(select(Incident).where(Incident.id.in_([match_id for match_id, _ in matches]))).all()
+    }
+    data = [
+        SimilarIncidentRead(
+            incident_id=match_id,
+            score=score,
+            status=found[match_id].status,
+            department_id=found[match_id].department_id,
+            occurred_at=found[match_id].occurred_at,
+            predicted_category=found[match_id].predicted_category,
+            final_category=found[match_id].final_category,
+            free_text_description=found[match_id].free_text_description,
+        )
+        for match_id, score in matches
+        if match_id in found
+    ]
+    return APIResponse(status_code=200, message="Similar incidents", data=data)
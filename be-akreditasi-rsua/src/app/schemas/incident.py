@@ -15,6 +15,7 @@ from ..models.incident import (
     MDPCode,
     PatientContext,
     PayerType,
+    PredictionJobStatus,
     ReporterType,
     ResponderRole,
     SKPCode,
@@ -92,6 +93,7 @@ class IncidentRead(BaseModel):
     predicted_confidence: float | None
     model_version: str | None
     grading: IncidentGrading | None
+    prediction_pending: bool = False
     pj_decision: IncidentCategory | None
     pj_notes: str | None
     mutu_decision: IncidentCategory | None
@@ -103,3 +105,55 @@ class IncidentRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class PredictionJobRead(BaseModel):
+    id: int
+    status: PredictionJobStatus
+    attempts: int
+    last_error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+    class Config:
+        from_attributes = True
+
+
+class PredictionStatusRead(BaseModel):
+    incident_id: int
+    prediction_pending: bool
+    predicted_category: IncidentCategory | None
+    predicted_confidence: float | None
+    predicted_probabilities: dict[str, float] | None
+    model_version: str | None
+    skp_code: SKPCode | None
+    mdp_code: MDPCode | None
+    grading: IncidentGrading | None
+    job: PredictionJobRead | None
+
+
+class SimilarIncidentRead(BaseModel):
+    incident_id: int
+    score: float
+    status: IncidentStatus
+    department_id: int | None
+    occurred_at: datetime | None
+    predicted_category: IncidentCategory | None
+    final_category: IncidentCategory | None
+    free_text_description: str
+
+
+class ReclassifyRequest(BaseModel):
+    chunk_size: int | None = Field(default=None, ge=1, le=5000)
+    max_rows_per_second: float | None = Field(default=None, ge=0)
+    restart: bool = False
+
+
+class ModelReloadRequest(BaseModel):
+    model_path: str | None = None
+    skp_mdp_model_path: str | None = None
+
+
+class ModelRollbackRequest(BaseModel):
+    bundle_id: str | None = None
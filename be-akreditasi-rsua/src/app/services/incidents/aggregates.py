@@ -0,0 +1,227 @@
+"""Set-based aggregation over ``incident_daily_rollups`` for the mutu dashboard.
+
+Each function is a single GROUP BY that reads only the narrow rollup columns, so
+the dashboard is a fixed number of round trips whatever the size of
+``incidents``. Category buckets are already ``COALESCE(final_category,
+predicted_category)`` in the rollups (see ``rollups.py``).
+
+Every function takes an optional inclusive ``start``/``end`` day window. ``day``
+leads the rollup primary key and ``(department_id, day)`` is indexed, so a window
+is a range scan whose cost follows its length rather than the table's history.
+
+Trend periods are bucketed in SQL by :func:`period_key_sql`, which renders the
+same labels as :func:`period_key` ("2024-W05", "2024-02", "2024-Q1", "2024") on
+MySQL, SQLite and PostgreSQL.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, String, and_, case, cast, func
+from sqlmodel import Session, select
+
+from ...models.department import Department
+from ...models.incident import IncidentDailyRollup, IncidentGrading
+
+Rollup = IncidentDailyRollup
+
+GRADING_RANK = {IncidentGrading.BIRU: 0, IncidentGrading.HIJAU: 1, IncidentGrading.KUNING: 2, IncidentGrading.MERAH: 3}
+UNGRADED_RANK = -1
+_GRADE_BY_RANK = {rank: grade for grade, rank in GRADING_RANK.items()}
+
+
+def _grading_rank():
+    """``MAX()``-able rank of ``grading``; ungraded incidents rank below BIRU.
+
+    No ELSE: a NULL grading (the outer-joined row of a department without
+    rollups) stays NULL and is ignored by ``MAX``.
+    """
+    whens = [(Rollup.grading == grade.value, rank) for grade, rank in GRADING_RANK.items()]
+    return case(*whens, (Rollup.grading == "", UNGRADED_RANK))
+
+
+def grade_for_rank(rank: Optional[int]) -> Optional[IncidentGrading]:
+    return None if rank is None else _GRADE_BY_RANK.get(int(rank))
+
+
+@dataclass
+class IncidentTotals:
+    total: int = 0
+    categories: Counter = field(default_factory=Counter)
+    skp: Counter = field(default_factory=Counter)
+    mdp: Counter = field(default_factory=Counter)
+    max_grading_rank: Optional[int] = None
+
+
+def _window(start: date | None, end: date | None) -> List[Any]:
+    conditions = []
+    if start is not None:
+        conditions.append(Rollup.day >= start)
+    if end is not None:
+        conditions.append(Rollup.day <= end)
+    return conditions
+
+
+def incident_totals(
+    session: Session, department_id: int | None = None, start: date | None = None, end: date | None = None
+) -> IncidentTotals:
+    """Total, category, SKP and MDP counts plus the highest grading, in one query.
+
+    Groups by (category, SKP, MDP) and folds the at most a few hundred combinations
+    in Python instead of issuing one GROUP BY per dimension.
+    """
+    conditions = [Rollup.incident_count > 0, *_window(start, end)]
+    if department_id is not None:
+        conditions.append(Rollup.department_id == department_id)
+    rows = session.exec(
+        select(Rollup.category, Rollup.skp_code, Rollup.mdp_code, func.sum(Rollup.incident_count), func.max(_grading_rank()))
+        .where(*conditions)
+        .group_by(Rollup.category, Rollup.skp_code, Rollup.mdp_code)
+    ).all()
+    totals = IncidentTotals()
+    for category, skp_code, mdp_code, count, rank in rows:
+        count = int(count)
+        totals.total += count
+        for counter, key in ((totals.categories, category), (totals.skp, skp_code), (totals.mdp, mdp_code)):
+            if key:
+                counter[key] += count
+        if rank is not None and (totals.max_grading_rank is None or rank > totals.max_grading_rank):
+            totals.max_grading_rank = int(rank)
+    return totals
+
+
+def department_risk(
+    session: Session, start: date | None = None, end: date | None = None
+) -> List[Tuple[int, str, Optional[int]]]:
+    """``(department_id, name, max grading rank or None)`` for every department, in id order.
+
+    One LEFT JOIN so the unit list and the risk map come from the same round trip;
+    the rank is ``None`` for departments without reported incidents in the window.
+    """
+    joined = and_(Rollup.department_id == Department.id, Rollup.incident_count > 0, *_window(start, end))
+    rows = session.exec(
+        select(Department.id, Department.name, func.max(_grading_rank()))
+        .select_from(Department)
+        .outerjoin(Rollup, joined)
+        .group_by(Department.id, Department.name)
+        .order_by(Department.id)
+    ).all()
+    return [(dept_id, name, None if rank is None else int(rank)) for dept_id, name, rank in rows]
+
+
+def watermark(
+    session: Session, department_id: int | None = None, start: date | None = None, end: date | None = None
+) -> Tuple[Any, ...]:
+    """Changes whenever a dashboard payload can: rollup and department counts and latest updates.
+
+    One aggregate over the rollups in the same department/day scope as the
+    aggregation it guards, plus two scalar subqueries on ``departments`` (names feed
+    every payload); used for the dashboard ETags and cache keys.
+    """
+    conditions = _window(start, end)
+    if department_id is not None:
+        conditions.append(Rollup.department_id == department_id)
+    row = session.exec(
+        select(
+            func.count(),
+            func.coalesce(func.sum(Rollup.incident_count), 0),
+            func.max(Rollup.updated_at),
+            select(func.count()).select_from(Department).scalar_subquery(),
+            select(func.max(Department.updated_at)).scalar_subquery(),
+        )
+        .select_from(Rollup)
+        .where(*conditions)
+    ).one()
+    return tuple(row)
+
+
+PERIOD_VIEWS = ("weekly", "monthly", "quarterly", "yearly")
+
+
+def period_key(day: date, view: str) -> str:
+    if view == "weekly":
+        iso_year, iso_week, _ = day.isocalendar()
+        return f"{iso_year}-W{iso_week:02d}"
+    if view == "monthly":
+        return day.strftime("%Y-%m")
+    if view == "quarterly":
+        quarter = (day.month - 1) // 3 + 1
+        return f"{day.year}-Q{quarter}"
+    # yearly
+    return day.strftime("%Y")
+
+
+def period_key_sql(column: Any, view: str, dialect: str) -> Any:
+    """SQL expression labelling ``column`` (a date) exactly like :func:`period_key`."""
+    if dialect == "mysql":
+        if view == "quarterly":
+            return func.concat(func.year(column), "-Q", func.quarter(column))
+        return func.date_format(column, {"weekly": "%x-W%v", "monthly": "%Y-%m", "yearly": "%Y"}[view])
+    if dialect == "postgresql":
+        return func.to_char(column, {"weekly": 'IYYY-"W"IW', "monthly": "YYYY-MM", "quarterly": 'YYYY-"Q"Q', "yearly": "YYYY"}[view])
+    if dialect != "sqlite":
+        raise ValueError(f"No period bucketing for dialect {dialect!r}")
+    if view == "weekly":
+        # ISO week: the week's Thursday fixes the ISO year; week = (day of year - 1) // 7 + 1.
+        thursday = func.date(column, "-3 days", "weekday 4")
+        return func.printf("%s-W%02d", func.strftime("%Y", thursday), (cast(func.strftime("%j", thursday), Integer) - 1) // 7 + 1)
+    if view == "quarterly":
+        quarter = (cast(func.strftime("%m", column), Integer) + 2) // 3
+        return func.strftime("%Y", column).concat("-Q").concat(cast(quarter, String))
+    return func.strftime({"monthly": "%Y-%m", "yearly": "%Y"}[view], column)
+
+
+def _period_start(key: str, view: str) -> date:
+    if view == "weekly":
+        year, week = key.split("-W")
+        return date.fromisocalendar(int(year), int(week), 1)
+    if view == "monthly":
+        year, month = key.split("-")
+        return date(int(year), int(month), 1)
+    if view == "quarterly":
+        year, quarter = key.split("-Q")
+        return date(int(year), 3 * (int(quarter) - 1) + 1, 1)
+    return date(int(key), 1, 1)
+
+
+def _next_period(start: date, view: str) -> date:
+    if view == "weekly":
+        return start + timedelta(days=7)
+    months = {"monthly": 1, "quarterly": 3, "yearly": 12}[view]
+    month_index = start.month - 1 + months
+    return date(start.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def period_range(first: str, last: str, view: str) -> List[str]:
+    """Every period label from ``first`` to ``last`` inclusive, so gaps show as zeros."""
+    periods = []
+    current, end = _period_start(first, view), _period_start(last, view)
+    while current <= end:
+        periods.append(period_key(current, view))
+        current = _next_period(current, view)
+    return periods
+
+
+def trend_counts(
+    session: Session,
+    view: str,
+    dimension: Any = None,
+    department_id: int | None = None,
+    start: date | None = None,
+    end: date | None = None,
+) -> List[Tuple[str, str, int]]:
+    """``(period, dimension value, count)`` rows from one GROUP BY on the period key.
+
+    Without ``dimension`` the value is ``"total"``.
+    """
+    period = period_key_sql(Rollup.day, view, session.get_bind().dialect.name).label("period")
+    columns = [period] + ([dimension] if dimension is not None else [])
+    conditions = [Rollup.incident_count > 0, *_window(start, end)]
+    if department_id is not None:
+        conditions.append(Rollup.department_id == department_id)
+    rows = session.exec(select(*columns, func.sum(Rollup.incident_count)).where(*conditions).group_by(*columns)).all()
+    if dimension is None:
+        return [(str(key), "total", int(count)) for key, count in rows]
+    return [(str(key), str(group), int(count)) for key, group, count in rows]
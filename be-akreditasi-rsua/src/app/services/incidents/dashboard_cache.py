@@ -0,0 +1,115 @@
+"""In-process cache of mutu dashboard payloads.
+
+Entries are keyed by endpoint, the query parameters after role scoping (a PJ
+user is already pinned to their department) and the data watermark from
+``aggregates.watermark``, so a write committed by another worker process yields a
+new key. They live for ``dashboard_cache_ttl_seconds`` and are dropped when a
+transaction that moved incident rollups commits in this process:
+:func:`rollups.apply_deltas` calls :func:`invalidate_on_commit`, which covers
+submit, category edits, prediction, regrade and reclassify.
+
+Concurrent misses on the same key are coalesced: the first request computes the
+payload and the others wait for its result instead of running the same queries.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ...config import get_settings
+from .. import metrics
+
+_PENDING_INVALIDATION = "dashboard_cache_invalidate"
+
+
+class DashboardCache:
+    """TTL + LRU cache with per-key request coalescing and generation-based invalidation."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[Hashable, int], Future] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, endpoint: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if self.ttl_seconds <= 0:
+            return compute()
+        full_key = (endpoint, key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(full_key)
+                outcome, value = "hit", entry[1]
+            else:
+                generation = self._generation
+                # Only join a computation started after the last invalidation.
+                future = self._inflight.get((full_key, generation))
+                if future is None:
+                    future = self._inflight[(full_key, generation)] = Future()
+                    outcome = "miss"
+                else:
+                    outcome = "coalesced"
+        metrics.DASHBOARD_CACHE_TOTAL.labels(endpoint=endpoint, outcome=outcome).inc()
+        if outcome == "hit":
+            return value
+        if outcome == "coalesced":
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop((full_key, generation), None)
+                if not future.done() and generation == self._generation:
+                    self._store(full_key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, full_key: Hashable, value: Any) -> None:
+        self._entries[full_key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(full_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        metrics.DASHBOARD_CACHE_INVALIDATIONS_TOTAL.inc()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()
+
+
+_settings = get_settings()
+cache = DashboardCache(_settings.dashboard_cache_ttl_seconds, _settings.dashboard_cache_max_entries)
+
+
+def invalidate_on_commit(session: Session) -> None:
+    """Drop cached dashboards once ``session``'s current transaction commits."""
+    session.info[_PENDING_INVALIDATION] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING_INVALIDATION, False):
+        cache.invalidate()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_after_rollback(session: Session, transaction: Any) -> None:
+    # Runs after after_commit; a savepoint rollback keeps the outer transaction's flag.
+    if transaction.parent is None:
+        session.info.pop(_PENDING_INVALIDATION, None)
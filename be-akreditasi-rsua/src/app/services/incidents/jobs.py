@@ -0,0 +1,121 @@
+"""Background enrichment of asynchronously submitted incidents.
+
+``submit_incident`` in async mode only records the state change and enqueues a
+:class:`PredictionJob`; in sync mode it enqueues one when the latency budget fell
+back to the heuristic. A separate worker (``scripts/prediction_worker.py``) drains
+the queue in batches with :func:`run_prediction_jobs`.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlmodel import Session, select
+
+from ...config import get_settings
+from ...models.incident import Incident, IncidentStatus, PredictionJob, PredictionJobStatus
+from ...models.user import User
+from ...services.ml import predict_all
+from .service import apply_prediction, create_audit_log
+
+logger = logging.getLogger(__name__)
+
+
+def claim_prediction_jobs(session: Session, limit: int) -> list[PredictionJob]:
+    """Mark up to ``limit`` jobs as RUNNING and return them.
+
+    Jobs left RUNNING by a crashed worker are reclaimed once they are older than
+    ``prediction_job_stale_after_seconds``.
+    """
+    settings = get_settings()
+    stale_before = datetime.utcnow() - timedelta(seconds=settings.prediction_job_stale_after_seconds)
+    statement = (
+        select(PredictionJob)
+        .where(
+            or_(
+                PredictionJob.status == PredictionJobStatus.PENDING,
+                (PredictionJob.status == PredictionJobStatus.RUNNING) & (PredictionJob.updated_at < stale_before),
+            )
+        )
+        .order_by(PredictionJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = session.exec(statement).all()
+    now = datetime.utcnow()
+    for job in jobs:
+        job.status = PredictionJobStatus.RUNNING
+        job.attempts += 1
+        job.started_at = now
+        job.updated_at = now
+        session.add(job)
+    session.commit()
+    return list(jobs)
+
+
+def _fail_job(job: PredictionJob, incident: Incident | None, exc: Exception, max_attempts: int) -> None:
+    job.last_error = str(exc)[:1000]
+    job.updated_at = datetime.utcnow()
+    if job.attempts >= max_attempts:
+        job.status = PredictionJobStatus.FAILED
+        job.finished_at = job.updated_at
+        if incident is not None:
+            incident.prediction_pending = False
+            # Moves the incident list ETag so clients stop seeing the job as pending.
+            incident.touch()
+    else:
+        job.status = PredictionJobStatus.PENDING
+
+
+def run_prediction_jobs(session: Session, batch_size: int | None = None) -> int:
+    """Process one batch of pending jobs; returns the number of jobs claimed."""
+    settings = get_settings()
+    jobs = claim_prediction_jobs(session, batch_size or settings.prediction_job_batch_size)
+    if not jobs:
+        return 0
+
+    incidents = {
+        incident.id: incident
+        for incident in session.exec(select(Incident).where(Incident.id.in_([job.incident_id for job in jobs]))).all()
+    }
+    runnable = [job for job in jobs if job.incident_id in incidents]
+    for job in jobs:
+        if job.incident_id not in incidents:
+            _fail_job(job, None, LookupError(f"incident {job.incident_id} not found"), max_attempts=0)
+            session.add(job)
+
+    try:
+        results = predict_all([incidents[job.incident_id].free_text_description for job in runnable], use_cache=False)
+    except Exception as exc:  # pragma: no cover - retried on the next run
+        logger.exception("Batched prediction failed for %s job(s)", len(runnable), exc_info=exc)
+        for job in runnable:
+            _fail_job(job, incidents[job.incident_id], exc, settings.prediction_job_max_attempts)
+            session.add(job)
+        session.commit()
+        return len(jobs)
+
+    for job, result in zip(runnable, results):
+        incident = incidents[job.incident_id]
+        try:
+            payload_diff = apply_prediction(session, incident, result)
+            actor = session.get(User, job.requested_by_id)
+            if actor is not None:
+                payload_diff["prediction_job_id"] = job.id
+                create_audit_log(session, incident, actor, IncidentStatus.SUBMITTED, incident.status, payload_diff)
+            job.status = PredictionJobStatus.DONE
+            job.last_error = None
+            job.finished_at = datetime.utcnow()
+            job.updated_at = job.finished_at
+        except Exception as exc:  # pragma: no cover - best effort per job
+            logger.exception("Prediction job %s failed", job.id, exc_info=exc)
+            _fail_job(job, incident, exc, settings.prediction_job_max_attempts)
+        session.add(incident)
+        session.add(job)
+    session.commit()
+    return len(jobs)
+
+
+def latest_prediction_job(session: Session, incident_id: int) -> PredictionJob | None:
+    return session.exec(
+        select(PredictionJob).where(PredictionJob.incident_id == incident_id).order_by(PredictionJob.id.desc()).limit(1)
+    ).first()
@@ -0,0 +1,323 @@
+"""Re-score existing incidents after a new model artifact ships.
+
+Incidents whose ``model_version`` differs from the loaded classifier are streamed
+in id order over a server-side cursor, predicted in large batches and written back
+with one bulk UPDATE plus one summarized audit entry per chunk. Progress is
+checkpointed to a JSON file after every chunk so an interrupted run resumes where
+it stopped, and a rows-per-second limit keeps daytime runs from starving the API.
+An exclusive ``flock`` on ``<checkpoint>.lock`` keeps a second run (another web
+worker or the CLI script) from starting while one is in progress.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts
+    fcntl = None
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from ...config import get_settings
+from ...models.incident import AuditLog, Incident, IncidentStatus
+from ...services import ml
+from . import rollups
+
+logger = logging.getLogger(__name__)
+
+
+class ReclassifyAlreadyRunning(RuntimeError):
+    pass
+
+
+@dataclass
+class ReclassifyProgress:
+    target_version: str
+    last_id: int = 0
+    processed: int = 0
+    changed: int = 0
+    skipped: int = 0
+    chunks: int = 0
+    running: bool = False
+    cancelled: bool = False
+    error: Optional[str] = None
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _load_checkpoint(path: Path, target_version: str) -> ReclassifyProgress:
+    if path.exists():
+        try:
+            data = json.loads(path.read_text())
+            if data.get("target_version") == target_version:
+                return ReclassifyProgress(
+                    target_version=target_version,
+                    last_id=int(data.get("last_id", 0)),
+                    processed=int(data.get("processed", 0)),
+                    changed=int(data.get("changed", 0)),
+                    skipped=int(data.get("skipped", 0)),
+                    chunks=int(data.get("chunks", 0)),
+                )
+            logger.info("Ignoring checkpoint for model %s; now targeting %s", data.get("target_version"), target_version)
+        except Exception as exc:  # pragma: no cover - corrupt checkpoint restarts from zero
+            logger.exception("Failed to read reclassification checkpoint %s", path, exc_info=exc)
+    return ReclassifyProgress(target_version=target_version)
+
+
+def _save_checkpoint(path: Path, progress: ReclassifyProgress) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps(
+            {
+                "target_version": progress.target_version,
+                "last_id": progress.last_id,
+                "processed": progress.processed,
+                "changed": progress.changed,
+                "skipped": progress.skipped,
+                "chunks": progress.chunks,
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+        )
+    )
+    os.replace(tmp_path, path)
+
+
+def _acquire_run_lock(checkpoint: Path) -> IO[str]:
+    """Hold an exclusive lock beside ``checkpoint`` for the duration of one run."""
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    lock_file = open(checkpoint.with_name(f"{checkpoint.name}.lock"), "w")
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise ReclassifyAlreadyRunning(f"Reclassification already running (lock on {checkpoint} held)") from None
+    return lock_file
+
+
+def _write_chunk(
+    session: Session, rows: List[Any], results: List[ml.PredictionResult], target_version: str, actor_id: int
+) -> int:
+    params = []
+    changed = 0
+    now = datetime.utcnow()
+    for row, result in zip(rows, results):
+        values = {
+            "id": row.id,
+            "predicted_category": result.category,
+            "predicted_confidence": result.confidence,
+            "predicted_probabilities": result.probabilities,
+            "model_version": target_version,
+            "skp_code": result.skp_code or row.skp_code,
+            "mdp_code": result.mdp_code or row.mdp_code,
+            "updated_at": now,
+        }
+        if (values["predicted_category"], values["skp_code"], values["mdp_code"]) != (
+            row.predicted_category,
+            row.skp_code,
+            row.mdp_code,
+        ):
+            changed += 1
+        params.append(values)
+    # ORM bulk UPDATE by primary key: one executemany for the whole chunk.
+    with rollups.tracking_where(session, Incident.id.in_([row.id for row in rows])):
+        session.execute(update(Incident), params)
+    session.add(
+        AuditLog(
+            incident_id=rows[-1].id,
+            actor_id=actor_id,
+            payload_diff=str(
+                {
+                    "reclassification": {
+                        "model_version": target_version,
+                        "first_incident_id": rows[0].id,
+                        "last_incident_id": rows[-1].id,
+                        "count": len(rows),
+                        "changed": changed,
+                    }
+                }
+            ),
+        )
+    )
+    session.commit()
+    return changed
+
+
+def reclassify_incidents(
+    engine: Engine,
+    actor_id: int,
+    chunk_size: int | None = None,
+    max_rows_per_second: float | None = None,
+    checkpoint_path: str | None = None,
+    progress: ReclassifyProgress | None = None,
+    stop_event: threading.Event | None = None,
+    restart: bool = False,
+    run_lock: IO[str] | None = None,
+) -> ReclassifyProgress:
+    """Re-score every submitted incident not yet predicted by the loaded model.
+
+    Raises :class:`ReclassifyAlreadyRunning` if another process holds the run lock
+    (``run_lock`` is one already taken by the caller and is released here), and
+    ``RuntimeError`` before touching anything when the model or embedder is
+    unavailable. Stops if a whole chunk falls back to the keyword heuristic.
+    ``restart`` discards the checkpoint once the lock is held.
+    """
+    settings = get_settings()
+    checkpoint = Path(checkpoint_path or settings.reclassify_checkpoint_path)
+    run_lock = run_lock or _acquire_run_lock(checkpoint)
+    try:
+        if restart:
+            checkpoint.unlink(missing_ok=True)
+        return _reclassify_locked(engine, actor_id, chunk_size, max_rows_per_second, checkpoint, progress, stop_event)
+    finally:
+        run_lock.close()
+
+
+def _reclassify_locked(
+    engine: Engine,
+    actor_id: int,
+    chunk_size: int | None,
+    max_rows_per_second: float | None,
+    checkpoint: Path,
+    progress: ReclassifyProgress | None,
+    stop_event: threading.Event | None,
+) -> ReclassifyProgress:
+    settings = get_settings()
+    if ml.classifier.model is None:
+        raise RuntimeError("No classifier model loaded; refusing to overwrite predictions with the fallback heuristic")
+    # Goes through the same path as the chunks (local or executor), so a missing embedder shows up here.
+    probe = ml.predict_all(["Pemeriksaan awal reklasifikasi"], use_cache=False)[0]
+    if probe.fallback_reason is not None:
+        raise RuntimeError(
+            f"Model unavailable ({probe.fallback_reason}); refusing to overwrite predictions with the fallback heuristic"
+        )
+    target_version = ml.classifier.model_version
+    chunk_size = chunk_size or settings.reclassify_chunk_size
+    max_rows_per_second = max_rows_per_second if max_rows_per_second is not None else settings.reclassify_max_rows_per_second
+
+    resumed = _load_checkpoint(checkpoint, target_version)
+    if progress is None:
+        progress = resumed
+    else:
+        progress.last_id, progress.processed, progress.changed, progress.skipped, progress.chunks = (
+            resumed.last_id,
+            resumed.processed,
+            resumed.changed,
+            resumed.skipped,
+            resumed.chunks,
+        )
+    progress.running = True
+    progress.started_at = datetime.utcnow().isoformat()
+
+    statement = (
+        select(
+            Incident.id,
+            Incident.free_text_description,
+            Incident.predicted_category,
+            Incident.skp_code,
+            Incident.mdp_code,
+        )
+        .where(
+            Incident.id > progress.last_id,
+            Incident.status != IncidentStatus.DRAFT,
+            or_(Incident.model_version.is_(None), Incident.model_version != target_version),
+        )
+        .order_by(Incident.id)
+    )
+    try:
+        with engine.connect() as read_conn:
+            result = read_conn.execution_options(stream_results=True, yield_per=chunk_size).execute(statement)
+            for rows in result.partitions(chunk_size):
+                if stop_event is not None and stop_event.is_set():
+                    progress.cancelled = True
+                    break
+                chunk_started = time.monotonic()
+                results = ml.predict_all([row.free_text_description for row in rows], use_cache=False)
+                # Fallback answers are heuristics, not the target model: never store them (or its
+                # version) over a real prediction. Rows left alone are picked up by a later run.
+                scored = [(row, result) for row, result in zip(rows, results) if result.fallback_reason is None]
+                if not scored:
+                    raise RuntimeError(
+                        f"Model fell back ({results[0].fallback_reason}) for every incident after id {progress.last_id}"
+                    )
+                if len(scored) < len(rows):
+                    logger.warning("Skipped %s incident(s) the model could not score", len(rows) - len(scored))
+                with Session(engine) as session:
+                    progress.changed += _write_chunk(
+                        session, [row for row, _ in scored], [result for _, result in scored], target_version, actor_id
+                    )
+                progress.skipped += len(rows) - len(scored)
+                progress.last_id = rows[-1].id
+                progress.processed += len(rows)
+                progress.chunks += 1
+                _save_checkpoint(checkpoint, progress)
+                logger.info("Reclassified %s incident(s) up to id %s", progress.processed, progress.last_id)
+                if max_rows_per_second and max_rows_per_second > 0:
+                    time.sleep(max(0.0, len(rows) / max_rows_per_second - (time.monotonic() - chunk_started)))
+    except Exception as exc:
+        progress.error = str(exc)
+        logger.exception("Reclassification stopped at id %s", progress.last_id, exc_info=exc)
+        raise
+    finally:
+        progress.running = False
+        progress.finished_at = datetime.utcnow().isoformat()
+    return progress
+
+
+class ReclassifyRunner:
+    """Runs a reclassification in a background thread (admin endpoint).
+
+    ``start`` takes the run lock before returning, so a run already going in this
+    or any other process is reported to the caller instead of failing in the thread.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self.progress: ReclassifyProgress | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, engine: Engine, actor_id: int, **options: Any) -> ReclassifyProgress:
+        with self._lock:
+            if self.running:
+                raise ReclassifyAlreadyRunning("Reclassification already running")
+            run_lock = _acquire_run_lock(Path(options.get("checkpoint_path") or get_settings().reclassify_checkpoint_path))
+            self._stop.clear()
+            self.progress = ReclassifyProgress(target_version=ml.classifier.model_version, running=True)
+            progress = self.progress
+
+            def run() -> None:
+                try:
+                    reclassify_incidents(
+                        engine, actor_id, progress=progress, stop_event=self._stop, run_lock=run_lock, **options
+                    )
+                except Exception:  # pragma: no cover - error recorded on progress
+                    pass
+
+            self._thread = threading.Thread(target=run, name="incident-reclassify", daemon=True)
+            self._thread.start()
+            return progress
+
+    def cancel(self) -> None:
+        self._stop.set()
+
+
+runner = ReclassifyRunner()
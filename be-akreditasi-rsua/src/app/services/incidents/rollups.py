@@ -0,0 +1,129 @@
+"""Daily incident rollups behind the mutu dashboard.
+
+``incident_daily_rollups`` holds one count per (day, department, category, SKP, MDP,
+grading) over reported (non-draft) incidents, where the category is the final
+category if set and the predicted one otherwise. The service layer keeps it in
+step inside the same transaction as the change:
+
+* :func:`tracking` wraps a change to one incident and moves it from its old key
+  to its new one (submit, prediction, category edit, close);
+* :func:`tracking_where` does the same for set-based UPDATEs (regrade,
+  reclassify) with one GROUP BY before and one after.
+
+Any change marks the cached dashboards for invalidation on commit (see
+``dashboard_cache.py``).
+
+:func:`rebuild_rollups` recomputes the table from ``incidents`` in one
+INSERT ... SELECT for backfills (``scripts/rebuild_dashboard_rollups.py``).
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Iterator, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, Integer, String, delete, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from ...models.incident import Incident, IncidentDailyRollup, IncidentStatus
+from . import dashboard_cache
+
+# (day, department_id, category, skp_code, mdp_code, grading); "" / 0 stand for "none".
+RollupKey = Tuple[date, int, str, str, str, str]
+
+
+def rollup_key(incident: Incident) -> Optional[RollupKey]:
+    if incident.status == IncidentStatus.DRAFT:
+        return None
+    moment = incident.occurred_at or incident.created_at
+    category = incident.final_category or incident.predicted_category
+    return (
+        moment.date(),
+        incident.department_id or 0,
+        category.value if category else "",
+        incident.skp_code.value if incident.skp_code else "",
+        incident.mdp_code.value if incident.mdp_code else "",
+        incident.grading.value if incident.grading else "",
+    )
+
+
+def _key_columns() -> list[Any]:
+    """SQL expressions computing :data:`RollupKey` from an ``incidents`` row."""
+    # Explicit result types: the enum columns would otherwise reject "".
+    return [
+        func.date(func.coalesce(Incident.occurred_at, Incident.created_at), type_=Date),
+        func.coalesce(Incident.department_id, 0, type_=Integer),
+        func.coalesce(Incident.final_category, Incident.predicted_category, "", type_=String),
+        func.coalesce(Incident.skp_code, "", type_=String),
+        func.coalesce(Incident.mdp_code, "", type_=String),
+        func.coalesce(Incident.grading, "", type_=String),
+    ]
+
+
+def grouped_keys(session: Session, *conditions: Any) -> Counter:
+    """Rollup key counts of the reported incidents matching ``conditions``."""
+    columns = _key_columns()
+    rows = session.execute(
+        select(*columns, func.count())
+        .where(Incident.status != IncidentStatus.DRAFT, *conditions)
+        .group_by(*columns)
+    ).all()
+    return Counter({tuple(row[:6]): row[6] for row in rows})
+
+
+def apply_deltas(session: Session, deltas: Counter) -> None:
+    table = IncidentDailyRollup.__table__
+    names = ("day", "department_id", "category", "skp_code", "mdp_code", "grading")
+    now = datetime.utcnow()
+    for key, delta in deltas.items():
+        if delta == 0:
+            continue
+        dashboard_cache.invalidate_on_commit(session)
+        match = [table.c[name] == value for name, value in zip(names, key)]
+        increment = update(table).where(*match).values(incident_count=table.c.incident_count + delta, updated_at=now)
+        if session.execute(increment).rowcount:
+            continue
+        try:
+            with session.begin_nested():
+                session.execute(insert(table).values({**dict(zip(names, key)), "incident_count": delta, "updated_at": now}))
+        except IntegrityError:
+            session.execute(increment)  # created concurrently
+
+
+@contextmanager
+def tracking(session: Session, incident: Incident) -> Iterator[None]:
+    """Move ``incident`` between rollup keys according to the changes made in the block."""
+    before = rollup_key(incident)
+    yield
+    after = rollup_key(incident)
+    if before != after:
+        deltas: Counter = Counter()
+        if before is not None:
+            deltas[before] -= 1
+        if after is not None:
+            deltas[after] += 1
+        apply_deltas(session, deltas)
+
+
+@contextmanager
+def tracking_where(session: Session, *conditions: Any) -> Iterator[None]:
+    """Like :func:`tracking` for a bulk UPDATE of the incidents matching ``conditions``."""
+    before = grouped_keys(session, *conditions)
+    yield
+    deltas = grouped_keys(session, *conditions)
+    deltas.subtract(before)
+    apply_deltas(session, deltas)
+
+
+def rebuild_rollups(session: Session) -> int:
+    """Recompute every rollup row from ``incidents``; returns the number of rows written."""
+    columns = _key_columns()
+    session.execute(delete(IncidentDailyRollup))
+    result = session.execute(
+        insert(IncidentDailyRollup).from_select(
+            ["day", "department_id", "category", "skp_code", "mdp_code", "grading", "incident_count", "updated_at"],
+            select(*columns, func.count(), literal(datetime.utcnow(), DateTime)).where(Incident.status != IncidentStatus.DRAFT).group_by(*columns),
+        )
+    )
+    return result.rowcount
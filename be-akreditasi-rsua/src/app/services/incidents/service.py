@@ -1,13 +1,27 @@
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict
 
 from fastapi import HTTPException
-from sqlalchemy import func
+from sqlalchemy import Date, DateTime, case, delete, func, insert, literal, literal_column, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session, select
 
-from ...models.incident import AuditLog, Incident, IncidentCategory, IncidentGrading, IncidentStatus, SKPCode, MDPCode
+from ...config import get_settings
+from ...models.incident import (
+    AuditLog,
+    DepartmentMonthStat,
+    Incident,
+    IncidentCategory,
+    IncidentGrading,
+    IncidentStatus,
+    PredictionJob,
+)
 from ...models.user import User
-from ...services.ml import predict_incident, predict_skp_mdp
+from ...services.metrics import GRADING_QUERY_SECONDS
+from ...services.ml import BUDGET_FALLBACK_REASONS, MINILM_MODEL_NAME, PredictionResult, predict_within_budget
+from . import rollups
+from .similarity import store_embedding
+from .speculative import take_cached_prediction
 from .state import ensure_transition
 
 
@@ -77,49 +91,186 @@ def _matrix_grade(prob: int | None, severity: int | None) -> IncidentGrading | N
     return matrix.get(prob, {}).get(severity)
 
 
-def compute_grading(session: Session, incident: Incident) -> IncidentGrading | None:
+def _severity_grade_sql(probability: int):
+    """SQL twin of ``_matrix_grade(probability, _harm_to_severity(harm_indicator))``.
+
+    Mirrors ``_harm_to_severity`` exactly, including its always-true third branch:
+    any non-empty text that is neither "tidak ada cedera/cidera" nor "ringan" is
+    severity 3.
+    """
+    harm = func.lower(Incident.harm_indicator)
+    return case(
+        # LENGTH, not = '': MySQL PAD SPACE collations treat '   ' as equal to ''.
+        (or_(Incident.harm_indicator.is_(None), func.length(Incident.harm_indicator) == 0), None),
+        (or_(harm.like("%tidak ada cedera%"), harm.like("%tidak ada cidera%")), _matrix_grade(probability, 1).value),
+        (harm.like("%ringan%"), _matrix_grade(probability, 2).value),
+        else_=_matrix_grade(probability, 3).value,
+    )
+
+
+def _month_key(incident: Incident) -> tuple[int, date] | None:
     if incident.department_id is None or incident.occurred_at is None:
         return None
+    return incident.department_id, _month_range(incident.occurred_at)[0].date()
+
+
+def _bump_month_stat(session: Session, department_id: int, month_start: date, column: str) -> int:
+    """Increment one counter in this transaction; returns the month's reported count."""
+    stats = DepartmentMonthStat.__table__
+    key = (stats.c.department_id == department_id) & (stats.c.month_start == month_start)
+    increment = update(stats).where(key).values({column: stats.c[column] + 1, "updated_at": datetime.utcnow()})
+    if session.execute(increment).rowcount == 0:
+        try:
+            with session.begin_nested():
+                session.execute(
+                    insert(stats).values(
+                        {
+                            "department_id": department_id,
+                            "month_start": month_start,
+                            "reported_count": 0,
+                            "closed_count": 0,
+                            "updated_at": datetime.utcnow(),
+                            column: 1,
+                        }
+                    )
+                )
+        except IntegrityError:
+            session.execute(increment)  # another submit created the row first
+    return session.execute(select(stats.c.reported_count).where(key)).scalar_one()
+
+
+def regrade_month(session: Session, department_id: int, month_start: date, probability: int, exclude_id: int | None = None) -> int:
+    """Regrade the month's reported incidents for a new frequency tier in one UPDATE."""
+    next_month = _month_range(datetime.combine(month_start, datetime.min.time()))[1]
+    conditions = [
+        Incident.department_id == department_id,
+        Incident.occurred_at >= month_start,
+        Incident.occurred_at < next_month,
+        Incident.status != IncidentStatus.DRAFT,
+    ]
+    if exclude_id is not None:
+        conditions.append(Incident.id != exclude_id)
+    statement = (
+        update(Incident)
+        .where(*conditions)
+        .values(grading=_severity_grade_sql(probability), updated_at=datetime.now(timezone.utc))
+        # The CASE cannot be evaluated in Python; loaded instances are not refreshed.
+        .execution_options(synchronize_session=False)
+    )
+    with rollups.tracking_where(session, *conditions):
+        return session.execute(statement).rowcount
+
+
+def record_submission(session: Session, incident: Incident) -> None:
+    """Count a newly reported incident and regrade its month if the frequency tier changed."""
+    month_key = _month_key(incident)
+    if month_key is None:
+        return
+    reported = _bump_month_stat(session, *month_key, "reported_count")
+    probability = _frequency_to_probability(reported)
+    if probability != _frequency_to_probability(reported - 1):
+        regrade_month(session, *month_key, probability, exclude_id=incident.id)
+
+
+# First day of ``occurred_at``'s month per dialect, as in migration 20261017_000005.
+_MONTH_START_SQL = {
+    "mysql": "DATE_SUB(DATE(incidents.occurred_at), INTERVAL DAYOFMONTH(incidents.occurred_at) - 1 DAY)",
+    "sqlite": "DATE(incidents.occurred_at, 'start of month')",
+    "postgresql": "CAST(DATE_TRUNC('month', incidents.occurred_at) AS DATE)",
+}
 
-    month_start, next_month = _month_range(incident.occurred_at)
-    freq_query = (
-        select(func.count(Incident.id))
-        .where(
-            Incident.department_id == incident.department_id,
-            Incident.occurred_at >= month_start,
-            Incident.occurred_at < next_month,
+
+def rebuild_month_stats(session: Session) -> int:
+    """Recompute ``department_month_stats`` from ``incidents``; returns the number of rows written."""
+    month_start = literal_column(_MONTH_START_SQL[session.get_bind().dialect.name], Date)
+    session.execute(delete(DepartmentMonthStat))
+    result = session.execute(
+        insert(DepartmentMonthStat).from_select(
+            ["department_id", "month_start", "reported_count", "closed_count", "updated_at"],
+            select(
+                Incident.department_id,
+                month_start,
+                func.count(),
+                func.sum(case((Incident.status == IncidentStatus.CLOSED, 1), else_=0)),
+                literal(datetime.utcnow(), DateTime),
+            )
+            .where(
+                Incident.status != IncidentStatus.DRAFT,
+                Incident.department_id.is_not(None),
+                Incident.occurred_at.is_not(None),
+            )
+            .group_by(Incident.department_id, month_start),
         )
     )
-    monthly_count = session.exec(freq_query).one()
-    probability = _frequency_to_probability(int(monthly_count))
+    return result.rowcount
+
+
+def compute_grading(session: Session, incident: Incident) -> IncidentGrading | None:
+    month_key = _month_key(incident)
+    if month_key is None:
+        return None
+
+    department_id, month_start = month_key
+    freq_query = select(DepartmentMonthStat.reported_count).where(
+        DepartmentMonthStat.department_id == department_id,
+        DepartmentMonthStat.month_start == month_start,
+    )
+    with GRADING_QUERY_SECONDS.time():
+        monthly_count = session.exec(freq_query).first()
+    probability = _frequency_to_probability(int(monthly_count or 0))
     severity = _harm_to_severity(incident.harm_indicator)
     return _matrix_grade(probability, severity)
 
 
+def apply_prediction(session: Session, incident: Incident, result: PredictionResult) -> Dict[str, Any]:
+    """Write model output and grading onto the incident; returns the audit payload."""
+    with rollups.tracking(session, incident):
+        incident.predicted_category = result.category
+        incident.predicted_confidence = result.confidence
+        incident.predicted_probabilities = result.probabilities
+        incident.model_version = result.model_version
+        if result.skp_code is not None:
+            incident.skp_code = result.skp_code
+        if result.mdp_code is not None:
+            incident.mdp_code = result.mdp_code
+        incident.grading = compute_grading(session, incident)
+    incident.prediction_pending = False
+    incident.updated_at = datetime.now(timezone.utc)
+    if result.embedding is not None and incident.id is not None:
+        store_embedding(session, incident, result.embedding, MINILM_MODEL_NAME)
+    return {
+        "prediction": {
+            "category": incident.predicted_category.value if incident.predicted_category else None,
+            "confidence": incident.predicted_confidence,
+            "model_version": incident.model_version,
+        },
+        "grading": incident.grading.value if incident.grading else None,
+    }
+
+
 def submit_incident(session: Session, incident: Incident, actor: User) -> Incident:
     ensure_transition(incident, IncidentStatus.SUBMITTED, {role.name for role in actor.roles})
     previous_status = incident.status
-    prediction = predict_incident(incident.free_text_description, {"department": incident.department_id})
-    incident.predicted_category = prediction["category"]
-    incident.predicted_confidence = prediction["confidence"]
-    incident.model_version = prediction["model_version"]
-    skp_mdp = predict_skp_mdp(incident.free_text_description)
-    print(skp_mdp)
-    if skp_mdp.get("skp"):
-        skp_label = str(skp_mdp["skp"]).strip().lower().replace(" ", "")
-        if skp_label.isdigit():
-            skp_label = f"skp{skp_label}"
-        code_map = {code.value: code for code in SKPCode}
-        incident.skp_code = code_map.get(skp_label)
-    if skp_mdp.get("mdp"):
-        mdp_label = str(skp_mdp["mdp"]).strip().lower().replace(" ", "")
-        if mdp_label.isdigit():
-            mdp_label = f"mdp{mdp_label}"
-        code_map = {code.value: code for code in MDPCode}
-        incident.mdp_code = code_map.get(mdp_label)
-    # Placeholder: future ML can set SKP/MDP here
-    incident.grading = compute_grading(session, incident)
-    incident.status = IncidentStatus.SUBMITTED
+    record_submission(session, incident)
+    cached = take_cached_prediction(session, incident)
+    if cached is not None:
+        # Predicted in the background while the draft was edited; see speculative.py.
+        payload_diff = apply_prediction(session, incident, cached)
+        payload_diff["prediction_source"] = "draft_cache"
+    elif get_settings().submit_prediction_mode == "async":
+        # Enrichment is deferred to the prediction worker; see services/incidents/jobs.py.
+        incident.prediction_pending = True
+        session.add(PredictionJob(incident_id=incident.id, requested_by_id=actor.id))
+        payload_diff = {"prediction": "pending"}
+    else:
+        result = predict_within_budget(incident.free_text_description)
+        payload_diff = apply_prediction(session, incident, result)
+        if result.fallback_reason in BUDGET_FALLBACK_REASONS:
+            # Provisional heuristic answer; the prediction worker re-scores it with the model.
+            session.add(PredictionJob(incident_id=incident.id, requested_by_id=actor.id))
+            payload_diff["fallback_reason"] = result.fallback_reason
+    with rollups.tracking(session, incident):
+        incident.status = IncidentStatus.SUBMITTED
     incident.updated_at = datetime.now(timezone.utc)
     create_audit_log(
         session,
@@ -127,14 +278,7 @@ def submit_incident(session: Session, incident: Incident, actor: User) -> Incide
         actor,
         previous_status,
         IncidentStatus.SUBMITTED,
-        payload_diff={
-            "prediction": {
-                "category": incident.predicted_category.value if incident.predicted_category else None,
-                "confidence": incident.predicted_confidence,
-                "model_version": incident.model_version,
-            },
-            "grading": incident.grading.value if incident.grading else None,
-        },
+        payload_diff=payload_diff,
     )
     session.add(incident)
     return incident
@@ -153,7 +297,8 @@ def update_category(session: Session, incident: Incident, actor: User, category:
         )
 
     previous_category = incident.final_category
-    incident.final_category = category
+    with rollups.tracking(session, incident):
+        incident.final_category = category
     incident.last_category_editor_id = actor.id
     incident.updated_at = datetime.now(timezone.utc)
     create_audit_log(
@@ -177,7 +322,11 @@ def close_incident(session: Session, incident: Incident, actor: User) -> Inciden
     if incident.final_category is None:
         raise HTTPException(status_code=409, detail={"error_code": "final_category_missing", "message": "Final category required before closing"})
     previous_status = incident.status
-    incident.status = IncidentStatus.CLOSED
+    month_key = _month_key(incident)
+    if month_key is not None:
+        _bump_month_stat(session, *month_key, "closed_count")
+    with rollups.tracking(session, incident):
+        incident.status = IncidentStatus.CLOSED
     incident.updated_at = datetime.now(timezone.utc)
     create_audit_log(session, incident, actor, previous_status, IncidentStatus.CLOSED)
     session.add(incident)
@@ -0,0 +1,210 @@
+"""Top-k similar incident search over stored MiniLM embeddings.
+
+Each submitted incident's embedding is written to ``incident_embeddings`` as
+unit-normalized float16 bytes. :class:`SimilarityIndex` keeps those vectors in a
+contiguous float16 matrix, half the size of float32 (about 230 MB per worker
+process at 300k x 384), and upcasts it block by block so a query is a series of
+float32 BLAS matrix-vector products (cosine similarity on unit vectors), with
+department and date filters applied as numpy masks. The index loads lazily and catches up with rows inserted by other workers
+through an ``id > last_seen`` query before every search, so it never rescans the
+table.
+"""
+
+from __future__ import annotations
+
+import calendar
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlmodel import Session, select
+
+from ...models.incident import Incident, IncidentEmbedding
+from ..lazy import LazyModule
+
+np = LazyModule("numpy")
+
+logger = logging.getLogger(__name__)
+
+REFRESH_PAGE_SIZE = 5000
+DENSE_FILTER_RATIO = 0.25
+SCORE_BLOCK_ROWS = 8192  # rows upcast to float32 at a time: 12 MB scratch at dim 384
+_NO_DEPARTMENT = -1
+_NO_DATE = -(2**63)  # int64 min, marks a missing occurred_at
+
+
+def encode_vector(vector: np.ndarray) -> bytes:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if norm > 0:
+        vector = vector / norm
+    return vector.astype("<f2").tobytes()
+
+
+def decode_vector(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<f2").astype(np.float32)
+
+
+def store_embedding(session: Session, incident: Incident, vector: np.ndarray, model_name: str) -> None:
+    """Insert (or replace) the incident's embedding; a replacement gets a new sequence id."""
+    existing = session.exec(select(IncidentEmbedding).where(IncidentEmbedding.incident_id == incident.id)).first()
+    if existing is not None:
+        session.delete(existing)
+        session.flush()
+    session.add(
+        IncidentEmbedding(
+            incident_id=incident.id,
+            model_name=model_name,
+            dim=int(np.asarray(vector).shape[-1]),
+            vector=encode_vector(vector),
+            department_id=incident.department_id,
+            occurred_at=incident.occurred_at,
+        )
+    )
+
+
+def _epoch(value: Optional[datetime]) -> int:
+    # Naive datetimes are UTC throughout the app (datetime.utcnow).
+    return calendar.timegm(value.utctimetuple()) if value is not None else _NO_DATE
+
+
+class SimilarityIndex:
+    """In-memory cosine index over ``incident_embeddings``, updated incrementally."""
+
+    def __init__(self, initial_capacity: int = 1024) -> None:
+        self._lock = threading.RLock()
+        self._capacity = initial_capacity
+        self._dim: Optional[int] = None
+        # Arrays are allocated with the first vector, so importing this module stays numpy-free.
+        self._vectors: np.ndarray | None = None
+        self._incident_ids: np.ndarray | None = None
+        self._departments: np.ndarray | None = None
+        self._occurred: np.ndarray | None = None
+        self._rows: Dict[int, int] = {}
+        self._size = 0
+        self._last_seq = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self) -> None:
+        capacity = self._capacity * 2
+        vectors = np.zeros((capacity, self._dim), dtype=np.float16)
+        vectors[: self._size] = self._vectors[: self._size]
+        self._vectors = vectors
+        for name, fill in (("_incident_ids", 0), ("_departments", _NO_DEPARTMENT), ("_occurred", _NO_DATE)):
+            grown = np.full(capacity, fill, dtype=np.int64)
+            grown[: self._size] = getattr(self, name)[: self._size]
+            setattr(self, name, grown)
+        self._capacity = capacity
+
+    def add(
+        self,
+        incident_id: int,
+        vector: np.ndarray,
+        department_id: Optional[int],
+        occurred_at: Optional[datetime],
+    ) -> None:
+        with self._lock:
+            if self._dim is None:
+                self._dim = int(vector.shape[-1])
+                self._vectors = np.zeros((self._capacity, self._dim), dtype=np.float16)
+                self._incident_ids = np.zeros(self._capacity, dtype=np.int64)
+                self._departments = np.full(self._capacity, _NO_DEPARTMENT, dtype=np.int64)
+                self._occurred = np.full(self._capacity, _NO_DATE, dtype=np.int64)
+            if vector.shape[-1] != self._dim:
+                logger.warning("Skipping embedding for incident %s: dim %s != %s", incident_id, vector.shape[-1], self._dim)
+                return
+            row = self._rows.get(incident_id)
+            if row is None:
+                if self._size == self._capacity:
+                    self._grow()
+                row = self._size
+                self._size += 1
+                self._rows[incident_id] = row
+            self._vectors[row] = vector
+            self._incident_ids[row] = incident_id
+            self._departments[row] = department_id if department_id is not None else _NO_DEPARTMENT
+            self._occurred[row] = _epoch(occurred_at)
+
+    def refresh(self, session: Session) -> int:
+        """Load embeddings inserted since the last refresh; returns how many were added."""
+        added = 0
+        with self._lock:
+            while True:
+                rows = session.exec(
+                    select(
+                        IncidentEmbedding.id,
+                        IncidentEmbedding.incident_id,
+                        IncidentEmbedding.vector,
+                        IncidentEmbedding.department_id,
+                        IncidentEmbedding.occurred_at,
+                    )
+                    .where(IncidentEmbedding.id > self._last_seq)
+                    .order_by(IncidentEmbedding.id)
+                    .limit(REFRESH_PAGE_SIZE)
+                ).all()
+                for seq, incident_id, blob, department_id, occurred_at in rows:
+                    self.add(incident_id, decode_vector(blob), department_id, occurred_at)
+                    self._last_seq = seq
+                added += len(rows)
+                if len(rows) < REFRESH_PAGE_SIZE:
+                    return added
+
+    def vector_for(self, incident_id: int) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(incident_id)
+            return None if row is None else self._vectors[row].astype(np.float32)
+
+    def search(
+        self,
+        vector: np.ndarray,
+        k: int = 10,
+        department_id: Optional[int] = None,
+        occurred_from: Optional[datetime] = None,
+        occurred_to: Optional[datetime] = None,
+        exclude_incident_id: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """Return up to ``k`` ``(incident_id, cosine)`` pairs, best first."""
+        with self._lock:
+            size = self._size
+            if size == 0 or k <= 0:
+                return []
+            mask = None
+            if department_id is not None:
+                mask = self._departments[:size] == department_id
+            if occurred_from is not None:
+                in_range = self._occurred[:size] >= _epoch(occurred_from)
+                mask = in_range if mask is None else mask & in_range
+            if occurred_to is not None:
+                in_range = (self._occurred[:size] <= _epoch(occurred_to)) & (self._occurred[:size] != _NO_DATE)
+                mask = in_range if mask is None else mask & in_range
+
+            query = np.asarray(vector, dtype=np.float32)
+            if mask is None or mask.mean() > DENSE_FILTER_RATIO:
+                # Broad filter: one GEMV over the whole matrix beats gathering rows first.
+                candidates = np.arange(size)
+                scores = np.empty(size, dtype=np.float32)
+                for start in range(0, size, SCORE_BLOCK_ROWS):
+                    stop = min(start + SCORE_BLOCK_ROWS, size)
+                    scores[start:stop] = self._vectors[start:stop].astype(np.float32) @ query
+                if mask is not None:
+                    scores[~mask] = -np.inf
+            else:
+                candidates = np.flatnonzero(mask)
+                scores = self._vectors[candidates].astype(np.float32) @ query
+            excluded = self._rows.get(exclude_incident_id) if exclude_incident_id is not None else None
+            if excluded is not None:
+                scores[candidates == excluded] = -np.inf
+            ids = self._incident_ids[candidates]
+
+        top = min(k, scores.size)
+        if top == 0:
+            return []
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in best if np.isfinite(scores[i])]
+
+
+index = SimilarityIndex()
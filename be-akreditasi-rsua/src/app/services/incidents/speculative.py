@@ -0,0 +1,115 @@
+"""Speculative classification of drafts.
+
+Creating or editing a draft schedules :func:`precompute_draft_prediction` as a
+FastAPI background task, so the model runs while the nurse is still editing. The
+result is kept in ``incident_prediction_cache`` with a hash of the exact text and
+the model version; :func:`take_cached_prediction` hands it to ``submit_incident``
+when both still match, and otherwise the submit predicts as before.
+
+Background predictions are low priority: at most
+``speculative_prediction_max_inflight`` run per process, none run while the model
+circuit breaker is not closed, and they never count against the breaker.
+"""
+
+import hashlib
+import logging
+import threading
+
+from fastapi import BackgroundTasks
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from ...config import get_settings
+from ...models.incident import Incident, IncidentPredictionCache, IncidentStatus
+from .. import metrics
+from ..ml import CircuitBreaker, PredictionResult, breaker, classifier, predict_all
+from .similarity import decode_vector, encode_vector
+
+logger = logging.getLogger(__name__)
+
+_inflight = threading.BoundedSemaphore(max(1, get_settings().speculative_prediction_max_inflight))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def schedule_draft_prediction(background_tasks: BackgroundTasks, engine: Engine, incident: Incident) -> None:
+    """Queue a background prediction of the draft's current chronology."""
+    if not get_settings().speculative_prediction_enabled or not incident.free_text_description:
+        return
+    background_tasks.add_task(precompute_draft_prediction, engine, incident.id, text_hash(incident.free_text_description))
+
+
+def precompute_draft_prediction(engine: Engine, incident_id: int, expected_hash: str) -> str:
+    """Predict and cache one draft; returns the outcome recorded in the metrics."""
+    outcome = _precompute(engine, incident_id, expected_hash)
+    metrics.SPECULATIVE_PRECOMPUTE_TOTAL.labels(outcome=outcome).inc()
+    return outcome
+
+
+def _precompute(engine: Engine, incident_id: int, expected_hash: str) -> str:
+    if breaker.state != CircuitBreaker.CLOSED or not _inflight.acquire(blocking=False):
+        return "busy"
+    try:
+        with Session(engine) as session:
+            incident = session.get(Incident, incident_id)
+            # A later edit queued its own task; only the latest text is worth predicting.
+            if incident is None or incident.status != IncidentStatus.DRAFT:
+                return "superseded"
+            if text_hash(incident.free_text_description) != expected_hash:
+                return "superseded"
+            cached = session.get(IncidentPredictionCache, incident_id)
+            if cached is not None and cached.text_hash == expected_hash and cached.model_version == classifier.model_version:
+                return "current"
+
+            result = predict_all([incident.free_text_description])[0]
+            if result.fallback_reason is not None:
+                return "fallback"
+            if cached is None:
+                cached = IncidentPredictionCache(incident_id=incident_id)
+            cached.text_hash = expected_hash
+            cached.model_version = result.model_version
+            cached.predicted_category = result.category
+            cached.predicted_confidence = result.confidence
+            cached.predicted_probabilities = result.probabilities
+            cached.skp_code = result.skp_code
+            cached.mdp_code = result.mdp_code
+            cached.embedding = encode_vector(result.embedding) if result.embedding is not None else None
+            cached.touch()
+            session.add(cached)
+            session.commit()
+            return "stored"
+    except Exception as exc:  # pragma: no cover - best effort, submit predicts anyway
+        logger.exception("Speculative prediction for incident %s failed", incident_id, exc_info=exc)
+        return "error"
+    finally:
+        _inflight.release()
+
+
+def take_cached_prediction(session: Session, incident: Incident) -> PredictionResult | None:
+    """Return the cached prediction if it matches the current text and model, and drop the row."""
+    cached = session.get(IncidentPredictionCache, incident.id)
+    if cached is None:
+        outcome = "miss"
+    elif cached.text_hash != text_hash(incident.free_text_description):
+        outcome = "stale_text"
+    elif cached.model_version != classifier.model_version:
+        outcome = "stale_model"
+    else:
+        outcome = "hit"
+    metrics.SPECULATIVE_LOOKUP_TOTAL.labels(outcome=outcome).inc()
+    if cached is None:
+        return None
+    session.delete(cached)
+    if outcome != "hit":
+        return None
+    return PredictionResult(
+        category=cached.predicted_category,
+        confidence=cached.predicted_confidence,
+        probabilities=cached.predicted_probabilities,
+        model_version=cached.model_version,
+        skp_code=cached.skp_code,
+        mdp_code=cached.mdp_code,
+        embedding=decode_vector(cached.embedding) if cached.embedding is not None else None,
+    )
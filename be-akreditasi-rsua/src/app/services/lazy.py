@@ -0,0 +1,27 @@
+"""Deferred imports for the heavy ML stack.
+
+``numpy``, ``joblib``, LightGBM/scikit-learn and the MiniLM backends cost well
+over a second to import. Modules on the API import path bind them through
+:class:`LazyModule` so the import happens on first use (first prediction or the
+explicit warm-up), not when ``src.app.main`` is imported.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Any
+
+
+class LazyModule(ModuleType):
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self._lazy_loaded = False
+
+    def __getattr__(self, attr: str) -> Any:
+        module = importlib.import_module(self.__name__)
+        if not self._lazy_loaded:
+            # Copy the real namespace in so later lookups skip __getattr__ entirely.
+            self.__dict__.update({key: value for key, value in vars(module).items() if not key.startswith("__")})
+            self._lazy_loaded = True
+        return getattr(module, attr)
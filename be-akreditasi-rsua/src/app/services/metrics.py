@@ -0,0 +1,88 @@
+"""Prometheus metrics for the prediction path, exposed on ``GET /metrics``.
+
+Stage latencies come from ``PredictionResult.timings`` and are recorded in the API
+process once per model batch, so inference running in ``ml.executor`` worker
+processes is still counted. Under gunicorn set ``PROMETHEUS_MULTIPROC_DIR`` to an
+empty directory so every worker's samples are aggregated into one scrape.
+"""
+
+import os
+from typing import Iterable, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+ML_STAGE_SECONDS = Histogram(
+    "rsua_ml_stage_seconds",
+    "Latency of one prediction batch per pipeline stage.",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+ML_FALLBACK_TOTAL = Counter(
+    "rsua_ml_fallback_total",
+    "Predictions answered by the keyword fallback instead of the model.",
+    ["reason"],
+)
+ML_BATCH_SIZE = Histogram(
+    "rsua_ml_batch_size",
+    "Number of texts per model batch.",
+    buckets=BATCH_SIZE_BUCKETS,
+)
+GRADING_QUERY_SECONDS = Histogram(
+    "rsua_grading_query_seconds",
+    "Latency of the monthly frequency query used for risk grading.",
+    buckets=LATENCY_BUCKETS,
+)
+ML_BREAKER_STATE = Gauge(
+    "rsua_ml_breaker_state",
+    "Model circuit breaker state (0 closed, 1 open, 2 half-open).",
+    multiprocess_mode="max",
+)
+ML_BREAKER_TRIPS_TOTAL = Counter(
+    "rsua_ml_breaker_trips_total",
+    "Times the model circuit breaker opened.",
+)
+SPECULATIVE_LOOKUP_TOTAL = Counter(
+    "rsua_speculative_prediction_total",
+    "Submit-time lookups of the draft prediction cache (hit, miss, stale_text, stale_model).",
+    ["outcome"],
+)
+SPECULATIVE_PRECOMPUTE_TOTAL = Counter(
+    "rsua_speculative_precompute_total",
+    "Background draft predictions by outcome (stored, current, superseded, fallback, busy, error).",
+    ["outcome"],
+)
+
+DASHBOARD_CACHE_TOTAL = Counter(
+    "rsua_dashboard_cache_total",
+    "Dashboard cache lookups by endpoint and outcome (hit, miss, coalesced).",
+    ["endpoint", "outcome"],
+)
+DASHBOARD_CACHE_INVALIDATIONS_TOTAL = Counter(
+    "rsua_dashboard_cache_invalidations_total",
+    "Committed incident writes that dropped the cached dashboards.",
+)
+
+
+def observe_prediction_batch(results: Iterable) -> None:
+    """Record batch size, stage timings and fallback reasons for one model batch."""
+    results = list(results)
+    if not results:
+        return
+    ML_BATCH_SIZE.observe(len(results))
+    for stage, seconds in results[0].timings.items():
+        ML_STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    for result in results:
+        if result.fallback_reason:
+            ML_FALLBACK_TOTAL.labels(reason=result.fallback_reason).inc()
+
+
+def render_latest() -> Tuple[bytes, str]:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
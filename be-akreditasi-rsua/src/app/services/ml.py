@@ -1,25 +1,45 @@
 from __future__ import annotations
 
+import hashlib
+import itertools
+import json
 import logging
+import multiprocessing
+import os
+import queue
 import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
-
-import joblib
-import numpy as np
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
 
 try:
-    from sentence_transformers import SentenceTransformer
-except Exception:  # pragma: no cover - optional dependency for fallback
-    SentenceTransformer = None
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX hosts
+    fcntl = None
 
 from ..config import get_settings
-from ..models.incident import IncidentCategory
+from ..models.incident import IncidentCategory, MDPCode, SKPCode
+from . import metrics
+from .lazy import LazyModule
+
+# Imported on first use; see services/lazy.py. sentence_transformers (torch),
+# onnxruntime/tokenizers and joblib (plus LightGBM/sklearn via unpickling) are
+# imported inside the functions that need them.
+np = LazyModule("numpy")
 
 logger = logging.getLogger(__name__)
 
 # Model exported from modeling notebook: LightGBM classifier fed with MiniLM sentence embeddings.
 MINILM_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+MINILM_MAX_SEQ_LENGTH = 128
+# File names written by scripts/export_onnx_embedder.py.
+ONNX_MODEL_FILE = "model.int8.onnx"
+ONNX_TOKENIZER_FILE = "tokenizer.json"
 # Reconstructed label encoder classes (LabelEncoder sorts alphabetically).
 LABEL_ENCODER_CLASSES: List[str] = [
     "KNC - Kejadian Nyaris Cedera",
@@ -51,55 +71,464 @@ MED_ABBREVIATIONS = {
 }
 
 
+def _load_artifact(path: Path) -> Any:
+    """``joblib.load`` that memory-maps numpy arrays when ``ML_MMAP_ARTIFACTS`` is on.
+
+    Memory-mapped arrays are backed by the page cache and shared by every worker
+    instead of being copied into each process.
+    """
+    mmap_mode = "r" if get_settings().ml_mmap_artifacts else None
+    import joblib
+
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def preprocess_for_bert(text: str) -> str:
+    """Preprocessing pipeline used during training for MiniLM embeddings."""
+    if not isinstance(text, str):
+        return ""
+    text = text.lower()
+    text = text.replace("<.>", ".")
+    text = re.sub(r"<\s*[a-zA-Z0-9]+\s*>", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+
+    words = text.split()
+    words = [MED_ABBREVIATIONS.get(w, w) for w in words]
+    text = " ".join(words)
+
+    text = re.sub(r"([.,!?])", r" \1 ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class _DiskEmbeddingStore:
+    """Memory-mapped ring buffer of embeddings that survives restarts.
+
+    ``vectors.f32`` is a ``(capacity, dim)`` float32 matrix and ``index.bin`` holds the
+    sha1 digest of the key stored in each row. ``meta.json`` records the shape and the
+    next slot to overwrite, so once the store is full the oldest rows are evicted first.
+    """
+
+    DIGEST_SIZE = 20
+
+    def __init__(self, directory: Path, capacity: int) -> None:
+        self.directory = directory
+        self.capacity = max(1, int(capacity))
+        self.dim: int | None = None
+        self.cursor = 0
+        self.vectors: np.memmap | None = None
+        self.index: np.memmap | None = None
+        self.slots: Dict[bytes, int] = {}
+        self.evictions = 0
+        self._open_existing()
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.directory / "meta.json"
+
+    def _open_existing(self) -> None:
+        if not self._meta_path.exists():
+            return
+        try:
+            meta = json.loads(self._meta_path.read_text())
+            if int(meta["capacity"]) != self.capacity:
+                logger.warning("Embedding cache capacity changed; discarding %s", self.directory)
+                return
+            self._map(int(meta["dim"]), mode="r+")
+            self.cursor = int(meta.get("cursor", 0)) % self.capacity
+            empty = bytes(self.DIGEST_SIZE)
+            for slot in range(self.capacity):
+                digest = bytes(self.index[slot])
+                if digest != empty:
+                    self.slots[digest] = slot
+        except Exception as exc:  # pragma: no cover - corrupt cache is rebuilt
+            logger.exception("Failed to open embedding cache %s; starting empty", self.directory, exc_info=exc)
+            self.vectors = self.index = None
+            self.dim = None
+            self.slots.clear()
+
+    def _map(self, dim: int, mode: str) -> None:
+        self.dim = dim
+        self.vectors = np.memmap(self.directory / "vectors.f32", dtype=np.float32, mode=mode, shape=(self.capacity, dim))
+        self.index = np.memmap(self.directory / "index.bin", dtype=np.uint8, mode=mode, shape=(self.capacity, self.DIGEST_SIZE))
+
+    def _write_meta(self) -> None:
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"capacity": self.capacity, "dim": self.dim, "cursor": self.cursor}))
+        os.replace(tmp_path, self._meta_path)
+
+    def get(self, digest: bytes) -> np.ndarray | None:
+        slot = self.slots.get(digest)
+        if slot is None or self.vectors is None:
+            return None
+        # Another worker may have recycled the slot since we indexed it.
+        if bytes(self.index[slot]) != digest:
+            self.slots.pop(digest, None)
+            return None
+        return np.array(self.vectors[slot], dtype=np.float32)
+
+    def put_many(self, digests: Sequence[bytes], vectors: np.ndarray) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / ".lock", "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            dim = int(vectors.shape[1])
+            if self.vectors is None:
+                # Another worker may have created the ring since we looked; "w+" would truncate it.
+                self._open_existing()
+            if self.vectors is not None and self.dim != dim:
+                logger.warning("Embedding cache dim changed (%s -> %s); discarding %s", self.dim, dim, self.directory)
+                self.vectors = self.index = None
+                self.slots.clear()
+            if self.vectors is None:
+                self._map(dim, mode="w+")
+            if self._meta_path.exists():
+                self.cursor = int(json.loads(self._meta_path.read_text()).get("cursor", self.cursor)) % self.capacity
+            for digest, vector in zip(digests, vectors):
+                if digest in self.slots:
+                    continue
+                slot = self.cursor
+                previous = bytes(self.index[slot])
+                if previous != bytes(self.DIGEST_SIZE):
+                    self.slots.pop(previous, None)
+                    self.evictions += 1
+                self.vectors[slot] = vector
+                self.index[slot] = np.frombuffer(digest, dtype=np.uint8)
+                self.slots[digest] = slot
+                self.cursor = (slot + 1) % self.capacity
+            self.vectors.flush()
+            self.index.flush()
+            self._write_meta()
+
+
+class EmbeddingCache:
+    """Two-tier cache of sentence embeddings keyed by preprocessed text.
+
+    Keys are a sha1 of the embedder model name plus the text, so switching models
+    never serves stale vectors. Lookups go to an in-process LRU first and then to
+    the optional on-disk store in ``directory``.
+    """
+
+    def __init__(self, model_name: str, memory_size: int = 2048, directory: str | None = None, disk_size: int = 50000) -> None:
+        self.model_name = model_name
+        self.memory_size = max(0, int(memory_size))
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._directory = directory
+        self._disk_size = disk_size
+        self._disk_store: _DiskEmbeddingStore | None = None
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+
+    @property
+    def _disk(self) -> _DiskEmbeddingStore | None:
+        # Opened on first lookup so constructing the cache does not touch numpy or the disk.
+        if self._disk_store is None and self._directory:
+            self._disk_store = _DiskEmbeddingStore(Path(self._directory), self._disk_size)
+        return self._disk_store
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha1(f"{self.model_name}\0{text}".encode("utf-8")).digest()
+
+    def _remember(self, digest: bytes, vector: np.ndarray) -> None:
+        if self.memory_size == 0:
+            return
+        self._memory[digest] = vector
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+            self.memory_evictions += 1
+
+    def get_many(self, texts: Sequence[str]) -> List[np.ndarray | None]:
+        found: List[np.ndarray | None] = []
+        with self._lock:
+            for text in texts:
+                digest = self.key(text)
+                vector = self._memory.get(digest)
+                if vector is not None:
+                    self._memory.move_to_end(digest)
+                    self.memory_hits += 1
+                elif self._disk is not None and (vector := self._disk.get(digest)) is not None:
+                    self._remember(digest, vector)
+                    self.disk_hits += 1
+                else:
+                    self.misses += 1
+                found.append(vector)
+        return found
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        digests = [self.key(text) for text in texts]
+        with self._lock:
+            for digest, vector in zip(digests, vectors):
+                self._remember(digest, np.asarray(vector, dtype=np.float32))
+            if self._disk is not None:
+                try:
+                    self._disk.put_many(digests, np.asarray(vectors, dtype=np.float32))
+                except Exception as exc:  # pragma: no cover - disk tier is best effort
+                    logger.exception("Failed to persist embeddings to %s", self._disk.directory, exc_info=exc)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "memory_evictions": self.memory_evictions,
+                "disk_entries": len(self._disk.slots) if self._disk is not None else 0,
+                "disk_evictions": self._disk.evictions if self._disk is not None else 0,
+            }
+
+
+class OnnxEmbedder:
+    """MiniLM sentence encoder running on ONNX Runtime with int8 weights.
+
+    Mirrors ``SentenceTransformer.encode`` for the subset we use: tokenize with
+    truncation to ``MINILM_MAX_SEQ_LENGTH``, run the exported transformer and
+    mean-pool token embeddings over the attention mask. Artifacts are produced by
+    ``scripts/export_onnx_embedder.py``.
+    """
+
+    def __init__(self, model_dir: str | Path, intra_op_threads: int = 0) -> None:
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise RuntimeError("onnxruntime and tokenizers are required for the ONNX embedder backend") from exc
+        model_dir = Path(model_dir)
+        self.tokenizer = Tokenizer.from_file(str(model_dir / ONNX_TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=MINILM_MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads > 0:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = onnxruntime.InferenceSession(
+            str(model_dir / ONNX_MODEL_FILE), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def encode(
+        self,
+        sentences: List[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **_: Any,
+    ) -> np.ndarray:
+        chunks: List[np.ndarray] = []
+        for start in range(0, len(sentences), max(1, batch_size)):
+            encodings = self.tokenizer.encode_batch(list(sentences[start : start + batch_size]))
+            input_ids = np.array([enc.ids for enc in encodings], dtype=np.int64)
+            attention_mask = np.array([enc.attention_mask for enc in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self.input_names:
+                feeds["token_type_ids"] = np.array([enc.type_ids for enc in encodings], dtype=np.int64)
+            token_embeddings = self.session.run(None, feeds)[0]
+            mask = attention_mask[..., None].astype(np.float32)
+            summed = (token_embeddings * mask).sum(axis=1)
+            chunks.append(summed / np.clip(mask.sum(axis=1), 1e-9, None))
+        if not chunks:
+            return np.zeros((0, 0), dtype=np.float32)
+        embeddings = np.vstack(chunks).astype(np.float32)
+        if normalize_embeddings:
+            # Same contract as SentenceTransformer.encode; the classifier is trained on raw means.
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+
+def _token_lengths(embedder: Any, texts: List[str]) -> List[int]:
+    """Token count per text (capped at the model's max length) used to bucket batches."""
+    tokenizer = getattr(embedder, "tokenizer", None)
+    if isinstance(embedder, OnnxEmbedder):
+        # OnnxEmbedder's tokenizer pads to the longest text; count the real tokens.
+        lengths = [sum(enc.attention_mask) for enc in tokenizer.encode_batch(texts)]
+    elif callable(tokenizer):
+        encoded = tokenizer(texts, add_special_tokens=True, truncation=True, max_length=MINILM_MAX_SEQ_LENGTH)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+    else:
+        # Rough WordPiece estimate: Indonesian words split into ~1.3 pieces, plus [CLS]/[SEP].
+        lengths = [len(text.split()) * 4 // 3 + 2 for text in texts]
+    return [min(max(1, length), MINILM_MAX_SEQ_LENGTH) for length in lengths]
+
+
+def length_buckets(lengths: List[int], max_tokens: int, max_batch_size: int) -> List[List[int]]:
+    """Group indices into batches of similar length whose padded size fits ``max_tokens``.
+
+    Indices are sorted by length, so each batch pads only to its own longest text;
+    a batch is closed once adding the next text would exceed ``max_tokens`` padded
+    tokens (batch size x longest length) or ``max_batch_size`` texts.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    longest = 0
+    for idx in sorted(range(len(lengths)), key=lengths.__getitem__):
+        length = lengths[idx]
+        if current and (max(longest, length) * (len(current) + 1) > max_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current, longest = [], 0
+        current.append(idx)
+        longest = max(longest, length)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def encode_bucketed(embedder: Any, processed: List[str], max_tokens: int, max_batch_size: int) -> np.ndarray:
+    """Encode preprocessed texts in length buckets; rows come back in input order."""
+    if not processed:
+        return np.zeros((0, 0), dtype=np.float32)
+    output: np.ndarray | None = None
+    for bucket in length_buckets(_token_lengths(embedder, processed), max_tokens, max_batch_size):
+        vectors = embedder.encode([processed[idx] for idx in bucket], batch_size=len(bucket), convert_to_numpy=True)
+        if output is None:
+            output = np.empty((len(processed), vectors.shape[1]), dtype=np.float32)
+        output[bucket] = vectors
+    return output
+
+
+def classify_embeddings(model: Any, embeddings: np.ndarray, num_threads: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray | None]:
+    """Class labels, their confidences and the full probability matrix for a batch.
+
+    A fitted LightGBM sklearn estimator is scored with one ``Booster.predict`` call:
+    ``LGBMClassifier.predict`` followed by ``predict_proba`` runs the ensemble twice
+    and re-validates the input each time, which dominates single-row latency.
+    ``num_threads`` > 0 caps LightGBM's OpenMP threads for that call. Other models go
+    through ``predict``/``predict_proba``; the probability matrix is ``None`` when the
+    model has no ``predict_proba``.
+    """
+    booster = getattr(model, "booster_", None) if type(model).__module__.startswith("lightgbm") else None
+    classes = getattr(model, "classes_", None)
+    if booster is not None and classes is not None:
+        kwargs = {"num_threads": num_threads} if num_threads > 0 else {}
+        probabilities = np.asarray(booster.predict(embeddings, **kwargs))
+        if probabilities.ndim == 1:  # binary objective returns P(class 1) only
+            probabilities = np.column_stack([1.0 - probabilities, probabilities])
+        columns = probabilities.argmax(axis=1)
+        rows = np.arange(len(columns))
+        return np.asarray(classes)[columns], probabilities[rows, columns], probabilities
+
+    labels = np.asarray(model.predict(embeddings))
+    proba_fn = getattr(model, "predict_proba", None)
+    if not callable(proba_fn):
+        return labels, np.ones(len(labels)), None
+    probabilities = np.asarray(proba_fn(embeddings))
+    return labels, probabilities[np.arange(len(labels)), labels.astype(int)], probabilities
+
+
+def load_embedder(backend: str, onnx_dir: str) -> Any:
+    """Instantiate the configured MiniLM backend (``torch`` or ``onnx``)."""
+    if backend == "onnx":
+        return OnnxEmbedder(onnx_dir)
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(MINILM_MODEL_NAME)
+
+
 class IncidentClassifier:
     def __init__(self) -> None:
         self.settings = get_settings()
-        self.model = None
-        self.model_version = self.settings.model_fallback_version
-        self.embedder: SentenceTransformer | None = None
+        self._model: Any = None
+        self._model_version = self.settings.model_fallback_version
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
+        self.load_seconds = 0.0
+        self.embedder: Any = None
+        self._embedder_unavailable = False
         self.label_decoder = {idx: label for idx, label in enumerate(LABEL_ENCODER_CLASSES)}
-        self._load_model()
+        self.category_lookup = {idx: self._label_to_category(label) for idx, label in self.label_decoder.items()}
+        # Quantized ONNX embeddings differ slightly from torch ones, so cache them separately.
+        self.embedding_cache = EmbeddingCache(
+            f"{MINILM_MODEL_NAME}:{self.settings.embedder_backend}",
+            memory_size=self.settings.embedding_cache_memory_size,
+            directory=self.settings.embedding_cache_dir or None,
+            disk_size=self.settings.embedding_cache_disk_size,
+        )
+
+    # The artifact (and with it LightGBM/sklearn) is loaded on first access of
+    # ``model``/``model_version``, not at import.
+    @property
+    def model(self) -> Any:
+        self._ensure_model()
+        return self._model
+
+    @model.setter
+    def model(self, value: Any) -> None:
+        self._model_loaded = True
+        self._model = value
+
+    @property
+    def model_version(self) -> str:
+        self._ensure_model()
+        return self._model_version
+
+    @model_version.setter
+    def model_version(self, value: str) -> None:
+        self._model_loaded = True
+        self._model_version = value
+
+    def _ensure_model(self) -> None:
+        if not self._model_loaded:
+            with self._model_lock:
+                if not self._model_loaded:
+                    self._load_model()
+                    self._model_loaded = True
 
     def _load_model(self) -> None:
         model_path = Path(self.settings.model_path)
         if model_path.exists():
             try:
-                self.model = joblib.load(model_path)
-                self.model_version = getattr(self.model, "version", model_path.stem)
+                start = time.perf_counter()
+                self._model = _load_artifact(model_path)
+                self.load_seconds = time.perf_counter() - start
+                self._model_version = getattr(self._model, "version", model_path.stem)
                 logger.info("Loaded ML model from %s", model_path)
             except Exception as exc:  # pragma: no cover - best effort
                 logger.exception("Failed to load model %s. Falling back to heuristic", exc_info=exc)
-                self.model = None
+                self._model = None
         else:
             logger.warning("Model file %s not found. Using fallback heuristic.", model_path)
 
     def _ensure_embedder(self) -> None:
         """Load the MiniLM encoder lazily to avoid start-up lag."""
-        if self.embedder is None:
-            if SentenceTransformer is None:
-                logger.warning("sentence_transformers not installed. Using fallback prediction.")
-                return
+        if self.embedder is None and not self._embedder_unavailable:
+            backend = self.settings.embedder_backend
             try:
-                self.embedder = SentenceTransformer(MINILM_MODEL_NAME)
+                self.embedder = load_embedder(backend, self.settings.onnx_embedder_dir)
+            except ImportError:
+                logger.warning("sentence_transformers not installed. Using fallback prediction.")
+                self._embedder_unavailable = True
             except Exception as exc:  # pragma: no cover - best effort
-                logger.exception("Failed to load sentence transformer %s", MINILM_MODEL_NAME, exc_info=exc)
+                logger.exception("Failed to load %s embedder for %s", backend, MINILM_MODEL_NAME, exc_info=exc)
                 self.embedder = None
 
-    def _preprocess_for_bert(self, text: str) -> str:
-        """Preprocessing pipeline used during training for MiniLM embeddings."""
-        if not isinstance(text, str):
-            return ""
-        text = text.lower()
-        text = text.replace("<.>", ".")
-        text = re.sub(r"<\s*[a-zA-Z0-9]+\s*>", " ", text)
-        text = re.sub(r"\s+", " ", text).strip()
+    def _encode(self, processed: List[str], use_cache: bool = True) -> np.ndarray:
+        """Embed preprocessed texts, serving repeats from the embedding cache.
 
-        words = text.split()
-        words = [MED_ABBREVIATIONS.get(w, w) for w in words]
-        text = " ".join(words)
+        Bulk callers pass ``use_cache=False`` so a full re-score neither reads nor
+        evicts the entries kept hot for interactive traffic.
+        """
+        if not use_cache:
+            return encode_bucketed(
+                self.embedder, processed, self.settings.ml_bulk_tokens_per_batch, self.settings.ml_bulk_max_batch_size
+            )
+        vectors = self.embedding_cache.get_many(processed)
+        missing = [row for row, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = encode_bucketed(
+                self.embedder,
+                [processed[row] for row in missing],
+                self.settings.ml_bulk_tokens_per_batch,
+                self.settings.ml_bulk_max_batch_size,
+            )
+            self.embedding_cache.put_many([processed[row] for row in missing], fresh)
+            for offset, row in enumerate(missing):
+                vectors[row] = fresh[offset]
+        return np.vstack(vectors).astype(np.float32, copy=False)
 
-        text = re.sub(r"([.,!?])", r" \1 ", text)
-        return re.sub(r"\s+", " ", text).strip()
+    def _preprocess_for_bert(self, text: str) -> str:
+        return preprocess_for_bert(text)
 
     def _label_to_category(self, label: Optional[str]) -> Optional[IncidentCategory]:
         if not label:
@@ -115,10 +544,10 @@ class IncidentClassifier:
         if normalized.startswith("KPC"):
             return IncidentCategory.KPCS
         if normalized.startswith("SENTINEL"):
-            return IncidentCategory.Sentinel
+            return IncidentCategory.SENTINEL
         return None
 
-    def _fallback_prediction(self, text: str) -> Dict[str, Any]:
+    def _fallback_prediction(self, text: str, reason: str, model_version: str | None = None) -> Dict[str, Any]:
         lower = text.lower()
         if "jatuh" in lower or "fall" in lower:
             category = IncidentCategory.KTD
@@ -132,121 +561,1019 @@ class IncidentClassifier:
         return {
             "category": category,
             "confidence": confidence,
-            "model_version": self.model_version,
+            "model_version": model_version or self.model_version,
+            "fallback_reason": reason,
         }
 
     def predict(self, text: str, metadata: Dict[str, Any] | None = None) -> Dict[str, Any]:
-        if self.model is None:
-            print("[ML] Model missing, using fallback", flush=True)
-            return self._fallback_prediction(text)
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Classify several texts with one MiniLM encode and one classifier call."""
+        return self.classify(texts, [self._preprocess_for_bert(text) for text in texts])
+
+    def classify(
+        self,
+        texts: List[str],
+        processed: List[str],
+        timings: Dict[str, float] | None = None,
+        model: Any = None,
+        model_version: str | None = None,
+        use_cache: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Classify already-preprocessed texts; stage durations are added to ``timings``.
+
+        ``model``/``model_version`` pin a registry snapshot so a hot swap cannot
+        change the model halfway through a batch; ``use_cache`` is passed to
+        :meth:`_encode`.
+        """
+        timings = timings if timings is not None else {}
+        if model is None:
+            model, model_version = self.model, self.model_version
+        if not texts:
+            return []
+        if model is None:
+            return [self._fallback_prediction(text, "model_missing", model_version) for text in texts]
 
-        print("[ML] Ensuring embedder", flush=True)
         self._ensure_embedder()
         if self.embedder is None:
-            print("[ML] Embedder failed to load, using fallback", flush=True)
-            return self._fallback_prediction(text)
-
-        print("[ML] Preprocessing text", flush=True)
-        processed = self._preprocess_for_bert(text)
-        print("[ML] Encoding with MiniLM", flush=True)
-        embeddings = self.embedder.encode([processed], convert_to_numpy=True).astype(np.float32)
-
-        print("[ML] Running classifier", flush=True)
-        class_idx = int(self.model.predict(embeddings)[0])
-        proba_fn = getattr(self.model, "predict_proba", None)
-        confidence = (
-            float(proba_fn(embeddings)[0][class_idx])
-            if callable(proba_fn)
-            else 1.0
+            return [self._fallback_prediction(text, "embedder_failed", model_version) for text in texts]
+
+        start = time.perf_counter()
+        embeddings = self._encode(processed, use_cache)
+        timings["encode"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        class_indices, confidences, probabilities = classify_embeddings(model, embeddings, self.settings.ml_booster_threads)
+        timings["classify"] = time.perf_counter() - start
+
+        # Column labels of the probability matrix, as category codes where known.
+        classes = getattr(model, "classes_", range(probabilities.shape[1]) if probabilities is not None else [])
+        columns = [getattr(self.category_lookup.get(int(label)), "value", str(label)) for label in classes]
+        results: List[Dict[str, Any]] = []
+        for row, text in enumerate(texts):
+            class_idx = int(class_indices[row])
+            confidence = float(confidences[row])
+            category = self.category_lookup.get(class_idx)
+            if category is None:
+                logger.warning("Unknown label for class index %s, using fallback", class_idx)
+                results.append(self._fallback_prediction(text, "unknown_label", model_version))
+                continue
+            results.append(
+                {
+                    "category": category,
+                    "confidence": confidence,
+                    "model_version": model_version,
+                    "embedding": embeddings[row],
+                    "probabilities": (
+                        {column: round(float(p), 6) for column, p in zip(columns, probabilities[row])}
+                        if probabilities is not None
+                        else None
+                    ),
+                }
+            )
+        return results
+
+
+@dataclass
+class PredictionResult:
+    """Category and SKP/MDP prediction for one incident text.
+
+    ``timings`` holds per-stage seconds (``preprocess``, ``encode``, ``classify``,
+    ``skp_mdp``, ``total``) for the batch the text was predicted in.
+    ``fallback_reason`` is set when the keyword fallback answered instead of the model;
+    ``embedding`` is the MiniLM vector and ``probabilities`` the full category
+    distribution when the model ran.
+    """
+
+    category: IncidentCategory
+    confidence: float
+    model_version: str
+    skp_code: Optional[SKPCode] = None
+    mdp_code: Optional[MDPCode] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    fallback_reason: Optional[str] = None
+    embedding: Optional[np.ndarray] = field(default=None, repr=False)
+    probabilities: Optional[Dict[str, float]] = None
+
+    def as_prediction(self) -> Dict[str, Any]:
+        return {"category": self.category, "confidence": self.confidence, "model_version": self.model_version}
+
+
+class InferenceBatcher:
+    """Merge concurrent predict calls into batched model invocations.
+
+    Callers block on their own future while a single background thread drains the
+    queue: it takes the first pending request, waits up to ``max_wait_ms`` for more
+    to arrive (or until ``max_batch_size`` is reached) and runs ``predict_batch``
+    once for the whole group. ``predict_batch`` may also return a future (e.g. from
+    :class:`InferenceExecutor`), in which case several batches can be in flight.
+    """
+
+    def __init__(
+        self,
+        predict_batch: Callable[[List[str]], List[Dict[str, Any]] | Future],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+    ) -> None:
+        self._predict_batch = predict_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: "queue.Queue[tuple[str, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def predict(self, text: str) -> Dict[str, Any]:
+        return self.submit(text).result()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="ml-inference-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[tuple[str, Future]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = [(text, future) for text, future in self._collect() if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                results = self._predict_batch([text for text, _ in batch])
+            except Exception as exc:  # pragma: no cover - surfaced to every caller
+                self._resolve(batch, None, exc)
+                continue
+            if isinstance(results, Future):
+                results.add_done_callback(
+                    lambda done, batch=batch: self._resolve(
+                        batch, None if done.exception() else done.result(), done.exception()
+                    )
+                )
+            else:
+                self._resolve(batch, results, None)
+
+    @staticmethod
+    def _resolve(
+        batch: List[tuple[str, Future]],
+        results: List[Dict[str, Any]] | None,
+        exc: BaseException | None,
+    ) -> None:
+        if exc is not None:
+            logger.error("Batched prediction failed for %s request(s): %s", len(batch), exc)
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        results = list(results or [])
+        if len(results) != len(batch):
+            logger.error("Batched prediction returned %s result(s) for %s request(s)", len(results), len(batch))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+        # A short result list must not leave callers blocked until their own timeouts.
+        for _, future in batch[len(results) :]:
+            future.set_exception(RuntimeError(f"Batched prediction returned {len(results)} result(s) for {len(batch)} request(s)"))
+
+
+# -------- Process pool executor --------
+
+
+def _init_inference_worker(model_path: str | None = None, skp_mdp_path: str | None = None) -> None:
+    """Load every artifact once when a pool worker starts.
+
+    After a hot reload the pool is rebuilt with the new artifact paths, which may
+    differ from the configured ones.
+    """
+    settings = get_settings()
+    if (model_path, skp_mdp_path) != (None, None) and (model_path, skp_mdp_path) != (
+        settings.model_path,
+        settings.skp_mdp_model_path,
+    ):
+        registry.activate(registry.load(model_path, skp_mdp_path), propagate=False)
+    classifier._ensure_embedder()
+    _load_skp_mdp_predictor()
+    logger.info("Inference worker %s ready (model_version=%s)", os.getpid(), classifier.model_version)
+
+
+def _worker_predict_all(texts: List[str], use_cache: bool = True) -> List[PredictionResult]:
+    return _predict_all_local(texts, use_cache)
+
+
+def _worker_predict_skp_mdp(texts: List[str]) -> List[Dict[str, Any]]:
+    return _predict_skp_mdp_local(texts)
+
+
+def _worker_ping() -> int:
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """Pool of long-lived worker processes that each hold warm models.
+
+    Inference runs outside the web process so MiniLM, LightGBM and the SKP/MDP
+    pipeline do not compete for the GIL with request handling. The pool is created
+    on first use and transparently rebuilt if a worker dies.
+    """
+
+    def __init__(self, workers: int, start_method: str = "spawn") -> None:
+        self.workers = max(1, int(workers))
+        self.start_method = start_method
+        self._executor: ProcessPoolExecutor | None = None
+        self._initargs: tuple[str | None, str | None] = (None, None)
+        self._lock = threading.Lock()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_inference_worker,
+            initargs=self._initargs,
         )
 
-        print(f"[ML] Decoding class index {class_idx}", flush=True)
-        label = self.label_decoder.get(class_idx)
-        category = self._label_to_category(label)
-        if category is None:
-            print("[ML] Unknown label, using fallback", flush=True)
-            return self._fallback_prediction(text)
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._new_pool()
+        return self._executor
 
-        print(f"[ML] Prediction complete: {category.value} (conf={confidence:.3f})", flush=True)
-        return {
-            "category": category,
-            "confidence": confidence,
-            "model_version": self.model_version,
-        }
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        try:
+            return self._pool().submit(fn, *args)
+        except BrokenProcessPool:
+            logger.warning("Inference pool broken; restarting %s worker(s)", self.workers)
+            with self._lock:
+                self._executor = None
+            return self._pool().submit(fn, *args)
+
+    def submit_batch(self, texts: List[str], use_cache: bool = True) -> Future:
+        return self._submit(_worker_predict_all, list(texts), use_cache)
+
+    def predict_skp_mdp(self, texts: List[str]) -> List[Dict[str, Any]]:
+        return self._submit(_worker_predict_skp_mdp, list(texts)).result()
+
+    def warm(self) -> List[int]:
+        """Start every worker and wait until each has loaded its models."""
+        return [future.result() for future in [self._submit(_worker_ping) for _ in range(self.workers)]]
+
+    def reload(self, model_path: str, skp_mdp_path: str) -> None:
+        """Start a warm pool on new artifacts, then retire the old one.
+
+        The old pool is shut down without cancelling, so batches already queued
+        on it still complete.
+        """
+        with self._lock:
+            self._initargs = (model_path, skp_mdp_path)
+            pool = self._new_pool()
+        for future in [pool.submit(_worker_ping) for _ in range(self.workers)]:
+            future.result()
+        with self._lock:
+            previous, self._executor = self._executor, pool
+        if previous is not None:
+            previous.shutdown(wait=False)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _build_executor(settings: Any) -> InferenceExecutor | None:
+    """The inference pool, unless disabled or in conflict with ``ml_preload_models``.
+
+    Preloading shares one copy of the weights across forked gunicorn workers; every
+    executor process would load its own copy on top, so preload wins.
+    """
+    if settings.ml_executor_workers <= 0:
+        return None
+    if settings.ml_preload_models:
+        logger.warning(
+            "ML_EXECUTOR_WORKERS=%s ignored: ML_PRELOAD_MODELS shares preloaded models across workers, "
+            "and each executor process would load its own copy",
+            settings.ml_executor_workers,
+        )
+        return None
+    return InferenceExecutor(settings.ml_executor_workers, settings.ml_executor_start_method)
 
 
 classifier = IncidentClassifier()
+executor: InferenceExecutor | None = _build_executor(classifier.settings)
+
+
+def _observe_future(future: Future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        metrics.observe_prediction_batch(future.result())
+
+
+def _dispatch_batch(texts: List[str], use_cache: bool = True) -> Future | List[PredictionResult]:
+    """Run one model batch locally or on the executor, recording its metrics."""
+    if executor is not None:
+        future = executor.submit_batch(texts, use_cache)
+        future.add_done_callback(_observe_future)
+        return future
+    results = _predict_all_local(texts, use_cache)
+    metrics.observe_prediction_batch(results)
+    return results
+
+
+batcher = InferenceBatcher(
+    _dispatch_batch,
+    max_batch_size=classifier.settings.ml_batch_max_size,
+    max_wait_ms=classifier.settings.ml_batch_max_wait_ms,
+)
+
+
+def predict_all(texts: List[str], use_cache: bool = True) -> List[PredictionResult]:
+    """Predict category and SKP/MDP for every text in one pass.
+
+    Single-text calls (one submit) go through the batcher so concurrent submits
+    share a model invocation; bulk callers already hold a batch and skip it.
+    Bulk callers (prediction jobs, reclassify) pass ``use_cache=False`` to leave
+    the interactive embedding cache alone.
+    """
+    if not texts:
+        return []
+    if len(texts) == 1 and use_cache and classifier.settings.ml_batch_enabled:
+        return [batcher.predict(texts[0])]
+    results = _dispatch_batch(texts, use_cache)
+    return results.result() if isinstance(results, Future) else results
+
+
+class CircuitBreaker:
+    """Stops calling the model after repeated timeouts or errors.
+
+    Closed: every call goes to the model and its outcome is recorded. Once at
+    least ``min_calls`` of the last ``window`` outcomes are in and the failure
+    ratio reaches ``failure_ratio`` the breaker opens and calls are refused. After
+    ``cooldown_seconds`` one probe call is let through (half-open); its success
+    closes the breaker, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    _GAUGE = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+    def __init__(self, window: int, min_calls: int, failure_ratio: float, cooldown_seconds: float) -> None:
+        self.min_calls = max(1, min_calls)
+        self.failure_ratio = failure_ratio
+        self.cooldown_seconds = cooldown_seconds
+        self.state = self.CLOSED
+        self.trips = 0
+        self._outcomes: deque[bool] = deque(maxlen=max(1, window))
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        metrics.ML_BREAKER_STATE.set(0)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        metrics.ML_BREAKER_STATE.set(self._GAUGE[state])
+
+    def _trip(self) -> None:
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.trips += 1
+        metrics.ML_BREAKER_TRIPS_TOTAL.inc()
+        self._set_state(self.OPEN)
+        logger.warning("Model circuit breaker opened (trip %s); using fallback for %.0fs", self.trips, self.cooldown_seconds)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self._set_state(self.HALF_OPEN)
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+                return True
+            return self.state == self.CLOSED
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self._set_state(self.CLOSED)
+                    logger.info("Model circuit breaker closed after a successful probe")
+                else:
+                    self._trip()
+                return
+            if self.state == self.OPEN:
+                return
+            self._outcomes.append(ok)
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+                self._trip()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "trips": self.trips}
+
+
+breaker = CircuitBreaker(
+    window=classifier.settings.ml_breaker_window,
+    min_calls=classifier.settings.ml_breaker_min_calls,
+    failure_ratio=classifier.settings.ml_breaker_failure_ratio,
+    cooldown_seconds=classifier.settings.ml_breaker_cooldown_seconds,
+)
+
+
+def _budget_fallback(text: str, reason: str) -> PredictionResult:
+    """Heuristic result tagged with the fallback version so reclassify re-scores it."""
+    metrics.ML_FALLBACK_TOTAL.labels(reason=reason).inc()
+    prediction = classifier._fallback_prediction(text, reason, classifier.settings.model_fallback_version)
+    return PredictionResult(
+        category=prediction["category"],
+        confidence=prediction["confidence"],
+        model_version=prediction["model_version"],
+        fallback_reason=reason,
+    )
+
+
+BUDGET_FALLBACK_REASONS = frozenset({"timeout", "circuit_open", "error"})
+
+# Runs unbatched in-process predictions so the submit thread can stop waiting at
+# the budget; a call that overruns keeps its pool thread until it finishes.
+_budget_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ml-budget")
+
+
+def _dispatch_unbatched(text: str) -> Future:
+    if executor is not None:
+        return _dispatch_batch([text])
+    return _budget_pool.submit(_dispatch_batch, [text])
+
+
+def predict_within_budget(text: str) -> PredictionResult:
+    """Predict one incident within ``ml_latency_budget_ms``, or fall back at once.
+
+    Used on the submit path. A timeout or error counts against the circuit
+    breaker; while it is open the model is not called at all. The budget holds on
+    every path (batcher, executor or the local budget pool); a batch that timed
+    out keeps running in the background and only its result is discarded.
+    """
+    if not breaker.allow():
+        return _budget_fallback(text, "circuit_open")
+    budget = classifier.settings.ml_latency_budget_ms / 1000.0
+    started = time.perf_counter()
+    try:
+        if classifier.settings.ml_batch_enabled:
+            result = batcher.submit(text).result(timeout=budget or None)
+        else:
+            result = _dispatch_unbatched(text).result(timeout=budget or None)[0]
+    except FutureTimeoutError:
+        breaker.record(False)
+        logger.warning("Prediction exceeded the %.0f ms budget; using fallback", budget * 1000)
+        return _budget_fallback(text, "timeout")
+    except Exception as exc:
+        breaker.record(False)
+        logger.exception("Prediction failed; using fallback", exc_info=exc)
+        return _budget_fallback(text, "error")
+    breaker.record(not budget or time.perf_counter() - started <= budget)
+    return result
 
 
 def predict_incident(text: str, metadata: Dict[str, Any] | None = None) -> Dict[str, Any]:
-    return classifier.predict(text, metadata)
+    return predict_within_budget(text).as_prediction()
+
+
+def embed_bulk(texts: Iterable[str], window: int | None = None, preprocess: bool = True) -> Iterator[np.ndarray]:
+    """Stream MiniLM embeddings for a large iterable of texts.
+
+    Texts are consumed ``window`` at a time (``ml_bulk_window``), encoded in
+    length buckets within ``ml_bulk_tokens_per_batch`` padded tokens, and yielded
+    as one ``(n, dim)`` float32 array per window in input order, so a 100k-row job
+    never holds more than one window. Bypasses the embedding cache, which is sized
+    for interactive traffic.
+    """
+    settings = classifier.settings
+    window = window or settings.ml_bulk_window
+    classifier._ensure_embedder()
+    if classifier.embedder is None:
+        raise RuntimeError("MiniLM embedder unavailable")
+    iterator = iter(texts)
+    while True:
+        chunk = list(itertools.islice(iterator, window))
+        if not chunk:
+            return
+        processed = [preprocess_for_bert(text) for text in chunk] if preprocess else chunk
+        yield encode_bucketed(
+            classifier.embedder, processed, settings.ml_bulk_tokens_per_batch, settings.ml_bulk_max_batch_size
+        )
+
+
+def _predict_all_local(texts: List[str], use_cache: bool = True) -> List[PredictionResult]:
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    processed = [preprocess_for_bert(text) for text in texts]
+    timings["preprocess"] = time.perf_counter() - started
+    model, model_version, skp_mdp = registry.snapshot()
+    categories = classifier.classify(texts, processed, timings, model=model, model_version=model_version, use_cache=use_cache)
+    stage_started = time.perf_counter()
+    codes = _predict_skp_mdp_local(texts, skp_mdp)
+    timings["skp_mdp"] = time.perf_counter() - stage_started
+    timings["total"] = time.perf_counter() - started
+    return [
+        PredictionResult(
+            category=prediction["category"],
+            confidence=prediction["confidence"],
+            model_version=prediction["model_version"],
+            skp_code=code["skp"],
+            mdp_code=code["mdp"],
+            timings=dict(timings),
+            fallback_reason=prediction.get("fallback_reason"),
+            embedding=prediction.get("embedding"),
+            probabilities=prediction.get("probabilities"),
+        )
+        for prediction, code in zip(categories, codes)
+    ]
 
 
 # -------- SKP/MDP predictor --------
 
-_skp_mdp_artifacts: Optional[dict] = None
 
+def _normalize_skp_mdp_label(label: Any, is_skp: bool) -> str | None:
+    if label is None:
+        return None
+    raw = str(label).strip().lower()
+    tokens = re.split(r"[:\s]+", raw)
+    digits = re.findall(r"\d+", raw)
+    if digits:
+        return digits[0]
+    for tok in tokens:
+        if is_skp and tok.startswith("skp"):
+            num = re.findall(r"\d+", tok)
+            return num[0] if num else tok.replace(" ", "")
+        if not is_skp and tok.startswith("mdp"):
+            num = re.findall(r"\d+", tok)
+            return num[0] if num else tok.replace(" ", "")
+    # fallback: strip spaces
+    return raw.replace(" ", "")
+
+
+def _label_to_code(label: Any, is_skp: bool) -> SKPCode | MDPCode | None:
+    normalized = _normalize_skp_mdp_label(label, is_skp)
+    if not normalized:
+        return None
+    prefix, enum = ("skp", SKPCode) if is_skp else ("mdp", MDPCode)
+    value = f"{prefix}{normalized}" if normalized.isdigit() else normalized
+    try:
+        return enum(value)
+    except ValueError:
+        return None
+
+
+class SkpMdpPredictor:
+    """SKP/MDP multi-output pipeline with label decoding tables built at load time.
+
+    Each target's LabelEncoder classes are mapped to ``SKPCode``/``MDPCode`` once,
+    so prediction is a pipeline call plus list indexing.
+    """
 
-def _load_skp_mdp_artifacts() -> Optional[dict]:
-    global _skp_mdp_artifacts
-    if _skp_mdp_artifacts is not None:
-        return _skp_mdp_artifacts
+    def __init__(self, artifacts: dict) -> None:
+        self.pipeline = artifacts["model_pipeline"]
+        encoders = artifacts["label_encoders"]
+        self.decoders: List[tuple[int, str, List[SKPCode | MDPCode | None]]] = []
+        seen: set[str] = set()
+        for position, column in enumerate(artifacts["target_columns"]):
+            lower = column.lower()
+            kind = "skp" if lower.startswith("skp") else "mdp" if "mdp" in lower else None
+            if kind is None or kind in seen:
+                continue
+            seen.add(kind)
+            table = [_label_to_code(label, kind == "skp") for label in encoders[column].classes_]
+            self.decoders.append((position, kind, table))
+
+    def predict(self, texts: List[str]) -> List[Dict[str, Any]]:
+        pred_indices = self.pipeline.predict([str(text) for text in texts])
+        results: List[Dict[str, Any]] = []
+        for row in pred_indices:
+            codes: Dict[str, Any] = {"skp": None, "mdp": None}
+            for position, kind, table in self.decoders:
+                idx = int(row[position])
+                codes[kind] = table[idx] if 0 <= idx < len(table) else None
+            results.append(codes)
+        return results
+
+
+_skp_mdp_predictor: Optional[SkpMdpPredictor] = None
+
+
+def _load_skp_mdp_predictor() -> Optional[SkpMdpPredictor]:
+    global _skp_mdp_predictor
+    if _skp_mdp_predictor is not None:
+        return _skp_mdp_predictor
     settings = get_settings()
     model_path = Path(settings.skp_mdp_model_path)
     if not model_path.exists():
         logger.warning("SKP/MDP model %s not found. Skipping SKP/MDP prediction.", model_path)
-        _skp_mdp_artifacts = None
         return None
     try:
         logger.info("Loading SKP/MDP model from %s", model_path)
-        _skp_mdp_artifacts = joblib.load(model_path)
+        _skp_mdp_predictor = SkpMdpPredictor(_load_artifact(model_path))
     except Exception as exc:  # pragma: no cover - best effort
         logger.exception("Failed to load SKP/MDP model %s", model_path, exc_info=exc)
-        _skp_mdp_artifacts = None
-    return _skp_mdp_artifacts
+        _skp_mdp_predictor = None
+    return _skp_mdp_predictor
+
+
+def predict_skp_mdp(text: str) -> Dict[str, Any]:
+    """SKP/MDP codes only (``{"skp": SKPCode | None, "mdp": MDPCode | None}``)."""
+    if executor is not None:
+        return executor.predict_skp_mdp([text])[0]
+    return _predict_skp_mdp_local([text])[0]
 
 
-def predict_skp_mdp(text: str) -> Dict[str, Optional[str]]:
-    artifacts = _load_skp_mdp_artifacts()
-    if artifacts is None:
-        return {"skp": None, "mdp": None}
+def _predict_skp_mdp_local(texts: List[str], predictor: Optional[SkpMdpPredictor] = None) -> List[Dict[str, Any]]:
+    empty = [{"skp": None, "mdp": None} for _ in texts]
+    predictor = predictor or _load_skp_mdp_predictor()
+    if predictor is None or not texts:
+        return empty
     try:
-        logger.info("[SKP/MDP] Predicting for text length=%s", len(text) if text else 0)
-        pipeline = artifacts["model_pipeline"]
-        encoders = artifacts["label_encoders"]
-        targets = artifacts["target_columns"]
-        pred_indices = pipeline.predict([str(text)])
-        logger.info("[SKP/MDP] Raw pred indices: %s", pred_indices)
-        result = {}
-        for i, col_name in enumerate(targets):
-            idx = pred_indices[0][i]
-            label = encoders[col_name].inverse_transform([idx])[0]
-            result[col_name] = label
-        def normalize(label: Any, is_skp: bool) -> str | None:
-            if label is None:
-                return None
-            raw = str(label).strip().lower()
-            tokens = re.split(r"[:\s]+", raw)
-            digits = re.findall(r"\d+", raw)
-            if digits:
-                return digits[0]
-            for tok in tokens:
-                if is_skp and tok.startswith("skp"):
-                    num = re.findall(r"\d+", tok)
-                    return num[0] if num else tok.replace(" ", "").replace("skp", "skp")
-                if not is_skp and tok.startswith("mdp"):
-                    num = re.findall(r"\d+", tok)
-                    return num[0] if num else tok.replace(" ", "").replace("mdp", "mdp")
-            # fallback: strip spaces
-            return raw.replace(" ", "")
-
-        skp_key = next((k for k in result.keys() if k.lower().startswith("skp")), None)
-        mdp_key = next((k for k in result.keys() if "mdp" in k.lower()), None)
+        return predictor.predict(texts)
+    except Exception as exc:  # pragma: no cover - best effort
+        logger.exception("Failed SKP/MDP prediction", exc_info=exc)
+        return empty
+
+
+# -------- Warm-up / readiness --------
+
+WARMUP_TEXT = "Pasien jatuh dari tempat tidur saat perawat memberikan obat."
+
 
+class ModelReadiness:
+    """Tracks whether this worker has finished loading and warming its models."""
+
+    def __init__(self) -> None:
+        self._ready = threading.Event()
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def mark_ready(self) -> None:
+        self._ready.set()
+
+    def snapshot(self) -> Dict[str, Any]:
         return {
-            "skp": normalize(result.get(skp_key), True) if skp_key else None,
-            "mdp": normalize(result.get(mdp_key), False) if mdp_key else None,
+            "ready": self.ready,
+            "timings": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            "errors": dict(self.errors),
         }
-    except Exception as exc:  # pragma: no cover - best effort
-        logger.exception("Failed SKP/MDP prediction", exc_info=exc)
-        return {"skp": None, "mdp": None}
+
+
+readiness = ModelReadiness()
+
+
+def _timed(step: str, fn: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    try:
+        return fn()
+    except Exception as exc:  # pragma: no cover - warm-up never blocks readiness
+        logger.exception("Model warm-up step %s failed", step, exc_info=exc)
+        readiness.errors[step] = str(exc)
+        return None
+    finally:
+        readiness.timings[step] = time.perf_counter() - start
+
+
+def load_models(preload: bool = False) -> None:
+    """Load every artifact without running inference.
+
+    With ``preload=True`` this runs in the gunicorn master before workers fork, so
+    the loaded weights stay in copy-on-write pages shared by all workers. The ONNX
+    embedder is skipped there because ONNX Runtime sessions own thread pools that
+    do not survive ``fork``; each worker loads it during warm-up instead.
+    """
+    if "classifier_load" not in readiness.timings:
+        _timed("classifier_load", classifier._ensure_model)
+    if executor is not None:
+        return
+    if "skp_mdp_load" not in readiness.timings:
+        _timed("skp_mdp_load", _load_skp_mdp_predictor)
+    if preload and classifier.settings.embedder_backend == "onnx":
+        return
+    if "embedder_load" not in readiness.timings:
+        _timed("embedder_load", classifier._ensure_embedder)
+
+
+def warm_up_models() -> Dict[str, Any]:
+    """Load every artifact and run one dummy inference through each model.
+
+    With an :class:`InferenceExecutor` the pool workers are started and warmed
+    instead of loading the embedder into the web process. Readiness is set even
+    if a step fails, since predictions then degrade to the fallback heuristic.
+    """
+    load_models()
+    if executor is not None:
+        _timed("executor_start", executor.warm)
+        _timed("classify_warmup", lambda: executor.submit_batch([WARMUP_TEXT]).result())
+        _timed("skp_mdp_warmup", lambda: executor.predict_skp_mdp([WARMUP_TEXT]))
+    else:
+        if classifier.embedder is not None:
+            _timed("encode_warmup", lambda: classifier.embedder.encode([preprocess_for_bert(WARMUP_TEXT)], convert_to_numpy=True))
+        _timed("classify_warmup", lambda: classifier.predict_batch([WARMUP_TEXT]))
+        _timed("skp_mdp_warmup", lambda: _predict_skp_mdp_local([WARMUP_TEXT]))
+    readiness.mark_ready()
+    logger.info("Model warm-up finished: %s", readiness.snapshot())
+    return readiness.snapshot()
+
+
+# -------- Model registry / hot reload --------
+
+SMOKE_CORPUS = [
+    WARMUP_TEXT,
+    "Perawat salah memberikan obat kepada pasien di bangsal.",
+    "Gelang identitas pasien tertukar saat akan dilakukan tindakan.",
+    "Pasien terpeleset di kamar mandi namun tidak terjadi cedera.",
+]
+
+
+class ModelValidationError(RuntimeError):
+    pass
+
+
+def _artifact_fingerprint(*paths: str) -> str:
+    digest = hashlib.sha1()
+    for raw in paths:
+        path = Path(raw)
+        stat = path.stat() if path.exists() else None
+        digest.update(f"{path}:{stat.st_size if stat else -1}:{stat.st_mtime_ns if stat else -1};".encode())
+    return digest.hexdigest()[:12]
+
+
+@dataclass
+class ModelBundle:
+    """One generation of the incident classifier and SKP/MDP artifacts."""
+
+    version: str
+    model: Any
+    skp_mdp: Optional[SkpMdpPredictor]
+    model_path: str
+    skp_mdp_path: str
+    fingerprint: str
+    loaded_at: float = field(default_factory=time.time)
+    load_seconds: float = 0.0
+
+    @property
+    def bundle_id(self) -> str:
+        return f"{self.version}@{self.fingerprint}"
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "bundle_id": self.bundle_id,
+            "version": self.version,
+            "model_path": self.model_path,
+            "skp_mdp_path": self.skp_mdp_path,
+            "skp_mdp_loaded": self.skp_mdp is not None,
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.loaded_at)),
+            "load_seconds": round(self.load_seconds, 4),
+        }
+
+
+class ModelRegistry:
+    """Versioned, hot-swappable model artifacts with rollback.
+
+    New artifacts are loaded and validated against :data:`SMOKE_CORPUS` off the
+    request path, then swapped in under a lock that prediction batches take once
+    to snapshot their models, so in-flight batches finish on the generation they
+    started with. The last ``keep`` generations stay in memory for instant rollback.
+
+    The registry lives in each process. An admin reload or rollback is published to
+    ``marker_path``, which the watcher of every other web worker and the prediction
+    worker follows, so all processes converge on the same generation.
+    """
+
+    def __init__(self, keep: int, marker_path: str | None = None) -> None:
+        self._reload_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self.active: Optional[ModelBundle] = None
+        self.history: deque[ModelBundle] = deque(maxlen=max(0, keep))
+        self._watch_stop = threading.Event()
+        self._watch_thread: threading.Thread | None = None
+        # Fingerprint of the configured files as last seen on disk; the watcher
+        # reloads only when the files move away from it, not when the operator
+        # activates another generation.
+        self._disk_fingerprint: str | None = None
+        self.marker_path = Path(marker_path) if marker_path else None
+        self._marker_seen: str | None = None
+
+    def snapshot(self) -> tuple[Any, str, Optional[SkpMdpPredictor]]:
+        """Model, version and SKP/MDP predictor to use for one batch."""
+        _load_skp_mdp_predictor()
+        with self._swap_lock:
+            return classifier.model, classifier.model_version, _skp_mdp_predictor
+
+    def current(self) -> ModelBundle:
+        """The active bundle; adopts the configured artifacts on first use."""
+        with self._swap_lock:
+            if self.active is None:
+                settings = classifier.settings
+                self.active = ModelBundle(
+                    version=classifier.model_version,
+                    model=classifier.model,
+                    skp_mdp=_skp_mdp_predictor,
+                    model_path=settings.model_path,
+                    skp_mdp_path=settings.skp_mdp_model_path,
+                    fingerprint=_artifact_fingerprint(settings.model_path, settings.skp_mdp_model_path),
+                    load_seconds=classifier.load_seconds,
+                )
+            return self.active
+
+    def load(self, model_path: str, skp_mdp_path: str) -> ModelBundle:
+        started = time.perf_counter()
+        path = Path(model_path)
+        if not path.exists():
+            raise FileNotFoundError(f"Model artifact {path} not found")
+        model = _load_artifact(path)
+        skp_path = Path(skp_mdp_path)
+        skp_mdp = SkpMdpPredictor(_load_artifact(skp_path)) if skp_path.exists() else None
+        return ModelBundle(
+            version=getattr(model, "version", path.stem),
+            model=model,
+            skp_mdp=skp_mdp,
+            model_path=str(model_path),
+            skp_mdp_path=str(skp_mdp_path),
+            fingerprint=_artifact_fingerprint(model_path, skp_mdp_path),
+            load_seconds=time.perf_counter() - started,
+        )
+
+    def validate(self, bundle: ModelBundle) -> None:
+        """Run the smoke corpus through the bundle; raises ModelValidationError."""
+        if classifier.embedder is not None:
+            features = classifier._encode([preprocess_for_bert(text) for text in SMOKE_CORPUS])
+        else:
+            # No embedder in this process (e.g. inference runs in executor workers):
+            # still check that the classifier accepts MiniLM-shaped input.
+            width = int(getattr(bundle.model, "n_features_in_", 384))
+            features = np.zeros((len(SMOKE_CORPUS), width), dtype=np.float32)
+        try:
+            indices = bundle.model.predict(features)
+            proba_fn = getattr(bundle.model, "predict_proba", None)
+            probabilities = proba_fn(features) if callable(proba_fn) else None
+            codes = bundle.skp_mdp.predict(SMOKE_CORPUS) if bundle.skp_mdp is not None else None
+        except Exception as exc:
+            raise ModelValidationError(f"{bundle.bundle_id} failed on the smoke corpus: {exc}") from exc
+        if len(indices) != len(SMOKE_CORPUS):
+            raise ModelValidationError(f"{bundle.bundle_id} returned {len(indices)} predictions for {len(SMOKE_CORPUS)} texts")
+        unknown = sorted({int(idx) for idx in indices if classifier.category_lookup.get(int(idx)) is None})
+        if unknown:
+            raise ModelValidationError(f"{bundle.bundle_id} predicted unknown class indices {unknown}")
+        if probabilities is not None and not np.allclose(np.asarray(probabilities).sum(axis=1), 1.0, atol=1e-3):
+            raise ModelValidationError(f"{bundle.bundle_id} returned probabilities that do not sum to 1")
+        if codes is not None and len(codes) != len(SMOKE_CORPUS):
+            raise ModelValidationError(f"{bundle.bundle_id} SKP/MDP pipeline returned {len(codes)} rows")
+
+    def activate(self, bundle: ModelBundle, propagate: bool = True) -> ModelBundle:
+        global _skp_mdp_predictor
+        previous = self.current()
+        if propagate and executor is not None:
+            executor.reload(bundle.model_path, bundle.skp_mdp_path)
+        with self._swap_lock:
+            classifier.model = bundle.model
+            classifier.model_version = bundle.version
+            classifier.load_seconds = bundle.load_seconds
+            _skp_mdp_predictor = bundle.skp_mdp
+            self.active = bundle
+        if previous is not bundle:
+            for kept in [kept for kept in self.history if kept.bundle_id == previous.bundle_id]:
+                self.history.remove(kept)
+            self.history.appendleft(previous)
+        logger.info("Activated model %s (previous %s)", bundle.bundle_id, previous.bundle_id)
+        return bundle
+
+    def reload(self, model_path: str | None = None, skp_mdp_path: str | None = None) -> ModelBundle:
+        """Load, validate and activate artifacts (defaults: the configured paths)."""
+        settings = classifier.settings
+        with self._reload_lock:
+            bundle = self.load(model_path or settings.model_path, skp_mdp_path or settings.skp_mdp_model_path)
+            self.validate(bundle)
+            self._disk_fingerprint = self._configured_fingerprint()
+            return self.activate(bundle)
+
+    def rollback(self, bundle_id: str | None = None) -> ModelBundle:
+        """Re-activate a kept generation (the previous one by default)."""
+        with self._reload_lock:
+            candidates = [bundle for bundle in self.history if bundle_id in (None, bundle.bundle_id, bundle.version)]
+            if not candidates:
+                raise LookupError(bundle_id or "no previous model generation kept")
+            target = candidates[0]
+            self.history.remove(target)
+            self._disk_fingerprint = self._configured_fingerprint()
+            return self.activate(target)
+
+    def _configured_fingerprint(self) -> str:
+        settings = classifier.settings
+        return _artifact_fingerprint(settings.model_path, settings.skp_mdp_model_path)
+
+    def publish(self, bundle: ModelBundle) -> None:
+        """Record ``bundle`` in the marker file for the other processes to follow."""
+        if self.marker_path is None:
+            return
+        raw = json.dumps(
+            {
+                "bundle_id": bundle.bundle_id,
+                "model_path": bundle.model_path,
+                "skp_mdp_path": bundle.skp_mdp_path,
+                "published_at": time.time(),
+            }
+        )
+        self.marker_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.marker_path.with_name(f"{self.marker_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(raw)
+        os.replace(tmp_path, self.marker_path)
+        self._marker_seen = raw
+
+    def follow_marker(self) -> None:
+        """Activate the generation another process published, if not active here."""
+        if self.marker_path is None:
+            return
+        try:
+            raw = self.marker_path.read_text()
+        except FileNotFoundError:
+            return
+        if raw == self._marker_seen:
+            return
+        self._marker_seen = raw
+        try:
+            published = json.loads(raw)
+            if published["bundle_id"] == self.current().bundle_id:
+                return
+            if any(bundle.bundle_id == published["bundle_id"] for bundle in self.history):
+                self.rollback(published["bundle_id"])
+            else:
+                self.reload(published["model_path"], published["skp_mdp_path"])
+        except Exception as exc:  # pragma: no cover - keep serving the active model
+            logger.exception("Could not follow published model %s; keeping %s", raw, self.current().bundle_id, exc_info=exc)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "active": self.current().describe(),
+            "history": [bundle.describe() for bundle in self.history],
+            "watching": self._watch_thread is not None and self._watch_thread.is_alive(),
+        }
+
+    def start_watching(self, interval: float) -> None:
+        """Follow the published generation and hot-reload changed artifact files.
+
+        A change is applied only after the fingerprint is stable for two polls,
+        so a copy still in progress is not loaded. A manual reload or rollback
+        records the files as seen, so the watcher does not undo it until the
+        files change again.
+        """
+        if interval <= 0 or (self._watch_thread is not None and self._watch_thread.is_alive()):
+            return
+        if self._disk_fingerprint is None:
+            self._disk_fingerprint = self.current().fingerprint
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=self._watch, args=(interval,), name="ml-model-watcher", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+
+    def _watch(self, interval: float) -> None:
+        settings = classifier.settings
+        pending: str | None = None
+        rejected: str | None = None
+        self.follow_marker()
+        while not self._watch_stop.wait(interval):
+            self.follow_marker()
+            fingerprint = self._configured_fingerprint()
+            if fingerprint in (self._disk_fingerprint, rejected):
+                pending = None
+                continue
+            if fingerprint != pending:
+                pending = fingerprint
+                continue
+            try:
+                self.reload()
+            except Exception as exc:  # pragma: no cover - keep serving the active model
+                logger.exception("Hot reload of %s failed; keeping %s", settings.model_path, self.current().bundle_id, exc_info=exc)
+                rejected = fingerprint
+            pending = None
+
+
+registry = ModelRegistry(keep=classifier.settings.model_registry_keep, marker_path=classifier.settings.model_registry_marker_path)
@@ -11,6 +11,7 @@ from src.app.models.role import Role
 from src.app.models.department import Department
 from src.app.models.user import User
 from src.app.security.passwords import hash_password
+from src.app.services.incidents import dashboard_cache
 
 TEST_DB_URL = "sqlite:///:memory:"
 
@@ -78,6 +79,7 @@ def client_fixture(session):
         yield session
 
     app.dependency_overrides[get_session] = get_session_override
+    dashboard_cache.cache.clear()
     with TestClient(app) as client:
         yield client
     app.dependency_overrides.clear()
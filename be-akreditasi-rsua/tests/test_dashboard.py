@@ -0,0 +1,260 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlmodel import select
+
+from src.app.models.incident import Incident, IncidentCategory, IncidentDailyRollup
+from src.app.services.incidents import rollups, service
+
+
+def auth_headers(client: TestClient, email: str, password: str) -> dict[str, str]:
+    response = client.post("/v1/auth/login", json={"email": email, "password": password})
+    token = response.json()["data"]["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _rollup_counts(session) -> dict:
+    return {
+        (row.day, row.department_id, row.category, row.skp_code, row.mdp_code, row.grading): row.incident_count
+        for row in session.exec(select(IncidentDailyRollup)).all()
+        if row.incident_count
+    }
+
+
+def _report(session, reporter, department_id, occurred_at, harm="Tidak ada cedera", text="Pasien jatuh dari tempat tidur"):
+    incident = Incident(
+        reporter_id=reporter.id,
+        free_text_description=text,
+        department_id=department_id,
+        occurred_at=occurred_at,
+        harm_indicator=harm,
+    )
+    session.add(incident)
+    session.commit()
+    service.submit_incident(session, incident, reporter)
+    session.commit()
+    return incident
+
+
+def test_rollups_track_incidents_and_feed_dashboard(client: TestClient, session, perawat_user, mutu_user):
+    dept_a, dept_b = session._test_departments
+    first = _report(session, perawat_user, dept_a.id, datetime(2024, 1, 3, 9))
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 20, 9), harm="Cedera ringan")
+    _report(session, perawat_user, dept_b.id, datetime(2024, 2, 5, 9))
+    session.add(Incident(reporter_id=perawat_user.id, free_text_description="draft", department_id=dept_a.id))
+    session.commit()
+
+    service.update_category(session, first, mutu_user, IncidentCategory.SENTINEL)
+    session.commit()
+    service.close_incident(session, first, mutu_user)
+    session.commit()
+
+    incremental = _rollup_counts(session)
+    rollups.rebuild_rollups(session)
+    session.commit()
+    assert _rollup_counts(session) == incremental
+    assert sum(incremental.values()) == 3
+
+    headers = auth_headers(client, mutu_user.email, "Password123")
+    data = client.get("/v1/dashboard/mutu", params={"unit": dept_a.id}, headers=headers).json()["data"]
+    assert data["total_insiden"] == 2
+    assert data["jenis_kejadian"]["SENTINEL"] == 1
+    assert data["hospital_risk"] == "sedang"
+    assert {unit["name"] for unit in data["units_risk"]} == {dept_a.name, dept_b.name}
+
+    trend = client.get("/v1/dashboard/mutu/trend", params={"view": "monthly", "group": "total"}, headers=headers).json()["data"]
+    assert trend["periods"] == ["2024-01", "2024-02"]
+    assert trend["series"][0]["data"] == [2, 1]
+
+
+def test_mutu_dashboard_query_count_is_constant(client: TestClient, engine, session, perawat_user, mutu_user):
+    import re
+
+    from sqlalchemy import event
+
+    headers = auth_headers(client, mutu_user.email, "Password123")
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    def dashboard_statements(unit: str) -> list[str]:
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            assert client.get("/v1/dashboard/mutu", params={"unit": unit}, headers=headers).status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        return list(statements)
+
+    dept_a, dept_b = session._test_departments
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 3, 9))
+    few = dashboard_statements("all")
+    for day in range(1, 25):
+        _report(session, perawat_user, dept_b.id if day % 2 else dept_a.id, datetime(2024, 3, day, 9), harm="ringan")
+    many = dashboard_statements("all")
+
+    assert len(many) == len(few)
+    # The ETag watermark plus the two GROUP BYs.
+    assert sum("incident_daily_rollups" in statement for statement in many) == 3
+    assert not any(re.search(r"\b(FROM|JOIN)\s+incidents\b", statement) for statement in many)
+    # A named unit only adds the department lookup.
+    assert len(dashboard_statements(str(dept_a.id))) == len(many) + 1
+
+
+def test_period_key_sql_matches_python_labels(session):
+    from datetime import date, timedelta
+
+    from sqlalchemy import Date, literal
+
+    from src.app.services.incidents import aggregates
+
+    # ISO week/year boundaries and every quarter edge around a leap year.
+    days = [date(2020, 12, 31), date(2021, 1, 3), date(2021, 1, 4), date(2024, 12, 30), date(2026, 12, 31)]
+    days += [date(2024, 1, 1) + timedelta(days=offset) for offset in range(0, 370, 13)]
+    dialect = session.get_bind().dialect.name
+    for view in aggregates.PERIOD_VIEWS:
+        expressions = [aggregates.period_key_sql(literal(day, Date), view, dialect) for day in days]
+        labels = list(session.exec(select(*expressions)).one())
+        assert labels == [aggregates.period_key(day, view) for day in days], view
+
+
+def test_trend_is_bucketed_in_sql_and_gap_filled(client: TestClient, session, perawat_user, mutu_user):
+    dept_a, _ = session._test_departments
+    _report(session, perawat_user, dept_a.id, datetime(2023, 12, 30, 9))
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 1, 9))
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 16, 9))
+    headers = auth_headers(client, mutu_user.email, "Password123")
+
+    weekly = client.get("/v1/dashboard/mutu/trend", params={"view": "weekly", "group": "total"}, headers=headers).json()["data"]
+    assert weekly["periods"] == ["2023-W52", "2024-W01", "2024-W02", "2024-W03"]
+    assert weekly["series"][0]["data"] == [1, 1, 0, 1]
+
+    quarterly = client.get("/v1/dashboard/mutu/trend", params={"view": "quarterly", "group": "grading"}, headers=headers).json()["data"]
+    assert quarterly["periods"] == ["2023-Q4", "2024-Q1"]
+    assert sum(sum(series["data"]) for series in quarterly["series"]) == 3
+
+
+def test_dashboard_cache_serves_hits_until_a_write_commits(client: TestClient, engine, session, perawat_user, mutu_user):
+    from sqlalchemy import event
+
+    dept_a, _ = session._test_departments
+    headers = auth_headers(client, mutu_user.email, "Password123")
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 3, 9))
+    assert client.get("/v1/dashboard/mutu", headers=headers).json()["data"]["total_insiden"] == 1
+
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get("/v1/dashboard/mutu", params={"unit": "ALL"}, headers=headers).json()["data"]["total_insiden"] == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    # Only the watermark read; the GROUP BYs are served from the cache.
+    assert sum("incident_daily_rollups" in statement for statement in statements) == 1
+
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 4, 9))
+    assert client.get("/v1/dashboard/mutu", headers=headers).json()["data"]["total_insiden"] == 2
+
+
+def test_dashboard_cache_coalesces_concurrent_misses():
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from src.app.services.incidents.dashboard_cache import DashboardCache
+
+    cache = DashboardCache(ttl_seconds=60)
+    release = threading.Event()
+    calls: list[int] = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"total_insiden": len(calls)}
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        futures = [pool.submit(cache.get_or_compute, "mutu", "all", compute) for _ in range(4)]
+        while len(cache._inflight) == 0 or sum(1 for f in futures if f.running()) < 4:
+            threading.Event().wait(0.01)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert cache.get_or_compute("mutu", "all", compute) is results[0]
+
+    cache.invalidate()
+    assert cache.get_or_compute("mutu", "all", compute) == {"total_insiden": 2}
+
+
+def test_dashboard_answers_304_until_the_watermark_moves(client: TestClient, session, perawat_user, mutu_user):
+    dept_a, _ = session._test_departments
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 3, 9))
+    headers = auth_headers(client, mutu_user.email, "Password123")
+
+    for path in ("/v1/dashboard/mutu", "/v1/dashboard/mutu/trend"):
+        first = client.get(path, headers=headers)
+        etag = first.headers["etag"]
+        again = client.get(path, headers={**headers, "If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["etag"] == etag
+        other_unit = client.get(path, params={"unit": dept_a.id}, headers={**headers, "If-None-Match": etag})
+        assert other_unit.status_code == 200
+
+    etag = client.get("/v1/dashboard/mutu", headers=headers).headers["etag"]
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 4, 9))
+    changed = client.get("/v1/dashboard/mutu", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["data"]["total_insiden"] == 2
+
+
+def test_dashboard_etag_ignores_writes_outside_its_scope(client: TestClient, session, perawat_user, mutu_user):
+    dept_a, dept_b = session._test_departments
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 3, 9))
+    headers = auth_headers(client, mutu_user.email, "Password123")
+    trend_params = {"unit": dept_a.id, "view": "monthly", "group": "total"}
+    window = {"from": "2024-01-01", "to": "2024-01-31"}
+    trend_etag = client.get("/v1/dashboard/mutu/trend", params=trend_params, headers=headers).headers["etag"]
+    mutu_etag = client.get("/v1/dashboard/mutu", params=window, headers=headers).headers["etag"]
+
+    _report(session, perawat_user, dept_b.id, datetime(2024, 3, 5, 9))  # other unit, outside the window
+    assert client.get("/v1/dashboard/mutu/trend", params=trend_params, headers={**headers, "If-None-Match": trend_etag}).status_code == 304
+    assert client.get("/v1/dashboard/mutu", params=window, headers={**headers, "If-None-Match": mutu_etag}).status_code == 304
+
+    _report(session, perawat_user, dept_a.id, datetime(2024, 1, 20, 9))
+    assert client.get("/v1/dashboard/mutu/trend", params=trend_params, headers={**headers, "If-None-Match": trend_etag}).status_code == 200
+    assert client.get("/v1/dashboard/mutu", params=window, headers={**headers, "If-None-Match": mutu_etag}).status_code == 200
+
+
+def test_dashboard_window_scopes_counts_and_gap_fills_trend(client: TestClient, session, perawat_user, mutu_user):
+    dept_a, dept_b = session._test_departments
+    _report(session, perawat_user, dept_a.id, datetime(2023, 11, 20, 9), harm="Cedera ringan")
+    _report(session, perawat_user, dept_a.id, datetime(2024, 2, 10, 9))
+    _report(session, perawat_user, dept_b.id, datetime(2024, 6, 1, 9))
+    headers = auth_headers(client, mutu_user.email, "Password123")
+    window = {"from": "2024-01-01", "to": "2024-04-30"}
+
+    data = client.get("/v1/dashboard/mutu", params=window, headers=headers).json()["data"]
+    assert (data["from"], data["to"]) == ("2024-01-01", "2024-04-30")
+    assert data["total_insiden"] == 1
+    assert [unit["name"] for unit in data["units_risk"]] == [dept_a.name]
+
+    trend = client.get(
+        "/v1/dashboard/mutu/trend", params={**window, "view": "monthly", "group": "total"}, headers=headers
+    ).json()["data"]
+    assert trend["periods"] == ["2024-01", "2024-02", "2024-03", "2024-04"]
+    assert trend["series"][0]["data"] == [0, 1, 0, 0]
+
+    quarter = client.get("/v1/dashboard/mutu/trend", params={"preset": "this_quarter", "view": "monthly"}, headers=headers)
+    assert quarter.status_code == 200
+    assert quarter.json()["data"]["from"].endswith("-01")
+
+    inverted = client.get("/v1/dashboard/mutu", params={"from": "2024-05-01", "to": "2024-01-01"}, headers=headers)
+    assert inverted.status_code == 400
+    both = client.get("/v1/dashboard/mutu", params={**window, "preset": "this_year"}, headers=headers)
+    assert both.status_code == 400
@@ -1,4 +1,5 @@
 from fastapi.testclient import TestClient
+from sqlmodel import select
 
 from src.app.models.incident import IncidentStatus
 
@@ -69,3 +70,407 @@ def test_cannot_edit_category_before_submit(client: TestClient, session, perawat
         headers=mutu_headers,
     )
     assert update_resp.status_code == 409
+
+
+def test_async_submit_defers_prediction_to_job(client: TestClient, session, perawat_user, monkeypatch):
+    from src.app.config import get_settings
+    from src.app.services.incidents.jobs import run_prediction_jobs
+
+    monkeypatch.setattr(get_settings(), "submit_prediction_mode", "async")
+    headers = auth_headers(client, perawat_user.email, "Password123")
+    incident_id = client.post(
+        "/v1/incidents",
+        json={"free_text_description": "Pasien jatuh saat ke kamar mandi"},
+        headers=headers,
+    ).json()["data"]["id"]
+
+    submit_resp = client.post(f"/v1/incidents/{incident_id}/submit", json={"confirm_submit": True}, headers=headers)
+    data = submit_resp.json()["data"]
+    assert data["status"] == IncidentStatus.SUBMITTED.value
+    assert data["prediction_pending"] is True
+    assert data["predicted_category"] is None
+
+    status = client.get(f"/v1/incidents/{incident_id}/prediction", headers=headers).json()["data"]
+    assert status["job"]["status"] == "PENDING"
+
+    assert run_prediction_jobs(session) == 1
+    status = client.get(f"/v1/incidents/{incident_id}/prediction", headers=headers).json()["data"]
+    assert status["prediction_pending"] is False
+    assert status["predicted_category"] is not None
+    assert status["job"]["status"] == "DONE"
+
+
+def test_failed_prediction_job_changes_the_incident_list_etag(client: TestClient, session, perawat_user, monkeypatch):
+    from src.app.config import get_settings
+    from src.app.models.incident import Incident, PredictionJob
+    from src.app.services.incidents import jobs
+
+    incident = Incident(
+        reporter_id=perawat_user.id,
+        free_text_description="Pasien jatuh",
+        department_id=perawat_user.department_id,
+        status=IncidentStatus.SUBMITTED,
+        prediction_pending=True,
+    )
+    session.add(incident)
+    session.commit()
+    session.add(PredictionJob(incident_id=incident.id, requested_by_id=perawat_user.id))
+    session.commit()
+
+    headers = auth_headers(client, perawat_user.email, "Password123")
+    etag = client.get("/v1/incidents", headers=headers).headers["etag"]
+
+    def broken(texts, use_cache=True):
+        raise RuntimeError("model crashed")
+
+    monkeypatch.setattr(jobs, "predict_all", broken)
+    monkeypatch.setattr(get_settings(), "prediction_job_max_attempts", 1)
+    assert jobs.run_prediction_jobs(session) == 1
+
+    response = client.get("/v1/incidents", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    [listed] = [row for row in response.json()["data"]["items"] if row["id"] == incident.id]
+    assert listed["prediction_pending"] is False
+
+
+def test_reclassify_updates_stale_incidents_and_checkpoints(engine, session, perawat_user, tmp_path, monkeypatch):
+    from src.app.models.incident import AuditLog, Incident, IncidentCategory, SKPCode
+    from src.app.services import ml
+    from src.app.services.incidents.reclassify import reclassify_incidents
+
+    incidents = [
+        Incident(reporter_id=perawat_user.id, free_text_description=f"Pasien jatuh {i}", status=IncidentStatus.SUBMITTED, model_version="old")
+        for i in range(5)
+    ]
+    incidents.append(Incident(reporter_id=perawat_user.id, free_text_description="Masih draft", model_version="old"))
+    session.add_all(incidents)
+    session.commit()
+
+    monkeypatch.setattr(ml.classifier, "model", object())
+    monkeypatch.setattr(ml.classifier, "model_version", "new")
+    monkeypatch.setattr(
+        ml,
+        "predict_all",
+        lambda texts, use_cache=True: [
+            ml.PredictionResult(category=IncidentCategory.KTD, confidence=0.9, model_version="new", skp_code=SKPCode.SKP6)
+            for _ in texts
+        ],
+    )
+
+    checkpoint = tmp_path / "checkpoint.json"
+    progress = reclassify_incidents(engine, perawat_user.id, chunk_size=2, max_rows_per_second=0, checkpoint_path=str(checkpoint))
+    assert progress.processed == 5
+    assert progress.chunks == 3
+    assert checkpoint.exists()
+
+    session.expire_all()
+    submitted = session.exec(select(Incident).where(Incident.status == IncidentStatus.SUBMITTED)).all()
+    assert {inc.model_version for inc in submitted} == {"new"}
+    assert {inc.skp_code.value for inc in submitted} == {"skp6"}
+    assert len(session.exec(select(AuditLog)).all()) == 3
+
+    rerun = reclassify_incidents(engine, perawat_user.id, chunk_size=2, max_rows_per_second=0, checkpoint_path=str(checkpoint))
+    assert rerun.processed == 5 and rerun.chunks == 3  # nothing left to do
+
+
+def test_reclassify_refuses_to_start_while_another_run_holds_the_lock(engine, perawat_user, tmp_path, monkeypatch):
+    import pytest
+
+    from src.app.services import ml
+    from src.app.services.incidents import reclassify
+
+    monkeypatch.setattr(ml.classifier, "model", object())
+    monkeypatch.setattr(ml.classifier, "model_version", "new")
+    monkeypatch.setattr(ml, "predict_all", lambda texts, use_cache=True: [])
+    checkpoint = tmp_path / "checkpoint.json"
+
+    held = reclassify._acquire_run_lock(checkpoint)  # e.g. the CLI script in another process
+    try:
+        with pytest.raises(reclassify.ReclassifyAlreadyRunning):
+            reclassify.reclassify_incidents(engine, perawat_user.id, checkpoint_path=str(checkpoint))
+        with pytest.raises(reclassify.ReclassifyAlreadyRunning):
+            reclassify.ReclassifyRunner().start(engine, perawat_user.id, checkpoint_path=str(checkpoint))
+    finally:
+        held.close()
+    reclassify._acquire_run_lock(checkpoint).close()
+
+
+def test_reclassify_never_stores_fallback_predictions(engine, session, perawat_user, tmp_path, monkeypatch):
+    import pytest
+
+    from src.app.models.incident import Incident, IncidentCategory
+    from src.app.services import ml
+    from src.app.services.incidents.reclassify import reclassify_incidents
+
+    incidents = [
+        Incident(
+            reporter_id=perawat_user.id,
+            free_text_description=f"Pasien jatuh {i}",
+            status=IncidentStatus.SUBMITTED,
+            predicted_category=IncidentCategory.SENTINEL,
+            predicted_confidence=0.97,
+            model_version="old",
+        )
+        for i in range(3)
+    ]
+    session.add_all(incidents)
+    session.commit()
+    monkeypatch.setattr(ml.classifier, "model", object())
+    monkeypatch.setattr(ml.classifier, "model_version", "new")
+    checkpoint = str(tmp_path / "checkpoint.json")
+
+    def fallback(reason):
+        return ml.PredictionResult(category=IncidentCategory.KTC, confidence=0.5, model_version="new", fallback_reason=reason)
+
+    # Embedder down: refuse to start.
+    monkeypatch.setattr(ml, "predict_all", lambda texts, use_cache=True: [fallback("embedder_failed") for _ in texts])
+    with pytest.raises(RuntimeError, match="embedder_failed"):
+        reclassify_incidents(engine, perawat_user.id, max_rows_per_second=0, checkpoint_path=checkpoint)
+
+    # One unknown label: that row keeps its stored prediction and stays eligible.
+    unknown_text = incidents[1].free_text_description
+    monkeypatch.setattr(
+        ml,
+        "predict_all",
+        lambda texts, use_cache=True: [
+            fallback("unknown_label")
+            if text == unknown_text
+            else ml.PredictionResult(category=IncidentCategory.KTD, confidence=0.8, model_version="new")
+            for text in texts
+        ],
+    )
+    progress = reclassify_incidents(engine, perawat_user.id, max_rows_per_second=0, checkpoint_path=checkpoint)
+    assert (progress.processed, progress.skipped) == (3, 1)
+
+    session.expire_all()
+    untouched = session.get(Incident, incidents[1].id)
+    assert (untouched.predicted_category, untouched.predicted_confidence, untouched.model_version) == (
+        IncidentCategory.SENTINEL,
+        0.97,
+        "old",
+    )
+    assert {session.get(Incident, incidents[i].id).model_version for i in (0, 2)} == {"new"}
+
+
+def test_similar_incidents_ranks_by_cosine_and_filters(client: TestClient, session, perawat_user, mutu_user, monkeypatch):
+    import numpy as np
+
+    from src.app.models.incident import Incident
+    from src.app.services.incidents import similarity
+
+    monkeypatch.setattr(similarity, "index", similarity.SimilarityIndex(initial_capacity=2))
+    other_department = session._test_departments[1].id
+    rows = [
+        ("Pasien jatuh dari tempat tidur", [1.0, 0.0, 0.0], perawat_user.department_id),
+        ("Pasien terpeleset di kamar mandi", [0.9, 0.1, 0.0], perawat_user.department_id),
+        ("Salah pemberian obat", [0.0, 1.0, 0.0], perawat_user.department_id),
+        ("Pasien jatuh saat transfer", [0.95, 0.0, 0.05], other_department),
+    ]
+    incidents = []
+    for text, vector, department_id in rows:
+        incident = Incident(
+            reporter_id=perawat_user.id,
+            free_text_description=text,
+            status=IncidentStatus.SUBMITTED,
+            department_id=department_id,
+        )
+        session.add(incident)
+        session.flush()
+        similarity.store_embedding(session, incident, np.array(vector), "test-model")
+        incidents.append(incident)
+    session.commit()
+
+    mutu_headers = auth_headers(client, mutu_user.email, "Password123")
+    response = client.get(f"/v1/incidents/{incidents[0].id}/similar", params={"k": 2}, headers=mutu_headers)
+    assert response.status_code == 200
+    assert [item["incident_id"] for item in response.json()["data"]] == [incidents[3].id, incidents[1].id]
+
+    perawat_headers = auth_headers(client, perawat_user.email, "Password123")
+    response = client.get(f"/v1/incidents/{incidents[0].id}/similar", headers=perawat_headers)
+    assert [item["incident_id"] for item in response.json()["data"]] == [incidents[1].id, incidents[2].id]
+
+
+def test_similarity_index_scores_float16_matrix_in_blocks(monkeypatch):
+    import numpy as np
+
+    from src.app.services.incidents import similarity
+
+    monkeypatch.setattr(similarity, "SCORE_BLOCK_ROWS", 3)
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(10, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = similarity.SimilarityIndex(initial_capacity=4)
+    for incident_id, vector in enumerate(vectors, start=1):
+        index.add(incident_id, vector, department_id=incident_id % 2, occurred_at=None)
+
+    assert index._vectors.dtype == np.float16
+    query = vectors[0]
+    expected = np.argsort(-(vectors @ query), kind="stable")[:4] + 1
+    assert [incident_id for incident_id, _ in index.search(query, k=4)] == expected.tolist()
+    best_id, best_score = index.search(query, k=1, department_id=0)[0]
+    assert best_id % 2 == 0 and abs(best_score - float(np.max(vectors[1::2] @ query))) < 1e-2
+    assert index.vector_for(1).dtype == np.float32
+
+
+def test_submit_reuses_speculative_draft_prediction(client: TestClient, session, perawat_user, monkeypatch):
+    import numpy as np
+
+    from src.app.config import get_settings
+    from src.app.models.incident import IncidentCategory, IncidentPredictionCache, SKPCode
+    from src.app.services import ml
+    from src.app.services.incidents import service, speculative
+
+    predicted: list[str] = []
+
+    def fake_predict_all(texts):
+        predicted.extend(texts)
+        return [
+            ml.PredictionResult(
+                category=IncidentCategory.KTD,
+                confidence=0.93,
+                model_version=ml.classifier.model_version,
+                skp_code=SKPCode.SKP6,
+                embedding=np.array([0.6, 0.8, 0.0]),
+            )
+            for _ in texts
+        ]
+
+    submit_time: list[str] = []
+    real_predict_within_budget = service.predict_within_budget
+
+    def spy_predict_within_budget(text):
+        submit_time.append(text)
+        return real_predict_within_budget(text)
+
+    monkeypatch.setattr(speculative, "predict_all", fake_predict_all)
+    monkeypatch.setattr(service, "predict_within_budget", spy_predict_within_budget)
+    headers = auth_headers(client, perawat_user.email, "Password123")
+
+    incident_id = client.post(
+        "/v1/incidents", json={"free_text_description": "Pasien jatuh dari tempat tidur"}, headers=headers
+    ).json()["data"]["id"]
+    assert predicted == ["Pasien jatuh dari tempat tidur"]
+    data = client.post(f"/v1/incidents/{incident_id}/submit", json={"confirm_submit": True}, headers=headers).json()["data"]
+    assert data["predicted_category"] == "KTD"
+    assert data["skp_code"] == "skp6"
+    assert submit_time == []
+    assert session.get(IncidentPredictionCache, incident_id) is None
+
+    # Text edited after the background prediction (with speculation off): submit recomputes.
+    incident_id = client.post(
+        "/v1/incidents", json={"free_text_description": "Pasien hampir jatuh"}, headers=headers
+    ).json()["data"]["id"]
+    monkeypatch.setattr(get_settings(), "speculative_prediction_enabled", False)
+    client.put(f"/v1/incidents/{incident_id}", json={"free_text_description": "Salah pemberian obat"}, headers=headers)
+    client.post(f"/v1/incidents/{incident_id}/submit", json={"confirm_submit": True}, headers=headers)
+    assert submit_time == ["Salah pemberian obat"]
+
+
+def test_month_counter_regrades_on_tier_change(session, perawat_user):
+    from datetime import datetime
+
+    from src.app.models.incident import DepartmentMonthStat, Incident, IncidentGrading
+    from src.app.services.incidents import service
+
+    occurred = datetime(2024, 3, 10, 8, 0)
+
+    def draft(harm):
+        incident = Incident(
+            reporter_id=perawat_user.id,
+            free_text_description="Pasien jatuh",
+            department_id=perawat_user.department_id,
+            occurred_at=occurred,
+            harm_indicator=harm,
+        )
+        session.add(incident)
+        session.commit()
+        return incident
+
+    first = draft("Tidak ada cedera")
+    draft("Ringan")  # stays a draft: not counted
+    service.submit_incident(session, first, perawat_user)
+    session.commit()
+    assert first.grading == IncidentGrading.BIRU  # 1/month -> probability 3
+
+    second = draft("Cedera ringan")
+    service.submit_incident(session, second, perawat_user)
+    session.commit()
+    session.refresh(first)
+    assert first.grading == IncidentGrading.HIJAU  # regraded: 2/month -> probability 4
+    assert second.grading == IncidentGrading.HIJAU
+    stat = session.get(DepartmentMonthStat, (perawat_user.department_id, occurred.date().replace(day=1)))
+    assert (stat.reported_count, stat.closed_count) == (2, 0)
+
+
+def test_rebuild_month_stats_recounts_reported_incidents(session, perawat_user):
+    from datetime import datetime
+
+    from src.app.models.incident import DepartmentMonthStat, Incident
+    from src.app.services.incidents import service
+
+    for day, status in ((3, IncidentStatus.SUBMITTED), (20, IncidentStatus.CLOSED), (21, IncidentStatus.DRAFT)):
+        session.add(
+            Incident(
+                reporter_id=perawat_user.id,
+                free_text_description="Pasien jatuh",
+                department_id=perawat_user.department_id,
+                occurred_at=datetime(2024, 5, day, 9, 30),
+                status=status,
+            )
+        )
+    session.add(Incident(reporter_id=perawat_user.id, free_text_description="Tanpa unit", status=IncidentStatus.SUBMITTED))
+    session.commit()
+
+    assert service.rebuild_month_stats(session) == 1
+    session.commit()
+    stats = session.exec(select(DepartmentMonthStat)).all()
+    assert [(stat.department_id, stat.month_start.isoformat(), stat.reported_count, stat.closed_count) for stat in stats] == [
+        (perawat_user.department_id, "2024-05-01", 2, 1)
+    ]
+
+
+def test_regrade_sql_matches_python_grading(session, perawat_user):
+    from datetime import date, datetime
+
+    from src.app.models.incident import Incident
+    from src.app.services.incidents import service
+
+    harms = [None, "", "   ", "Tidak ada cedera", "TIDAK ADA CIDERA", "ringan", "Cedera berat", "Kematian"]
+    incidents = [
+        Incident(
+            reporter_id=perawat_user.id,
+            free_text_description="Salah obat",
+            department_id=perawat_user.department_id,
+            occurred_at=datetime(2024, 5, 2),
+            harm_indicator=harm,
+            status=IncidentStatus.SUBMITTED,
+        )
+        for harm in harms
+    ]
+    session.add_all(incidents)
+    session.commit()
+
+    for probability in (1, 5):
+        assert service.regrade_month(session, perawat_user.department_id, date(2024, 5, 1), probability) == len(harms)
+        session.commit()
+        for incident in incidents:
+            session.refresh(incident)
+            expected = service._matrix_grade(probability, service._harm_to_severity(incident.harm_indicator))
+            assert incident.grading == expected, incident.harm_indicator
+
+
+def test_incident_list_etag_tracks_scope_and_updates(client: TestClient, session, perawat_user):
+    headers = auth_headers(client, perawat_user.email, "Password123")
+    incident_id = client.post("/v1/incidents", json={"free_text_description": "Pasien jatuh"}, headers=headers).json()["data"]["id"]
+
+    listing = client.get("/v1/incidents", headers=headers)
+    etag = listing.headers["etag"]
+    assert listing.json()["data"]["total"] == 1
+    assert client.get("/v1/incidents", headers={**headers, "If-None-Match": etag}).status_code == 304
+    assert client.get("/v1/incidents", params={"page": 2}, headers={**headers, "If-None-Match": etag}).status_code == 200
+
+    client.put(f"/v1/incidents/{incident_id}", json={"free_text_description": "Pasien jatuh di kamar mandi"}, headers=headers)
+    changed = client.get("/v1/incidents", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
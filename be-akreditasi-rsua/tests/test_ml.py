@@ -0,0 +1,455 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.app.models.incident import IncidentCategory, MDPCode, SKPCode
+from src.app.services.ml import EmbeddingCache, IncidentClassifier, InferenceBatcher, SkpMdpPredictor
+
+
+def test_batcher_merges_concurrent_predictions():
+    batch_sizes: list[int] = []
+    release = threading.Event()
+
+    def predict_batch(texts: list[str]) -> list[dict]:
+        release.wait(timeout=1)
+        batch_sizes.append(len(texts))
+        return [{"text": text} for text in texts]
+
+    batcher = InferenceBatcher(predict_batch, max_batch_size=8, max_wait_ms=50)
+    futures = [batcher.submit(f"kronologis {i}") for i in range(8)]
+    release.set()
+
+    results = [future.result(timeout=5) for future in futures]
+    assert results == [{"text": f"kronologis {i}"} for i in range(8)]
+    assert sum(batch_sizes) == 8
+    assert len(batch_sizes) < 8
+
+
+def test_batcher_fails_futures_left_without_a_result():
+    # Drops the last text of whatever batch it gets.
+    batcher = InferenceBatcher(lambda texts: [{"text": text} for text in texts[:-1]], max_batch_size=3, max_wait_ms=50)
+    futures = [batcher.submit(f"kronologis {i}") for i in range(3)]
+
+    outcomes = []
+    for future in futures:
+        try:
+            outcomes.append(future.result(timeout=5))
+        except RuntimeError as exc:
+            outcomes.append(exc)
+    assert isinstance(outcomes[-1], RuntimeError)
+    assert all(isinstance(outcome, (dict, RuntimeError)) for outcome in outcomes)
+
+
+def test_label_lookup_tables_are_built_at_load():
+    class _Encoder:
+        def __init__(self, classes):
+            self.classes_ = classes
+
+    class _Pipeline:
+        def predict(self, texts):
+            return np.array([[5, 3], [0, 1]] * (len(texts) // 2))
+
+    predictor = SkpMdpPredictor(
+        {
+            "model_pipeline": _Pipeline(),
+            "label_encoders": {
+                "SKP": _Encoder([f"SKP {i} : x" for i in range(1, 7)]),
+                "MDP Violation": _Encoder(["MDP 1 : a", "MDP 14 : b", "MDP 2 : c", "MDP 4 : d", "MDP 9 : e"]),
+            },
+            "target_columns": ["SKP", "MDP Violation"],
+        }
+    )
+    assert predictor.predict(["a", "b"]) == [
+        {"skp": SKPCode.SKP6, "mdp": MDPCode.MDP4},
+        {"skp": SKPCode.SKP1, "mdp": MDPCode.MDP14},
+    ]
+    classifier = IncidentClassifier.__new__(IncidentClassifier)
+    assert classifier._label_to_category("Sentinel") is IncidentCategory.SENTINEL
+
+
+def test_embedding_cache_persists_across_instances(tmp_path):
+    cache = EmbeddingCache("minilm", memory_size=1, directory=str(tmp_path), disk_size=2)
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]], dtype=np.float32)
+    cache.put_many(["a", "b", "c"], vectors)
+
+    reopened = EmbeddingCache("minilm", memory_size=4, directory=str(tmp_path), disk_size=2)
+    found = reopened.get_many(["a", "b", "c"])
+    assert found[0] is None  # evicted by the size bound
+    assert np.allclose(found[1], vectors[1])
+    assert np.allclose(found[2], vectors[2])
+    assert reopened.stats()["disk_hits"] == 2
+    assert reopened.stats()["misses"] == 1
+
+    other_model = EmbeddingCache("other", directory=str(tmp_path), disk_size=2)
+    assert other_model.get_many(["b"]) == [None]
+
+
+def test_bulk_predictions_bypass_the_embedding_cache(monkeypatch):
+    from src.app.services import ml
+
+    class _Embedder:
+        tokenizer = None
+
+        def encode(self, texts, batch_size, convert_to_numpy=True):
+            return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+    cache = EmbeddingCache("minilm", memory_size=8)
+    monkeypatch.setattr(ml.classifier, "embedder", _Embedder())
+    monkeypatch.setattr(ml.classifier, "embedding_cache", cache)
+    texts = ["pasien jatuh", "salah obat"]
+
+    assert ml.classifier._encode(texts, use_cache=False)[:, 0].tolist() == [12.0, 10.0]
+    assert cache.stats()["memory_entries"] == 0 and cache.stats()["misses"] == 0
+    ml.classifier._encode(texts)
+    assert cache.stats()["memory_entries"] == 2
+
+    seen: list[bool] = []
+    monkeypatch.setattr(ml, "executor", None)
+    monkeypatch.setattr(ml, "_predict_all_local", lambda batch, use_cache=True: seen.append(use_cache) or [])
+    ml.predict_all(["pasien jatuh"], use_cache=False)  # skips the batcher too
+    assert seen == [False]
+
+
+def test_disk_embedding_store_joins_a_ring_created_by_another_worker(tmp_path):
+    from src.app.services.ml import _DiskEmbeddingStore
+
+    first = _DiskEmbeddingStore(tmp_path, capacity=4)
+    second = _DiskEmbeddingStore(tmp_path, capacity=4)  # opened before the ring file existed
+    first.put_many([b"a" * 20], np.array([[1.0, 0.0]], dtype=np.float32))
+    second.put_many([b"b" * 20], np.array([[0.0, 1.0]], dtype=np.float32))
+
+    reopened = _DiskEmbeddingStore(tmp_path, capacity=4)
+    assert reopened.get(b"a" * 20).tolist() == [1.0, 0.0]
+    assert reopened.get(b"b" * 20).tolist() == [0.0, 1.0]
+
+
+def test_inference_executor_round_trip_crash_restart_and_shutdown(tmp_path, monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    import pytest
+
+    from src.app.services.ml import InferenceExecutor, PredictionResult
+
+    # Spawned workers read settings from the environment: with no artifacts they load
+    # nothing and answer with the keyword fallback, which is enough to exercise the pool.
+    monkeypatch.setenv("MODEL_PATH", str(tmp_path / "missing_classifier.pkl"))
+    monkeypatch.setenv("SKP_MDP_MODEL_PATH", str(tmp_path / "missing_skp_mdp.pkl"))
+    executor = InferenceExecutor(1)
+    try:
+        [first_pid] = executor.warm()
+        assert first_pid != os.getpid()
+
+        [result] = executor.submit_batch(["Pasien jatuh dari tempat tidur"]).result(timeout=60)
+        assert isinstance(result, PredictionResult)
+        assert result.fallback_reason == "model_missing"
+
+        with pytest.raises(BrokenProcessPool):
+            executor._submit(os._exit, 1).result(timeout=60)
+        [restarted_pid] = executor.warm()
+        assert restarted_pid != first_pid
+    finally:
+        executor.shutdown()
+    assert executor._executor is None
+
+
+def test_onnx_embedder_mean_pools_over_the_attention_mask(tmp_path):
+    import pytest
+
+    onnx = pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    tokenizers = pytest.importorskip("tokenizers")
+    from onnx import TensorProto, helper
+
+    from src.app.services.ml import ONNX_MODEL_FILE, ONNX_TOKENIZER_FILE, OnnxEmbedder
+
+    # Synthetic "transformer": token embeddings are rows of a fixed table. The pad row is
+    # huge so any pad token leaking into the mean shows up.
+    table = np.array([[1000.0, 1000.0], [3.0, 0.0], [0.0, 4.0], [6.0, 8.0]], dtype=np.float32)
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["token_embeddings"])],
+        "synthetic_minilm",
+        [
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "tokens"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "tokens"]),
+        ],
+        [helper.make_tensor_value_info("token_embeddings", TensorProto.FLOAT, ["batch", "tokens", 2])],
+        [helper.make_tensor("table", TensorProto.FLOAT, table.shape, table.flatten().tolist())],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)], ir_version=8)
+    onnx.save(model, str(tmp_path / ONNX_MODEL_FILE))
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel({"[PAD]": 0, "a": 1, "b": 2, "c": 3}, unk_token="[PAD]"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer.save(str(tmp_path / ONNX_TOKENIZER_FILE))
+
+    embedder = OnnxEmbedder(tmp_path)
+    vectors = embedder.encode(["a", "a b c"], batch_size=2)
+    assert np.allclose(vectors, [[3.0, 0.0], [3.0, 4.0]])
+
+    normalized = embedder.encode(["a", "a b c"], batch_size=1, normalize_embeddings=True)
+    assert np.allclose(normalized, [[1.0, 0.0], [0.6, 0.8]])
+
+
+def test_preload_disables_the_inference_executor(caplog):
+    from src.app.config import Settings
+    from src.app.services.ml import InferenceExecutor, _build_executor
+
+    assert _build_executor(Settings(ml_executor_workers=0, ml_preload_models=False)) is None
+    assert isinstance(_build_executor(Settings(ml_executor_workers=2, ml_preload_models=False)), InferenceExecutor)
+    assert _build_executor(Settings(ml_executor_workers=2, ml_preload_models=True)) is None
+    assert "ML_EXECUTOR_WORKERS=2 ignored" in caplog.text
+
+
+def test_ready_endpoint_reports_warmup(client):
+    deadline = time.monotonic() + 10
+    response = client.get("/ready")
+    while response.status_code == 503 and time.monotonic() < deadline:
+        assert response.json()["status"] == "warming_up"
+        time.sleep(0.05)
+        response = client.get("/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert "classify_warmup" in body["timings"]
+
+
+def test_metrics_endpoint_exposes_stage_latency(client, monkeypatch):
+    from src.app.services import ml
+
+    monkeypatch.setattr(ml.classifier, "model", None)
+    ml.predict_all(["Pasien jatuh dari bed", "Salah obat"])
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'rsua_ml_stage_seconds_count{stage="preprocess"}' in response.text
+    assert 'rsua_ml_fallback_total{reason="model_missing"}' in response.text
+    assert "rsua_ml_batch_size_bucket" in response.text
+
+
+def test_registry_hot_swaps_validates_and_rolls_back(tmp_path, monkeypatch):
+    import shutil
+
+    import joblib
+    import pytest
+
+    from src.app.services import ml
+
+    monkeypatch.setattr(ml, "registry", ml.ModelRegistry(keep=2))
+    monkeypatch.setattr(ml.classifier, "model", ml.classifier.model)
+    monkeypatch.setattr(ml.classifier, "model_version", ml.classifier.model_version)
+    monkeypatch.setattr(ml, "_skp_mdp_predictor", ml._skp_mdp_predictor)
+    original = ml.registry.current()
+
+    candidate = tmp_path / "incident_classifier_v2.pkl"
+    shutil.copy(ml.classifier.settings.model_path, candidate)
+    ml.registry.reload(str(candidate), ml.classifier.settings.skp_mdp_model_path)
+    assert ml.classifier.model_version == "incident_classifier_v2"
+    assert ml.registry.snapshot()[1] == "incident_classifier_v2"
+    assert [bundle.bundle_id for bundle in ml.registry.history] == [original.bundle_id]
+
+    broken = tmp_path / "broken.pkl"
+    joblib.dump({"not": "a model"}, broken)
+    with pytest.raises(ml.ModelValidationError):
+        ml.registry.reload(str(broken), ml.classifier.settings.skp_mdp_model_path)
+    assert ml.classifier.model_version == "incident_classifier_v2"
+
+    ml.registry.rollback()
+    assert ml.classifier.model_version == original.version
+    assert ml.classifier.model is original.model
+
+
+def test_registry_watcher_does_not_undo_a_rollback(tmp_path, monkeypatch):
+    import os
+    import shutil
+    import time
+
+    from src.app.services import ml
+
+    configured = tmp_path / "incident_classifier.pkl"
+    shutil.copy(ml.classifier.settings.model_path, configured)
+    monkeypatch.setattr(ml.classifier.settings, "model_path", str(configured))
+    monkeypatch.setattr(ml, "registry", ml.ModelRegistry(keep=2))
+    monkeypatch.setattr(ml.classifier, "model", ml.classifier.model)
+    monkeypatch.setattr(ml.classifier, "model_version", ml.classifier.model_version)
+    monkeypatch.setattr(ml, "_skp_mdp_predictor", ml._skp_mdp_predictor)
+    original = ml.registry.current()
+
+    def wait_for(condition, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+    ml.registry.start_watching(0.02)
+    try:
+        stat = configured.stat()
+        os.utime(configured, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        wait_for(lambda: ml.registry.current() is not original)
+        assert [bundle.bundle_id for bundle in ml.registry.history] == [original.bundle_id]
+
+        ml.registry.rollback()
+        assert ml.registry.current() is original
+        time.sleep(0.2)
+        assert ml.registry.current() is original
+        history = [bundle.bundle_id for bundle in ml.registry.history]
+        assert len(history) == len(set(history)) == 1
+    finally:
+        ml.registry.stop_watching()
+
+
+def test_registry_follows_generation_published_by_another_process(tmp_path, monkeypatch):
+    import shutil
+
+    from src.app.services import ml
+
+    monkeypatch.setattr(ml.classifier, "model", ml.classifier.model)
+    monkeypatch.setattr(ml.classifier, "model_version", ml.classifier.model_version)
+    monkeypatch.setattr(ml, "_skp_mdp_predictor", ml._skp_mdp_predictor)
+    marker = tmp_path / ".active_model.json"
+    # Two registries stand in for two web workers sharing the marker file.
+    handling = ml.ModelRegistry(keep=2, marker_path=str(marker))
+    other = ml.ModelRegistry(keep=2, marker_path=str(marker))
+    original = other.current()
+    handling.current()
+
+    candidate = tmp_path / "incident_classifier_v2.pkl"
+    shutil.copy(ml.classifier.settings.model_path, candidate)
+    handling.publish(handling.reload(str(candidate), ml.classifier.settings.skp_mdp_model_path))
+    published = handling.current().bundle_id
+
+    other.follow_marker()
+    assert other.current().bundle_id == published
+    other.follow_marker()  # unchanged marker: nothing to do
+    assert [bundle.bundle_id for bundle in other.history] == [original.bundle_id]
+
+    handling.publish(handling.rollback())
+    other.follow_marker()
+    assert other.current() is original
+    assert ml.classifier.model_version == original.version
+
+
+def test_circuit_breaker_opens_and_closes_after_probe():
+    from src.app.services.ml import CircuitBreaker
+
+    breaker = CircuitBreaker(window=4, min_calls=2, failure_ratio=0.5, cooldown_seconds=0.05)
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()  # the single half-open probe
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.trips == 1
+
+
+def test_submit_prediction_falls_back_when_over_budget(monkeypatch):
+    from src.app.services import ml
+
+    def slow_batch(texts: list[str]) -> list:
+        time.sleep(0.3)
+        return [None for _ in texts]
+
+    monkeypatch.setattr(ml, "batcher", InferenceBatcher(slow_batch, max_batch_size=1, max_wait_ms=0))
+    monkeypatch.setattr(ml, "breaker", ml.CircuitBreaker(window=2, min_calls=1, failure_ratio=1.0, cooldown_seconds=60))
+    monkeypatch.setattr(ml.classifier.settings, "ml_batch_enabled", True)
+    monkeypatch.setattr(ml.classifier.settings, "ml_latency_budget_ms", 20)
+
+    result = ml.predict_within_budget("Pasien jatuh di kamar mandi")
+    assert result.fallback_reason == "timeout"
+    assert result.model_version == ml.classifier.settings.model_fallback_version
+    assert ml.predict_within_budget("Pasien jatuh lagi").fallback_reason == "circuit_open"
+
+
+def test_unbatched_local_prediction_also_respects_the_budget(monkeypatch):
+    from src.app.services import ml
+
+    def slow_local(texts: list[str], use_cache: bool = True) -> list:
+        time.sleep(0.3)
+        return [None for _ in texts]
+
+    monkeypatch.setattr(ml, "executor", None)
+    monkeypatch.setattr(ml, "_predict_all_local", slow_local)
+    monkeypatch.setattr(ml, "breaker", ml.CircuitBreaker(window=2, min_calls=2, failure_ratio=1.0, cooldown_seconds=60))
+    monkeypatch.setattr(ml.classifier.settings, "ml_batch_enabled", False)
+    monkeypatch.setattr(ml.classifier.settings, "ml_latency_budget_ms", 20)
+
+    started = time.perf_counter()
+    result = ml.predict_within_budget("Pasien jatuh di kamar mandi")
+    assert time.perf_counter() - started < 0.2
+    assert result.fallback_reason == "timeout"
+
+
+def test_embed_bulk_buckets_by_length_and_keeps_order(monkeypatch):
+    from src.app.services import ml
+
+    class _Embedder:
+        tokenizer = None
+
+        def __init__(self) -> None:
+            self.padded: list[int] = []
+
+        def encode(self, texts, batch_size, convert_to_numpy=True):
+            lengths = [len(text.split()) for text in texts]
+            self.padded.append(max(lengths) * len(texts))
+            return np.array([[float(length), float(len(text))] for length, text in zip(lengths, texts)], dtype=np.float32)
+
+    embedder = _Embedder()
+    monkeypatch.setattr(ml.classifier, "embedder", embedder)
+    monkeypatch.setattr(ml.classifier.settings, "ml_bulk_tokens_per_batch", 64)
+    texts = [" ".join(["pasien"] * n) for n in (40, 1, 3, 25, 2, 40, 5)]
+
+    chunks = list(ml.embed_bulk(texts, window=4, preprocess=False))
+    assert [len(chunk) for chunk in chunks] == [4, 3]
+    assert np.concatenate(chunks)[:, 0].tolist() == [40, 1, 3, 25, 2, 40, 5]
+    assert all(padded <= 64 for padded in embedder.padded)
+
+
+HEAVY_ML_MODULES = ("numpy", "joblib", "lightgbm", "sklearn", "sentence_transformers", "torch", "onnxruntime", "tokenizers")
+
+
+def test_app_import_skips_ml_stack_and_stays_in_budget():
+    # Fresh interpreter: this test process already has numpy loaded. The environment
+    # and .env are inherited as-is, so a developer's settings are covered too.
+    budget = float(os.environ.get("RSUA_IMPORT_BUDGET_SECONDS", "2.0"))
+    probe = (
+        "import json, sys, time\n"
+        "started = time.perf_counter()\n"
+        "import src.app.main\n"
+        "elapsed = time.perf_counter() - started\n"
+        f"print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {HEAVY_ML_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    )
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert report["loaded"] == []
+    assert report["seconds"] < budget, f"import src.app.main took {report['seconds']:.2f}s (budget {budget}s)"
+
+
+def test_booster_fast_path_matches_sklearn_wrapper():
+    from lightgbm import LGBMClassifier
+
+    from src.app.services.ml import classify_embeddings
+
+    rng = np.random.default_rng(0)
+    features = rng.standard_normal((60, 8)).astype(np.float32)
+    labels = np.arange(60) % 3
+    features[:, 0] += labels * 2
+    model = LGBMClassifier(n_estimators=10, min_child_samples=2, verbose=-1).fit(features, labels)
+
+    batch = features[:7]
+    predicted, confidence, probabilities = classify_embeddings(model, batch, num_threads=1)
+    assert predicted.tolist() == model.predict(batch).tolist()
+    assert np.allclose(probabilities, model.predict_proba(batch))
+    assert np.allclose(confidence, probabilities.max(axis=1))